@@ -8,6 +8,7 @@
  * Ce module gère :
  *  - la réception non bloquante des commandes via Serial3
  *  - le parsing sécurisé des messages texte
+ *  - le décodage des trames binaires compactes (optionnel, négocié)
  *  - le pilotage du robot (vitesse, mode)
  *  - un watchdog de sécurité en cas de perte de communication
  */
@@ -23,6 +24,30 @@
  */
 static unsigned long lastCommandTime = 0;
 
+// ======================================================
+// TRAMES BINAIRES
+// ======================================================
+//
+// 0xA5 | TYPE | LEN | PAYLOAD (LEN octets) | CRC8
+//  - CRC-8 (polynôme 0x07) sur TYPE, LEN et PAYLOAD
+//  - flottants : float32 little-endian (format natif AVR)
+//
+// L'octet de synchro n'est pas de l'ASCII : trames et lignes texte
+// cohabitent sur Serial3. La Raspberry active le binaire après avoir
+// reçu "PONG BIN" en réponse à "PING BIN" (cf. hardware/uart_codec.py).
+
+static const uint8_t FRAME_SYNC = 0xA5;
+static const uint8_t FRAME_VEL  = 0x01;  // 3 x float32 : vx, vy, w
+static const uint8_t FRAME_MODE = 0x02;  // uint8 : 0 MANUAL, 1 AI
+static const uint8_t FRAME_PING = 0x03;  // uint16 : seq
+static const uint8_t FRAME_PONG = 0x83;  // uint16 : seq (réponse)
+static const uint8_t FRAME_MAX_PAYLOAD = 16;
+
+/** @brief Trame en cours de réception (SYNC non stocké) */
+static uint8_t frameBuf[2 + FRAME_MAX_PAYLOAD + 1];
+static uint8_t frameLen = 0;      ///< octets reçus dans frameBuf
+static bool inFrame = false;
+
 // ======================================================
 // OUTILS INTERNES
 // ======================================================
@@ -47,6 +72,98 @@ static float safeParseFloat(const String &s) {
   return clean.toFloat();
 }
 
+/**
+ * @brief CRC-8, polynôme 0x07, init 0x00
+ */
+static uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++)
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+  }
+  return crc;
+}
+
+/**
+ * @brief Lecture d'un float32 little-endian (alignement libre)
+ */
+static float readFloat(const uint8_t *p) {
+  float v;
+  memcpy(&v, p, sizeof(float));
+  return v;
+}
+
+/**
+ * @brief Change de mode et renvoie l'écho texte attendu par la Raspberry
+ */
+static void applyMode(ControlMode mode) {
+  mecanumSetMode(mode);
+  Serial3.println(mode == MODE_AI ? "MODE AI" : "MODE MANUAL");
+  lastCommandTime = millis();
+}
+
+/**
+ * @brief Exécute une trame binaire complète (CRC vérifié)
+ *
+ * @param type    Type de trame
+ * @param payload Données (len octets)
+ * @param len     Taille des données
+ *
+ * Une trame de taille inattendue est ignorée (pas de mise à jour du
+ * watchdog).
+ */
+static void handleFrame(uint8_t type, const uint8_t *payload, uint8_t len) {
+  switch (type) {
+    case FRAME_VEL:
+      if (len != 3 * sizeof(float)) return;
+      mecanumSetCommand(readFloat(payload), readFloat(payload + 4), readFloat(payload + 8));
+      lastCommandTime = millis();
+      return;
+
+    case FRAME_MODE:
+      if (len != 1) return;
+      applyMode(payload[0] ? MODE_AI : MODE_MANUAL);
+      return;
+
+    case FRAME_PING: {
+      if (len != 2) return;
+      uint8_t reply[5] = {FRAME_SYNC, FRAME_PONG, 2, payload[0], payload[1]};
+      uint8_t crc = crc8(reply + 1, 4);
+      Serial3.write(reply, 5);
+      Serial3.write(crc);
+      lastCommandTime = millis();
+      return;
+    }
+
+    default:
+      return;
+  }
+}
+
+/**
+ * @brief Ajoute un octet à la trame en cours
+ *
+ * Trame complète : vérification du CRC puis exécution. LEN trop grand
+ * ou CRC faux : la trame est abandonnée (resynchronisation sur le
+ * prochain 0xA5).
+ */
+static void feedFrame(uint8_t b) {
+  frameBuf[frameLen++] = b;
+
+  if (frameLen == 2 && frameBuf[1] > FRAME_MAX_PAYLOAD) {
+    inFrame = false;
+    return;
+  }
+  if (frameLen < 2 || frameLen < (uint8_t)(frameBuf[1] + 3)) return;
+
+  // frameBuf = TYPE LEN PAYLOAD CRC
+  uint8_t len = frameBuf[1];
+  if (crc8(frameBuf, len + 2) == frameBuf[len + 2])
+    handleFrame(frameBuf[0], frameBuf + 2, len);
+  inFrame = false;
+}
+
 /**
  * @brief Traite une ligne complète reçue sur Serial3
  *
@@ -57,6 +174,7 @@ static float safeParseFloat(const String &s) {
  *  - MODE MANUAL   : mode open-loop
  *  - MODE AI       : mode PID
  *  - PING          : test de communication (répond PONG)
+ *  - PING BIN      : négociation des trames binaires (répond PONG BIN)
  */
 static void handleLine(String &line) {
   Serial.print("[Protocol] Ligne brute: ");
@@ -107,11 +225,9 @@ static void handleLine(String &line) {
     lastCommandTime = millis();
 
     if (clean.indexOf("MANUAL") > 0) {
-      mecanumSetMode(MODE_MANUAL);
-      Serial3.println("MODE MANUAL");
+      applyMode(MODE_MANUAL);
     } else if (clean.indexOf("AI") > 0) {
-      mecanumSetMode(MODE_AI);
-      Serial3.println("MODE AI");
+      applyMode(MODE_AI);
     }
     return;
   }
@@ -120,7 +236,7 @@ static void handleLine(String &line) {
   // COMMANDE PING
   // ====================================================
   if (clean.startsWith("PING")) {
-    Serial3.println("PONG");
+    Serial3.println(clean.endsWith("BIN") ? "PONG BIN" : "PONG");
     lastCommandTime = millis();
     return;
   }
@@ -150,6 +266,7 @@ void protocolInit() {
  * @brief Met à jour la communication série (non bloquant)
  *
  * - Lit Serial3 caractère par caractère
+ * - 0xA5 (jamais présent dans le texte) : début de trame binaire (feedFrame)
  * - Reconstruit les lignes terminées par \\n ou \\r
  * - Transmet les lignes complètes au parser
  *
@@ -159,7 +276,19 @@ void protocolUpdate() {
   static String buffer = "";
 
   while (Serial3.available()) {
-    char c = Serial3.read();
+    int b = Serial3.read();
+
+    if (inFrame) {
+      feedFrame((uint8_t)b);
+      continue;
+    }
+    if (b == FRAME_SYNC) {
+      inFrame = true;
+      frameLen = 0;
+      continue;
+    }
+
+    char c = (char)b;
 
     Serial.print("[Serial3] Reçu: ");
     // Serial.println(c);
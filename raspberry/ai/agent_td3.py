@@ -5,17 +5,21 @@ Agent TD3 pour robot omniwheel (actions continues).
 
 - Actor : π(s) -> a (vx, vy, w) dans [-1, 1]
 - Critic : Q1(s,a), Q2(s,a)
-- Replay buffer
+- Replay buffer (uniforme ou priorisé par sum-tree)
 - Target networks (actor_target, critic_target)
 - TD3 tricks : double critic, policy delay, target policy smoothing
 """
 
-import random
+import os
+import copy
+import threading
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 
+from ai import replay_store
+
 
 # ----------------------------------------------------------------------
 #  Réseaux
@@ -75,28 +79,270 @@ class Critic(nn.Module):
         return self.q1(x)
 
 
+# ----------------------------------------------------------------------
+#  Inférence NumPy (boucle de contrôle)
+# ----------------------------------------------------------------------
+class NumpyPolicy:
+    """
+    Forward de l'Actor en NumPy pur, pour un seul état.
+
+    Poids copiés (float32, transposés, contigus) depuis l'Actor à chaque
+    load_from() ; tampons de sortie préalloués par couche. Évite, à chaque
+    appel, la création de tenseurs et le dispatcher PyTorch, qui dominent
+    le coût de ces petites multiplications matricielles.
+    """
+    def __init__(self, actor):
+        self.load_from(actor)
+
+    def load_from(self, actor):
+        layers = [m for m in actor.net if isinstance(m, nn.Linear)]
+        self.weights = [l.weight.detach().cpu().numpy().T.astype(np.float32, order="C")
+                        for l in layers]
+        self.biases = [l.bias.detach().cpu().numpy().astype(np.float32) for l in layers]
+        self._out = [np.empty(w.shape[1], dtype=np.float32) for w in self.weights]
+        self._state = np.empty(self.weights[0].shape[0], dtype=np.float32)
+
+    def __call__(self, state):
+        x = self._state
+        x[:] = state
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, self._out)):
+            np.dot(x, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0.0, out=out)     # ReLU
+            else:
+                np.tanh(out, out=out)             # bornes [-1, 1]
+            x = out
+        return x.copy()
+
+
 # ----------------------------------------------------------------------
 #  Replay Buffer
 # ----------------------------------------------------------------------
 class ReplayBuffer:
-    def __init__(self, capacity=1000000):
-        self.capacity = capacity
-        self.buffer = []
-        self.pos = 0
+    """
+    Buffer circulaire colonnaire (NumPy préalloué).
+
+    Une colonne float32 par champ (states, actions, rewards, next_states,
+    dones) : la mémoire est fixée à la création (voir `nbytes`) et
+    l'échantillonnage se fait par indexation vectorisée, sans construire
+    de tuples Python.
+
+    path : répertoire de stockage persistant (voir replay_store.py). Les
+    colonnes sont alors des np.memmap rouvertes telles quelles au
+    redémarrage ; sync() rend pos / size durables.
+    """
+    def __init__(self, state_dim, action_dim, capacity=1000000, path=None):
+        self.capacity = int(capacity)
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        self.path = path
+
+        if path is None:
+            self.states      = np.zeros((self.capacity, state_dim), dtype=np.float32)
+            self.actions     = np.zeros((self.capacity, action_dim), dtype=np.float32)
+            self.rewards     = np.zeros(self.capacity, dtype=np.float32)
+            self.next_states = np.zeros((self.capacity, state_dim), dtype=np.float32)
+            self.dones       = np.zeros(self.capacity, dtype=np.float32)
+            self.meta = {"episodes": {}}
+            self.pos = 0
+            self.size = 0
+        else:
+            columns, self.meta = replay_store.open_columns(path, self.capacity, state_dim, action_dim)
+            self.states      = columns["states"]
+            self.actions     = columns["actions"]
+            self.rewards     = columns["rewards"]
+            self.next_states = columns["next_states"]
+            self.dones       = columns["dones"]
+            self.pos = int(self.meta["pos"])
+            self.size = int(self.meta["size"])
 
     def push(self, s, a, r, ns, d):
-        if len(self.buffer) < self.capacity:
-            self.buffer.append(None)
-        self.buffer[self.pos] = (s, a, r, ns, d)
+        i = self.pos
+        self.states[i] = s
+        self.actions[i] = a
+        self.rewards[i] = r
+        self.next_states[i] = ns
+        self.dones[i] = d
+
         self.pos = (self.pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
 
-    def sample(self, batch_size):
-        batch = random.sample(self.buffer, batch_size)
-        s, a, r, ns, d = map(np.array, zip(*batch))
-        return s, a, r, ns, d
+    def push_batch(self, s, a, r, ns, d):
+        """
+        Ajoute un bloc de transitions (tableaux de même longueur).
+        Retourne les indices écrits dans le buffer.
+        """
+        n = len(r)
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = s
+        self.actions[idx] = a
+        self.rewards[idx] = r
+        self.next_states[idx] = ns
+        self.dones[idx] = d
+
+        self.pos = int((self.pos + n) % self.capacity)
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def sample(self, batch_size, out=None):
+        """
+        out : tuple optionnel de 5 tableaux (states, actions, rewards,
+              next_states, dones) de taille batch_size, remplis sur place
+              (ex. vues NumPy de tenseurs torch réutilisés).
+        """
+        idx = np.random.randint(0, self.size, size=batch_size)
+        return self._gather(idx, out)
+
+    def _gather(self, idx, out=None):
+        columns = (self.states, self.actions, self.rewards, self.next_states, self.dones)
+        if out is None:
+            return tuple(c[idx] for c in columns)
+        for c, o in zip(columns, out):
+            np.take(c, idx, axis=0, out=o)
+        return out
+
+    @property
+    def persistent(self):
+        return self.path is not None
+
+    def sync(self, lock=None):
+        """
+        Stockage persistant : écrit les colonnes sur disque puis les
+        métadonnées (pos / size relevés avant le flush). Sans effet en RAM.
+        `lock` (optionnel) protège le relevé de pos / size et la copie de
+        meta (meta["episodes"] est modifié par la boucle IA).
+        """
+        if self.path is None:
+            return
+        if lock is not None:
+            with lock:
+                pos, size = self.pos, self.size
+                meta = copy.deepcopy(self.meta)
+        else:
+            pos, size = self.pos, self.size
+            meta = copy.deepcopy(self.meta)
+
+        for col in (self.states, self.actions, self.rewards, self.next_states, self.dones):
+            col.flush()
+
+        meta.update(pos=int(pos), size=int(size))
+        replay_store.write_meta(self.path, meta)
+
+    @property
+    def nbytes(self):
+        """Mémoire totale réservée par le buffer (octets)."""
+        return (self.states.nbytes + self.actions.nbytes + self.rewards.nbytes
+                + self.next_states.nbytes + self.dones.nbytes)
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size
+
+
+# ----------------------------------------------------------------------
+#  Prioritized Replay (sum-tree)
+# ----------------------------------------------------------------------
+class SumTree:
+    """
+    Arbre de sommes binaire stocké dans un tableau (racine à l'indice 1).
+
+    Les feuilles [leaf_base, leaf_base + capacity) portent les priorités.
+    Mise à jour et recherche en O(log n), vectorisées sur un lot d'indices.
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.leaf_base = 1
+        while self.leaf_base < self.capacity:
+            self.leaf_base *= 2
+        self.depth = self.leaf_base.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_base, dtype=np.float64)
+
+    @property
+    def total(self):
+        return float(self.tree[1])
+
+    def set(self, idx, priorities):
+        """Fixe la priorité des feuilles `idx` puis remonte vers la racine."""
+        nodes = np.asarray(idx, dtype=np.int64) + self.leaf_base
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            # Doublons possibles : chaque écriture porte la même somme
+            nodes = nodes // 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def get(self, idx):
+        return self.tree[np.asarray(idx, dtype=np.int64) + self.leaf_base]
+
+    def find(self, values):
+        """Descend l'arbre pour chaque valeur cumulée de `values`."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values > left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        return nodes - self.leaf_base
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer priorisé par l'erreur TD (Schaul et al., PER).
+
+    - P(i) = p_i^alpha / somme(p^alpha)
+    - poids d'importance w_i = (N * P(i))^-beta / max(w)
+    - beta augmente de `beta_increment` à chaque sample, jusqu'à 1.0
+
+    `sample()` retourne en plus les poids IS et les indices à passer
+    ensuite à `update_priorities()`.
+    """
+    def __init__(self, state_dim, action_dim, capacity=1000000, path=None,
+                 alpha=0.6, beta=0.4, beta_increment=1e-5, eps=1e-6):
+        super().__init__(state_dim, action_dim, capacity, path)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+
+        # Stockage rouvert : priorités non persistées, toutes au maximum
+        if self.size:
+            self.tree.set(np.arange(self.size), self.max_priority ** self.alpha)
+
+    def push(self, s, a, r, ns, d):
+        i = self.pos
+        super().push(s, a, r, ns, d)
+        self.tree.set([i], self.max_priority ** self.alpha)
+
+    def push_batch(self, s, a, r, ns, d):
+        idx = super().push_batch(s, a, r, ns, d)
+        self.tree.set(idx, self.max_priority ** self.alpha)
+        return idx
+
+    def sample(self, batch_size, out=None):
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probs = self.tree.get(idx) / total
+        weights = (self.size * probs) ** (-self.beta)
+        weights = (weights / weights.max()).astype(np.float32)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return (*self._gather(idx, out), weights, idx)
+
+    def update_priorities(self, idx, td_errors):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.set(idx, priorities ** self.alpha)
+
+    @property
+    def nbytes(self):
+        return super().nbytes + self.tree.tree.nbytes
 
 
 # ----------------------------------------------------------------------
@@ -110,6 +356,7 @@ class TD3Agent:
         - select_action(state, noise_scale=0.1)
         - push_transition(s, a, r, ns, d)
         - train_step(batch_size=64)
+        - publish_policy()
         - save(path) / load(path)
         - save_full(path) / load_full(path)
     """
@@ -123,7 +370,12 @@ class TD3Agent:
                  tau=0.005,
                  policy_noise=0.2,
                  noise_clip=0.5,
-                 policy_delay=2):
+                 policy_delay=2,
+                 buffer_capacity=1000000,
+                 buffer_path=None,
+                 prioritized=False,
+                 per_alpha=0.6,
+                 per_beta=0.4):
 
         # Dimensions
         self.state_dim = state_dim
@@ -147,8 +399,14 @@ class TD3Agent:
         self.actor_optimizer = optim.Adam(self.actor.parameters(), lr=lr_actor)
         self.critic_optimizer = optim.Adam(self.critic.parameters(), lr=lr_critic)
 
-        # Replay buffer
-        self.buffer = ReplayBuffer()
+        # Replay buffer (uniforme ou priorisé)
+        self.prioritized = prioritized
+        if prioritized:
+            self.buffer = PrioritizedReplayBuffer(state_dim, action_dim, capacity=buffer_capacity,
+                                                  path=buffer_path, alpha=per_alpha, beta=per_beta)
+        else:
+            self.buffer = ReplayBuffer(state_dim, action_dim, capacity=buffer_capacity,
+                                       path=buffer_path)
 
         # CPU uniquement
         self.device = torch.device("cpu")
@@ -157,6 +415,24 @@ class TD3Agent:
         self.critic.to(self.device)
         self.critic_target.to(self.device)
 
+        # Politique d'inférence (NumPy) : instantané de self.actor, republié
+        # après chaque update de l'actor (auto_publish) ou par le Learner.
+        self.inference = NumpyPolicy(self.actor)
+        self.auto_publish = True
+        self.policy_lock = threading.Lock()
+        self.buffer_lock = threading.Lock()
+
+        # Soft update groupé (listes de paramètres, une opération foreach)
+        self._actor_params = list(self.actor.parameters())
+        self._actor_target_params = list(self.actor_target.parameters())
+        self._critic_params = list(self.critic.parameters())
+        self._critic_target_params = list(self.critic_target.parameters())
+
+        # Tenseurs de batch réutilisés (remplis sans copie intermédiaire)
+        self._batch_size = None
+        self._batch = None
+        self._batch_views = None
+
         # Pour monitoring
         self.total_it = 0  # nombre total d'updates
 
@@ -172,9 +448,8 @@ class TD3Agent:
         Returns:
             np.array: action continue dans [-1, 1]^action_dim
         """
-        state_t = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            action = self.actor(state_t).cpu().numpy()[0]
+        with self.policy_lock:
+            action = self.inference(state)
 
         if noise_scale > 0.0:
             noise = np.random.normal(0, noise_scale, size=self.action_dim)
@@ -194,15 +469,32 @@ class TD3Agent:
         ns: next_state
         d : done (float 0.0 ou 1.0)
         """
-        self.buffer.push(s, a, r, ns, d)
+        with self.buffer_lock:
+            self.buffer.push(s, a, r, ns, d)
+
+    # ------------------------------------------------------------------
+    #  Politique d'inférence (acteur publié)
+    # ------------------------------------------------------------------
+    def publish_policy(self):
+        """
+        Recopie les poids de l'actor entraîné vers la politique d'inférence.
+        Avec auto_publish=False (Learner en thread), seul l'appelant décide
+        du rythme de publication.
+        """
+        with self.policy_lock:
+            self.inference.load_from(self.actor)
 
     # ------------------------------------------------------------------
     #  Apprentissage
     # ------------------------------------------------------------------
-    def train_step(self, batch_size=64):
+    def train_step(self, batch_size=64, bc_alpha=None):
         """
         Effectue une étape d'apprentissage TD3.
 
+        bc_alpha : si fourni, perte actor TD3+BC (Fujimoto & Gu, 2021) pour
+                   le pré-entraînement hors ligne sur des données figées :
+                   -λ Q(s, π(s)) + (π(s) - a)², λ = bc_alpha / mean|Q|
+
         Returns:
             dict | None :
                 {
@@ -216,15 +508,15 @@ class TD3Agent:
 
         self.total_it += 1
 
-        # Échantillonnage
-        s, a, r, ns, d = self.buffer.sample(batch_size)
-
-        # Conversion en tenseurs
-        state      = torch.FloatTensor(s).to(self.device)
-        action     = torch.FloatTensor(a).to(self.device)
-        reward     = torch.FloatTensor(r).unsqueeze(1).to(self.device)
-        next_state = torch.FloatTensor(ns).to(self.device)
-        done       = torch.FloatTensor(d).unsqueeze(1).to(self.device)
+        # Échantillonnage directement dans les tenseurs de batch
+        state, action, reward, next_state, done = self._batch_tensors(batch_size)
+        weights = None
+        with self.buffer_lock:
+            if self.prioritized:
+                *_, w, idx = self.buffer.sample(batch_size, out=self._batch_views)
+                weights = torch.from_numpy(w).unsqueeze(1)
+            else:
+                self.buffer.sample(batch_size, out=self._batch_views)
 
         # ---------------- Critic update ----------------
         with torch.no_grad():
@@ -242,8 +534,18 @@ class TD3Agent:
 
         # Q actuels
         current_q1, current_q2 = self.critic(state, action)
-        critic_loss = nn.functional.mse_loss(current_q1, target_q) + \
-                      nn.functional.mse_loss(current_q2, target_q)
+        if weights is None:
+            critic_loss = nn.functional.mse_loss(current_q1, target_q) + \
+                          nn.functional.mse_loss(current_q2, target_q)
+        else:
+            # PER : MSE pondérée par les poids d'importance
+            td1 = current_q1 - target_q
+            td2 = current_q2 - target_q
+            critic_loss = (weights * (td1.pow(2) + td2.pow(2))).mean()
+
+            td_errors = 0.5 * (td1.abs() + td2.abs())
+            with self.buffer_lock:
+                self.buffer.update_priorities(idx, td_errors.detach().cpu().numpy().ravel())
 
         self.critic_optimizer.zero_grad()
         critic_loss.backward()
@@ -255,7 +557,13 @@ class TD3Agent:
         # ---------------- Actor + target update (delay) ----------------
         if self.total_it % self.policy_delay == 0:
             # Actor : maximiser Q -> minimiser -Q
-            actor_loss = -self.critic.q1_only(state, self.actor(state)).mean()
+            pi = self.actor(state)
+            q = self.critic.q1_only(state, pi)
+            if bc_alpha is None:
+                actor_loss = -q.mean()
+            else:
+                lmbda = bc_alpha / q.abs().mean().detach().clamp_min(1e-6)
+                actor_loss = -lmbda * q.mean() + nn.functional.mse_loss(pi, action)
 
             self.actor_optimizer.zero_grad()
             actor_loss.backward()
@@ -264,9 +572,12 @@ class TD3Agent:
 
             actor_loss_value = float(actor_loss.item())
 
+            if self.auto_publish:
+                self.publish_policy()
+
             # Soft update des cibles
-            self._soft_update(self.actor, self.actor_target)
-            self._soft_update(self.critic, self.critic_target)
+            self._soft_update(self._actor_params, self._actor_target_params)
+            self._soft_update(self._critic_params, self._critic_target_params)
 
         return {
             "critic_loss": float(critic_loss.item()),
@@ -276,9 +587,40 @@ class TD3Agent:
     # ------------------------------------------------------------------
     #  Soft update
     # ------------------------------------------------------------------
-    def _soft_update(self, net, target_net):
-        for param, target_param in zip(net.parameters(), target_net.parameters()):
-            target_param.data.copy_(self.tau * param.data + (1.0 - self.tau) * target_param.data)
+    @torch.no_grad()
+    def _soft_update(self, params, target_params):
+        """
+        target <- target + tau * (param - target), en place.
+        Une seule opération foreach sur toute la liste quand disponible.
+        """
+        if hasattr(torch, "_foreach_lerp_"):
+            torch._foreach_lerp_(target_params, params, self.tau)
+        else:
+            for param, target_param in zip(params, target_params):
+                target_param.lerp_(param, self.tau)
+
+    # ------------------------------------------------------------------
+    #  Tenseurs de batch
+    # ------------------------------------------------------------------
+    def _batch_tensors(self, batch_size):
+        """
+        Tenseurs CPU (state, action, reward, next_state, done) alloués une
+        fois par taille de batch. Leurs vues NumPy (mémoire partagée) sont
+        passées à buffer.sample(out=...) : aucune copie vers torch.
+        """
+        if self._batch_size != batch_size:
+            b = batch_size
+            self._batch = (
+                torch.empty(b, self.state_dim),
+                torch.empty(b, self.action_dim),
+                torch.empty(b, 1),
+                torch.empty(b, self.state_dim),
+                torch.empty(b, 1),
+            )
+            state, action, reward, next_state, done = (t.numpy() for t in self._batch)
+            self._batch_views = (state, action, reward.reshape(b), next_state, done.reshape(b))
+            self._batch_size = batch_size
+        return self._batch
 
     # ------------------------------------------------------------------
     #  Sauvegarde / chargement
@@ -295,12 +637,14 @@ class TD3Agent:
         """
         self.actor.load_state_dict(torch.load(path, map_location=self.device))
         self.actor_target.load_state_dict(self.actor.state_dict())
+        self.publish_policy()
 
-    def save_full(self, path):
+    def state_dicts(self):
         """
-        Sauvegarde complète (réseaux + optim + iters).
+        État complet (réseaux + optim + iters), format de save_full.
+        Les tenseurs sont partagés avec l'agent (voir snapshot()).
         """
-        torch.save({
+        return {
             "actor": self.actor.state_dict(),
             "actor_target": self.actor_target.state_dict(),
             "critic": self.critic.state_dict(),
@@ -308,13 +652,16 @@ class TD3Agent:
             "actor_opt": self.actor_optimizer.state_dict(),
             "critic_opt": self.critic_optimizer.state_dict(),
             "total_it": self.total_it,
-        }, path)
+        }
 
-    def load_full(self, path):
+    def snapshot(self):
         """
-        Chargement complet (reprise d'entraînement parfaite).
+        Copie mémoire de state_dicts() : reste valide pendant que
+        l'entraînement continue (sauvegarde en tâche de fond).
         """
-        data = torch.load(path, map_location=self.device)
+        return copy.deepcopy(self.state_dicts())
+
+    def load_state(self, data):
         self.actor.load_state_dict(data["actor"])
         self.actor_target.load_state_dict(data["actor_target"])
         self.critic.load_state_dict(data["critic"])
@@ -322,3 +669,24 @@ class TD3Agent:
         self.actor_optimizer.load_state_dict(data["actor_opt"])
         self.critic_optimizer.load_state_dict(data["critic_opt"])
         self.total_it = data["total_it"]
+        self.publish_policy()
+
+    def save_full(self, path):
+        """
+        Sauvegarde complète (réseaux + optim + iters).
+        Fichier temporaire + fsync + rename, comme checkpoint.py : ne
+        réécrit jamais un fichier partagé (export_path est un lien physique
+        vers le dernier checkpoint, voire best.pth).
+        """
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            torch.save(self.state_dicts(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def load_full(self, path):
+        """
+        Chargement complet (reprise d'entraînement parfaite).
+        """
+        self.load_state(torch.load(path, map_location=self.device))
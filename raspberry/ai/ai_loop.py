@@ -4,19 +4,31 @@ ai_loop.py
 Boucle IA TD3 en temps réel pour AxisOne (version PREMIUM).
 
 Fonctionnalités :
-- Exécution de l'agent TD3 à 20 Hz
+- Exécution de l'agent TD3 à 20 Hz (échéances fixes, ai/scheduler.py)
+- Apprentissage dans un thread séparé (ai/learner.py)
 - Interaction avec RobotEnv
 - Diffusion des infos IA vers /ws-ai
+- Métriques : ai_tick_seconds, ai_ticks_total, ai_tick_overruns_total
 - Application dynamique des paramètres via config.py
 - Gestion robuste des erreurs
 - Démarrage / arrêt propre
 """
 
 import asyncio
-import json
-from ai.train_rl import init_agent, get_agent, run_agent_once
+import time
+from ai.train_rl import (
+    init_agent, get_agent, run_agent_once, start_learner, stop_learner, close_logs,
+    flush_checkpoints,
+)
 from ai import config as cfg
-from ws.ws_ai import get_ia_clients
+from ai.scheduler import LoopScheduler
+from ws.ws_ai import publish_ai
+from telemetry import metrics
+
+TICK_TIME = metrics.histogram("ai_tick_seconds", "Durée d'un tick IA (run_agent_once)")
+TICKS = metrics.counter("ai_ticks_total", "Ticks IA exécutés")
+OVERRUNS = metrics.counter("ai_tick_overruns_total", "Ticks IA en retard (apprentissage sauté)")
+ERRORS = metrics.counter("ai_tick_errors_total", "Ticks IA en erreur")
 
 # Instance globale de l'environnement (optionnel)
 _env_instance = None
@@ -48,7 +60,7 @@ async def _ai_loop():
         - observe
         - choisit action
         - step env
-        - apprend
+        - apprend (sauf si le Learner tourne en thread)
         - retourne reward, info, episode
     """
     global ia_running
@@ -63,28 +75,37 @@ async def _ai_loop():
     cfg.apply_to_agent(agent)
     cfg.apply_to_env(_env_instance)
 
+    # Apprentissage hors event loop
+    start_learner()
+
+    # Cadence à échéances fixes (train_frequency_hz, 20 Hz par défaut)
+    sched = LoopScheduler(lambda: cfg.CONFIG["train_frequency_hz"])
+
     while ia_running:
-        try:
-            # Exécute un pas d'IA
-            reward, info, episode = await run_agent_once()
+        dt = await sched.tick()
+        if sched.late:
+            OVERRUNS.inc()
 
-            # Ajout du numéro d'épisode
+        try:
+            # Exécute un pas d'IA (sans apprentissage si le tick est en retard)
+            t0 = time.perf_counter()
+            reward, info, episode = await run_agent_once(
+                dt=dt, train=not sched.late, deadline=sched.next_deadline()
+            )
+            TICK_TIME.observe(time.perf_counter() - t0)
+            TICKS.inc()
+
+            # Ajout du numéro d'épisode + cadence
             info["episode"] = episode
+            info.update(sched.stats())
 
-            # Diffusion vers tous les clients IA
-            msg = json.dumps(info)
-            for ws in list(get_ia_clients()):
-                try:
-                    await ws.send(msg)
-                except:
-                    get_ia_clients().discard(ws)
+            # Diffusion vers tous les clients IA (non bloquant, ws_hub.py)
+            publish_ai(info)
 
         except Exception as e:
+            ERRORS.inc()
             print("[IA] ERREUR dans ai_loop :", e)
 
-        # Fréquence IA : 20 Hz
-        await asyncio.sleep(0.05)
-
     print("[IA] Boucle IA arrêtée")
 
 
@@ -114,8 +135,16 @@ async def stop_ai():
 
     ia_running = False
 
+    # Aucun await avant l'annulation : plus de VEL IA après ce point
     if ia_task:
         ia_task.cancel()
         ia_task = None
 
+    # Tout ce qui suit est bloquant (join, fsync) : hors event loop
+
+    # join du thread d'apprentissage hors event loop (update en cours)
+    await asyncio.to_thread(stop_learner)
+    await asyncio.to_thread(close_logs)
+    await asyncio.to_thread(flush_checkpoints)
+
     print("[IA] IA arrêtée")
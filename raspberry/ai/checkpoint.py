@@ -0,0 +1,362 @@
+"""
+checkpoint.py
+-------------
+Sauvegardes TD3 asynchrones, atomiques et versionnées.
+
+- save() prend un instantané mémoire de l'agent (TD3Agent.snapshot) dans
+  le thread appelant, puis l'écriture sur carte SD (torch.save) se fait
+  dans un thread dédié : la boucle IA / l'event loop ne bloquent plus
+- Écriture atomique : fichier temporaire + fsync + os.replace ; un arrêt
+  brutal laisse toujours l'ancienne version intacte
+- Rotation : garde les `keep` checkpoints les plus récents
+  (ckpt_<total_it>.pth) + le meilleur par reward d'épisode (best.pth)
+- `export_path` (data/agent_td3_full.pth) pointe toujours sur le dernier
+  checkpoint (lien physique, copie si le système de fichiers n'en a pas)
+- Option replay : les colonnes du replay buffer sont écrites en .npy
+  (relisibles en memory-map) dans replay_<total_it>/, pour reprendre
+  l'entraînement complet après un redémarrage
+- Replay persistant (ReplayBuffer(path=...), replay_store.py) : chaque
+  checkpoint fait buffer.sync() (colonnes + pos / size), que l'option
+  replay soit active ou non, sans copie des colonnes
+
+Le manifeste checkpoints.json (écrit en dernier, atomiquement) fait foi :
+    {"latest": ..., "best": ..., "best_reward": ..., "replay": ..., "history": [...]}
+"""
+
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+
+import numpy as np
+import torch
+
+REPLAY_COLUMNS = ("states", "actions", "rewards", "next_states", "dones")
+
+_CLOSE = object()
+
+
+# ----------------------------------------------------------------------
+#  Écritures atomiques
+# ----------------------------------------------------------------------
+def _fsync_replace(tmp, path):
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_torch_save(obj, path):
+    tmp = path + ".tmp"
+    torch.save(obj, tmp)
+    _fsync_replace(tmp, path)
+
+
+def _atomic_json(obj, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+    _fsync_replace(tmp, path)
+
+
+def _atomic_link(src, dst):
+    """dst devient un alias de src (lien physique, sinon copie)."""
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+# ----------------------------------------------------------------------
+#  Gestionnaire
+# ----------------------------------------------------------------------
+class CheckpointManager:
+    """
+    API :
+        - save(agent, episode_reward=None, best=False)  : non bloquant
+        - is_best(total_reward)                          : bat le record ?
+        - load(agent, which="latest", replay=True)       : reprise
+        - read(which="latest", device="cpu")             : (état, chemin)
+        - flush() / close()
+        - stats()
+    """
+
+    def __init__(self, directory="data/checkpoints", keep=3, export_path=None,
+                 save_replay=False, replay_chunk=65536):
+        self.directory = directory
+        self.keep = max(1, int(keep))
+        self.export_path = export_path
+        self.save_replay = save_replay
+        self.replay_chunk = replay_chunk
+
+        self.manifest_path = os.path.join(directory, "checkpoints.json")
+        self.manifest = self._read_manifest()
+        self.best_reward = self.manifest.get("best_reward")
+
+        self.saved = 0
+        self.skipped = 0
+        self.last_save_s = 0.0
+
+        self._queue = queue.Queue(maxsize=2)
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pending = 0                 # sauvegardes en file ou en cours
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    #  Manifeste
+    # ------------------------------------------------------------------
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"history": []}
+
+    def path(self, which="latest"):
+        """Chemin absolu du checkpoint `latest` ou `best` (None si absent)."""
+        name = self.manifest.get(which)
+        return os.path.join(self.directory, name) if name else None
+
+    # ------------------------------------------------------------------
+    #  Sauvegarde (thread appelant : instantané uniquement)
+    # ------------------------------------------------------------------
+    def save(self, agent, episode_reward=None, best=False, replay=None):
+        """
+        Doit être appelé sans train_step concurrent (boucle IA en mode
+        synchrone, ou thread du Learner).
+        """
+        job = {
+            "state": agent.snapshot(),
+            "total_it": int(agent.total_it),
+            "episode_reward": episode_reward,
+            "best": best,
+            "t": time.time(),
+            "agent": agent if (self.save_replay if replay is None else replay) else None,
+            # Replay persistant : pos / size toujours resynchronisés (reprise
+            # après un arrêt brutal sans STOP)
+            "sync": agent if agent.buffer.persistent else None,
+        }
+        with self._pending_lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                # Écriture précédente encore en cours : on n'empile pas
+                self.skipped += 1
+                print("[CKPT] Écriture en cours, sauvegarde ignorée")
+                return False
+            self._pending += 1
+            self._idle.clear()
+        if best and episode_reward is not None:
+            # Record mémorisé seulement une fois best.pth en file d'écriture
+            self.best_reward = float(episode_reward)
+        return True
+
+    def is_best(self, total_reward):
+        """
+        True si l'épisode bat le meilleur reward : l'appelant sauvegarde
+        alors avec best=True (le record n'est retenu que si save() a pu
+        mettre l'écriture en file).
+        """
+        return self.best_reward is None or total_reward > self.best_reward
+
+    def flush(self, timeout=10.0):
+        """Attend la fin des écritures en attente."""
+        self._idle.wait(timeout)
+
+    def close(self, timeout=10.0):
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join(timeout)
+
+    def _job_done(self):
+        with self._pending_lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.set()
+
+    def stats(self):
+        return {
+            "ckpt_saved": int(self.saved),
+            "ckpt_skipped": int(self.skipped),
+            "ckpt_last_save_ms": round(self.last_save_s * 1000.0, 1),
+            "ckpt_best_reward": self.best_reward,
+        }
+
+    # ------------------------------------------------------------------
+    #  Thread d'écriture
+    # ------------------------------------------------------------------
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _CLOSE:
+                self._idle.set()
+                return
+
+            t0 = time.perf_counter()
+            try:
+                self._write(job)
+                self.saved += 1
+            except Exception as e:
+                print("[CKPT] ERREUR sauvegarde :", e)
+                if job["best"]:
+                    # best.pth non écrit : on revient au record sur disque
+                    self.best_reward = self.manifest.get("best_reward")
+            self.last_save_s = time.perf_counter() - t0
+            self._job_done()
+
+    def _write(self, job):
+        os.makedirs(self.directory, exist_ok=True)
+        total_it = job["total_it"]
+        name = f"ckpt_{total_it:09d}.pth"
+        path = os.path.join(self.directory, name)
+
+        data = dict(job["state"])
+        data["meta"] = {"t": job["t"], "episode_reward": job["episode_reward"]}
+        _atomic_torch_save(data, path)
+
+        manifest = dict(self.manifest)
+        history = [h for h in manifest.get("history", []) if h != name] + [name]
+
+        if job["best"]:
+            _atomic_link(path, os.path.join(self.directory, "best.pth"))
+            manifest["best"] = "best.pth"
+            manifest["best_reward"] = job["episode_reward"]
+            manifest["best_total_it"] = total_it
+
+        if job["sync"] is not None:
+            job["sync"].buffer.sync(job["sync"].buffer_lock)
+            old = None
+        elif job["agent"] is not None:
+            replay_dir = self._write_replay(job["agent"], total_it)
+            old = manifest.get("replay")
+            manifest["replay"] = replay_dir
+        else:
+            old = None
+
+        manifest["latest"] = name
+        manifest["history"] = history[-self.keep:]
+        _atomic_json(manifest, self.manifest_path)
+        self.manifest = manifest
+
+        if self.export_path:
+            os.makedirs(os.path.dirname(self.export_path) or ".", exist_ok=True)
+            _atomic_link(path, self.export_path)
+
+        # Nettoyage une fois le manifeste à jour
+        for stale in history[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.directory, stale))
+            except OSError:
+                pass
+        if old and old != manifest["replay"]:
+            shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+        print(f"[CKPT] Checkpoint {name} écrit" + (" (best)" if job["best"] else ""))
+
+    # ------------------------------------------------------------------
+    #  Replay buffer (colonnes .npy, memory-map)
+    # ------------------------------------------------------------------
+    def _write_replay(self, agent, total_it):
+        """
+        Copie le buffer par blocs de `replay_chunk` lignes : toutes les
+        colonnes d'un bloc sous une seule prise de agent.buffer_lock (une
+        ligne écrite n'associe jamais deux transitions, même si le buffer
+        circulaire est réécrit entre deux blocs ; la boucle IA n'est
+        bloquée que le temps d'un bloc).
+        """
+        buf = agent.buffer
+        name = f"replay_{total_it:09d}"
+        directory = os.path.join(self.directory, name)
+        os.makedirs(directory, exist_ok=True)
+
+        with agent.buffer_lock:
+            size, pos = buf.size, buf.pos
+
+        # Ordre chronologique : du plus ancien (pos si plein) au plus récent
+        start = pos if size == buf.capacity else 0
+        columns = []
+        for col in REPLAY_COLUMNS:
+            src = getattr(buf, col)
+            tmp = os.path.join(directory, col + ".npy.tmp")
+            dst = np.lib.format.open_memmap(tmp, mode="w+", dtype=src.dtype,
+                                            shape=(size,) + src.shape[1:])
+            columns.append((col, src, dst, tmp))
+
+        for i in range(0, size, self.replay_chunk):
+            j = min(size, i + self.replay_chunk)
+            idx = (start + np.arange(i, j)) % buf.capacity
+            with agent.buffer_lock:
+                for _, src, dst, _ in columns:
+                    dst[i:j] = src[idx]
+
+        for col, _, dst, tmp in columns:
+            dst.flush()
+            _fsync_replace(tmp, os.path.join(directory, col + ".npy"))
+        del columns, dst
+
+        _atomic_json({"size": int(size), "total_it": int(total_it)},
+                     os.path.join(directory, "replay.json"))
+        return name
+
+    def _load_replay(self, agent):
+        name = self.manifest.get("replay")
+        if not name or (agent.buffer.persistent and len(agent.buffer)):
+            return 0
+        directory = os.path.join(self.directory, name)
+        try:
+            cols = [np.load(os.path.join(directory, c + ".npy"), mmap_mode="r")
+                    for c in REPLAY_COLUMNS]
+        except (OSError, ValueError) as e:
+            print("[CKPT] Replay illisible :", e)
+            return 0
+
+        n = len(cols[2])
+        with agent.buffer_lock:
+            for i in range(0, n, self.replay_chunk):
+                j = min(n, i + self.replay_chunk)
+                agent.buffer.push_batch(*(c[i:j] for c in cols))
+        return n
+
+    # ------------------------------------------------------------------
+    #  Chargement
+    # ------------------------------------------------------------------
+    def read(self, which="latest", device="cpu"):
+        """
+        Lit le checkpoint sans toucher à l'agent (bloquant) : l'état est
+        appliqué ensuite par agent.load_state au moment choisi par
+        l'appelant (entre deux updates). Retourne (état, chemin) ou
+        (None, None).
+        """
+        path = self.path(which)
+        if path is None or not os.path.exists(path):
+            return None, None
+        data = torch.load(path, map_location=device)
+        data.pop("meta", None)
+        return data, path
+
+    def load(self, agent, which="latest", replay=True):
+        """
+        Recharge le checkpoint `latest` ou `best` (bloquant : à appeler
+        hors event loop via asyncio.to_thread si besoin).
+        Retourne le chemin chargé, ou None.
+        """
+        data, path = self.read(which, agent.device)
+        if data is None:
+            return None
+
+        agent.load_state(data)
+        print(f"[CKPT] Checkpoint chargé : {path} (updates={agent.total_it})")
+
+        if replay:
+            n = self._load_replay(agent)
+            if n:
+                print(f"[CKPT] Replay buffer restauré : {n} transitions")
+        return path
@@ -9,8 +9,6 @@ Version PREMIUM :
 - Architecture cockpit-driven
 """
 
-import hardware.radar_hcsr04 as radar_hcsr04
-
 # ----------------------------------------------------------------------
 #  CONFIGURATION GLOBALE (modifiable en temps réel)
 # ----------------------------------------------------------------------
@@ -28,10 +26,47 @@ CONFIG = {
     "policy_delay": 3,
     "batch_size": 256,
 
+    # ---------------- TD3 : Replay ----------------
+    # replay_prioritized est lu à la création de l'agent (init_agent)
+    "replay_prioritized": False,
+    "per_alpha": 0.6,
+    "per_beta": 0.4,
+    # Stockage np.memmap sous data/replay_buffer/ (conservé au redémarrage)
+    "replay_persistent": True,
+    # Importe au démarrage les épisodes logs/replay/*.npz absents du buffer
+    "replay_preload_episodes": True,
+
+    # ---------------- TD3 : Learner (thread) ----------------
+    # async_learner est lu au démarrage de l'IA (MODE AI)
+    "async_learner": True,
+    "learner_publish_every": 20,
+    "learner_max_updates_hz": 50,
+    # Threads torch (apprentissage) : laisse des cœurs à l'event loop
+    "torch_threads": 2,
+
+    # ---------------- TD3 : Apprentissage synchrone (sans learner) ----------------
+    # Updates maximum par pas d'environnement (update-to-data ratio)
+    "utd_ratio": 1,
+    # Temps de calcul maximum par tick pour l'apprentissage (ms)
+    "train_budget_ms": 30.0,
+    # Marge gardée avant l'échéance du tick suivant (ms)
+    "train_deadline_margin_ms": 5.0,
+
+    # ---------------- TD3 : Checkpoints (data/checkpoints/) ----------------
+    # Lus à la création du gestionnaire (premier checkpoint)
+    "checkpoint_every": 1000,
+    "checkpoint_keep": 3,
+    # Inclure le replay buffer (colonnes .npy) pour une reprise complète
+    "checkpoint_replay": False,
+
     # ---------------- Robot : Vitesse ----------------
     "max_speed_linear": 1.0,
     "max_speed_angular": 1.0,
 
+    # ---------------- Robot : Liaison série (hardware/uart_link.py) ----------------
+    # Cadence maximale des VEL vers le Mega (0 = sans limite)
+    "uart_max_vel_hz": 50.0,
+
     # ---------------- Reward shaping ----------------
     "reward_distance_weight": 1.0,
     "reward_speed_weight": 0.1,
@@ -42,10 +77,17 @@ CONFIG = {
     "radar_median_window": 5,
     "danger_threshold_cm": 20.0,
 
+    # ---------------- Simulation ----------------
+    # Faisceau HC-SR04 simulé : ouverture totale (deg) et nombre de rayons
+    "sim_radar_beam_deg": 15.0,
+    "sim_radar_rays": 5,
+
     # ---------------- Debug / Logging ----------------
     "enable_replay_logging": True,
     "enable_loss_logging": True,
     "train_frequency_hz": 20,
+    # "jsonl" (train_steps.jsonl) ou "npy" (blocs columnaires logs/steps/)
+    "step_log_format": "jsonl",
 }
 
 
@@ -92,6 +134,10 @@ def apply_to_agent(agent):
     for g in agent.critic_optimizer.param_groups:
         g["lr"] = CONFIG["lr_critic"]
 
+    # Replay priorisé (alpha modifiable à chaud, beta s'anneale seul)
+    if agent.prioritized:
+        agent.buffer.alpha = CONFIG["per_alpha"]
+
     print("[CONFIG] Paramètres TD3 appliqués à l'agent.")
 
 
@@ -100,12 +146,26 @@ def apply_to_radar():
     Applique les paramètres CONFIG au radar HC-SR04 (version PREMIUM).
     Utilise les fonctions dynamiques du module radar_hcsr04.
     """
+    # Import local : config.py reste importable hors robot (simulation)
+    import hardware.radar_hcsr04 as radar_hcsr04
+
     radar_hcsr04.set_alpha(CONFIG["radar_alpha"])
     radar_hcsr04.set_median_window_size(CONFIG["radar_median_window"])
 
     print("[CONFIG] Paramètres radar appliqués (alpha + fenêtre médiane).")
 
 
+def apply_to_uart():
+    """
+    Applique la cadence VEL maximale au transport série (uart_link).
+    """
+    from hardware import uart_link
+
+    uart_link.set_max_vel_hz(CONFIG["uart_max_vel_hz"])
+
+    print("[CONFIG] Cadence VEL appliquée au lien série.")
+
+
 def apply_to_env(env):
     """
     Applique les paramètres CONFIG à l'environnement RobotEnv.
@@ -0,0 +1,161 @@
+"""
+dataset.py
+----------
+Jeu de données hors ligne : épisodes replay_ep_*.npz écrits par
+train_rl._save_episode_replay (data/logs/replay/).
+
+- EpisodeIndex : index incrémental index.jsonl, une ligne par épisode
+  (nom, clé mtime:taille, longueur). train_rl y ajoute chaque épisode au
+  moment où il l'écrit : pas besoin de relister le répertoire. scan()
+  (reconstruction complète) ne sert qu'au premier passage ou sur demande.
+- load_episodes : décompression des NPZ dans un pool de threads (zlib
+  libère le GIL), blocs renvoyés dans l'ordre de l'index.
+- fill_buffer : charge une sélection d'épisodes dans un replay buffer.
+
+Le pré-entraînement TD3 / TD3+BC qui s'appuie dessus est dans pretrain.py.
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+INDEX_NAME = "index.jsonl"
+COLUMNS = ("states", "actions", "rewards", "next_states", "dones")
+
+
+def episode_key(path):
+    """Identifiant d'un fichier d'épisode (réécrit si le nom est réutilisé)."""
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+# ----------------------------------------------------------------------
+#  Index incrémental
+# ----------------------------------------------------------------------
+class EpisodeIndex:
+    """
+    API :
+        - add(path, length)  : ajoute / met à jour un épisode (append)
+        - scan()             : reconstruit l'index depuis le répertoire
+        - entries()          : liste de dicts {name, key, length}, triée
+        - total_transitions
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_NAME)
+        self._entries = {}
+        self._lines = 0
+        self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue        # ligne tronquée (arrêt brutal)
+                    self._entries[e["name"]] = e
+                    self._lines += 1
+        except OSError:
+            pass
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def add(self, path, length):
+        entry = {"name": os.path.basename(path), "key": episode_key(path), "length": int(length)}
+        self._entries[entry["name"]] = entry
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._lines += 1
+
+        # Compactage quand les lignes obsolètes (noms réutilisés) dominent
+        if self._lines > 2 * len(self._entries) + 100:
+            self._rewrite()
+        return entry
+
+    def scan(self):
+        """Reconstruction complète (lit la longueur de chaque NPZ)."""
+        entries = {}
+        for de in os.scandir(self.directory):
+            if not (de.name.startswith("replay_ep_") and de.name.endswith(".npz")):
+                continue
+            key = episode_key(de.path)
+            old = self._entries.get(de.name)
+            if old is not None and old["key"] == key:
+                entries[de.name] = old
+                continue
+            try:
+                with np.load(de.path) as data:
+                    length = len(data["rewards"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[DATASET] Épisode ignoré ({de.name}) :", e)
+                continue
+            entries[de.name] = {"name": de.name, "key": key, "length": int(length)}
+
+        self._entries = entries
+        self._rewrite()
+        print(f"[DATASET] Index reconstruit : {len(entries)} épisodes, "
+              f"{self.total_transitions} transitions")
+
+    def _rewrite(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in self.entries():
+                f.write(json.dumps(e) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self._entries)
+
+    def entries(self):
+        return [self._entries[k] for k in sorted(self._entries)]
+
+    @property
+    def total_transitions(self):
+        return sum(e["length"] for e in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ----------------------------------------------------------------------
+#  Chargement parallèle
+# ----------------------------------------------------------------------
+def _load_one(path):
+    try:
+        with np.load(path) as data:
+            return tuple(np.asarray(data[c], dtype=np.float32) for c in COLUMNS)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[DATASET] Épisode illisible ({os.path.basename(path)}) :", e)
+        return None
+
+
+def load_episodes(directory, entries, workers=4):
+    """
+    Générateur : (entry, (states, actions, rewards, next_states, dones))
+    dans l'ordre de `entries`, décompression dans `workers` threads.
+    """
+    paths = [os.path.join(directory, e["name"]) for e in entries]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dataset") as pool:
+        for entry, batch in zip(entries, pool.map(_load_one, paths)):
+            if batch is not None:
+                yield entry, batch
+
+
+def fill_buffer(buffer, directory, entries, workers=4, lock=None):
+    """Pousse les épisodes `entries` dans `buffer`. Retourne le nombre de transitions."""
+    total = 0
+    for _, batch in load_episodes(directory, entries, workers):
+        if lock is not None:
+            with lock:
+                buffer.push_batch(*batch)
+        else:
+            buffer.push_batch(*batch)
+        total += len(batch[2])
+    return total
@@ -0,0 +1,197 @@
+"""
+learner.py
+----------
+Apprentissage TD3 en tâche de fond (thread dédié).
+
+La boucle IA (ai_loop.py, 20 Hz) ne fait plus que l'inférence et env.step :
+le Learner tire en continu des batches du replay buffer, met à jour les
+réseaux, et publie les poids de l'actor vers la politique d'inférence de
+l'agent toutes les `learner_publish_every` mises à jour.
+
+Les checkpoints sont pris dans ce thread (entre deux updates) : tous les
+`checkpoint_every` updates, et à la demande (request_save) pour les
+sauvegardes déclenchées par la boucle IA ou le cockpit. Les chargements
+de poids passent de la même façon par request_call (jamais pendant un
+train_step).
+
+Paramètres (config.py) :
+    - learner_publish_every   : updates entre deux publications de l'actor
+    - learner_max_updates_hz  : plafond de mises à jour par seconde (0 = illimité)
+    - checkpoint_every
+    - batch_size
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from ai import config as cfg
+
+
+class Learner:
+    """
+    Thread d'apprentissage pour TD3Agent.
+
+    API :
+        - start() / stop()
+        - request_save(**kwargs) : checkpoint pris entre deux updates
+                                   (kwargs de CheckpointManager.save)
+        - request_call(fn, *args) : fn exécutée entre deux updates
+                                   (concurrent.futures.Future)
+        - stats()       : compteurs pour le cockpit (/ws-ai)
+        - last_info     : dernier retour de train_step()
+    """
+
+    def __init__(self, agent, checkpoints=None):
+        self.agent = agent
+        self.checkpoints = checkpoints
+        self._save_requests = deque()
+        self._calls = deque()
+
+        self.updates = 0
+        self.updates_per_sec = 0.0
+        self.last_info = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    #  Démarrage / arrêt
+    # ------------------------------------------------------------------
+    def start(self):
+        if self.running:
+            if self._stop.is_set():
+                print("[LEARNER] Arrêt précédent pas encore terminé, redémarrage refusé")
+            return
+
+        self.agent.auto_publish = False
+        self.agent.publish_policy()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="td3-learner", daemon=True)
+        self._thread.start()
+        print("[LEARNER] Thread d'apprentissage démarré")
+
+    def stop(self, timeout=1.0):
+        """
+        Bloquant (join) : depuis l'event loop, passer par asyncio.to_thread.
+        True si le thread est terminé. Sinon (train_step plus long que
+        timeout) il finit son update puis s'arrête seul ; la référence est
+        gardée : `running` reste vrai et start() refuse de relancer un
+        second thread sur les mêmes réseaux tant qu'il vit.
+        """
+        if not self.running:
+            return True
+
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[LEARNER] Toujours actif après {timeout:.1f} s, arrêt différé")
+            return False
+        print("[LEARNER] Thread d'apprentissage arrêté")
+        return True
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    #  Checkpoints
+    # ------------------------------------------------------------------
+    def request_save(self, **kwargs):
+        self._save_requests.append(kwargs)
+
+    def request_call(self, fn, *args):
+        future = Future()
+        self._calls.append((future, fn, args))
+        if not self.running:
+            self._process_calls()       # thread terminé entre-temps
+        return future
+
+    def _process_save_requests(self):
+        while self._save_requests:
+            kwargs = self._save_requests.popleft()
+            if self.checkpoints is not None:
+                self.checkpoints.save(self.agent, **kwargs)
+
+    def _process_calls(self):
+        while self._calls:
+            future, fn, args = self._calls.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    # ------------------------------------------------------------------
+    #  Boucle d'apprentissage
+    # ------------------------------------------------------------------
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            # Dernières demandes et publication dans ce thread : aucun
+            # update ne peut plus tourner en parallèle
+            self._process_calls()
+            self._process_save_requests()
+            self.agent.publish_policy()
+            self.agent.auto_publish = True
+
+    def _loop(self):
+        window_start = time.perf_counter()
+        window_updates = 0
+
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            self._process_calls()
+            self._process_save_requests()
+
+            try:
+                info = self.agent.train_step(batch_size=cfg.CONFIG["batch_size"])
+            except Exception as e:
+                print("[LEARNER] ERREUR train_step :", e)
+                info = None
+
+            if info is None:
+                # Pas encore assez de données dans le buffer
+                self._stop.wait(0.05)
+                continue
+
+            self.last_info = info
+            self.updates += 1
+            window_updates += 1
+
+            # Publication des poids vers la boucle d'action
+            if self.updates % max(1, int(cfg.CONFIG["learner_publish_every"])) == 0:
+                self.agent.publish_policy()
+
+            # Checkpoint périodique (dans ce thread : aucun update concurrent)
+            every = max(1, int(cfg.CONFIG["checkpoint_every"]))
+            if self.checkpoints is not None and self.agent.total_it % every == 0:
+                self.checkpoints.save(self.agent)
+
+            # Débit mesuré sur une fenêtre d'une seconde
+            now = time.perf_counter()
+            if now - window_start >= 1.0:
+                self.updates_per_sec = window_updates / (now - window_start)
+                window_start = now
+                window_updates = 0
+
+            # Plafond de débit
+            max_hz = cfg.CONFIG["learner_max_updates_hz"]
+            if max_hz > 0:
+                remaining = 1.0 / max_hz - (time.perf_counter() - t0)
+                if remaining > 0:
+                    self._stop.wait(remaining)
+
+    # ------------------------------------------------------------------
+    #  Monitoring
+    # ------------------------------------------------------------------
+    def stats(self):
+        return {
+            "learner_running": self.running,
+            "learner_updates": int(self.updates),
+            "learner_updates_per_sec": round(float(self.updates_per_sec), 1),
+        }
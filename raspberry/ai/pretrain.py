@@ -0,0 +1,120 @@
+"""
+pretrain.py
+-----------
+Pré-entraînement TD3 hors ligne sur les épisodes enregistrés par le robot
+(data/logs/replay/replay_ep_*.npz), avant de repasser en ligne.
+
+- Index incrémental des épisodes (dataset.EpisodeIndex)
+- Chargement parallèle (threads) dans un replay buffer en RAM
+- `--passes` passes de mises à jour : une passe = len(dataset) / batch_size
+  updates, sans environnement ni attente de tick (CPU à plein régime)
+- `--bc-alpha` : TD3+BC (régularisation vers les actions du jeu de
+  données, recommandé sur données figées) ; 0 = TD3 pur
+- Checkpoint via TD3Agent.save_full : reprise directe par train_rl
+
+Usage (depuis raspberry/) :
+    python3 -m ai.pretrain --passes 20
+    python3 -m ai.pretrain --bc-alpha 0 --resume --out data/agent_td3_full.pth
+    python3 -m ai.pretrain --rescan --workers 4
+"""
+
+import os
+import time
+import argparse
+
+from ai import config as cfg
+from ai.dataset import EpisodeIndex, fill_buffer
+from ai.train_rl import STATE_DIM, ACTION_DIM, AGENT_PATH, EPISODE_REPLAY_DIR
+
+
+def pretrain(args):
+    import torch
+    from ai.agent_td3 import TD3Agent
+
+    torch.set_num_threads(args.threads)
+
+    # 1. Index + chargement
+    index = EpisodeIndex(args.replay_dir)
+    if args.rescan or not index.exists:
+        index.scan()
+
+    entries = index.entries()
+    total = index.total_transitions
+    if total == 0:
+        print(f"[PRETRAIN] Aucun épisode dans {args.replay_dir}")
+        return None
+
+    agent = TD3Agent(
+        state_dim=STATE_DIM,
+        action_dim=ACTION_DIM,
+        buffer_capacity=total,
+    )
+    cfg.apply_to_agent(agent)
+
+    if args.resume and os.path.exists(args.out):
+        agent.load_full(args.out)
+        print(f"[PRETRAIN] Reprise depuis {args.out} (updates={agent.total_it})")
+
+    # Avant la boucle : save_every écrit déjà dans ce répertoire
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+
+    t0 = time.perf_counter()
+    n = fill_buffer(agent.buffer, args.replay_dir, entries, workers=args.workers)
+    print(f"[PRETRAIN] {len(entries)} épisodes, {n} transitions chargés "
+          f"en {time.perf_counter() - t0:.2f} s ({args.workers} threads)")
+
+    if n < args.batch_size:
+        print(f"[PRETRAIN] Pas assez de transitions (batch_size={args.batch_size})")
+        return None
+
+    # 2. Passes d'apprentissage
+    bc_alpha = args.bc_alpha if args.bc_alpha > 0 else None
+    updates_per_pass = max(1, n // args.batch_size)
+    t_start = time.perf_counter()
+    critic_loss = actor_loss = float("nan")
+
+    try:
+        for p in range(args.passes):
+            t_pass = time.perf_counter()
+            for _ in range(updates_per_pass):
+                info = agent.train_step(batch_size=args.batch_size, bc_alpha=bc_alpha)
+                critic_loss = info["critic_loss"]
+                if info["actor_loss"] is not None:
+                    actor_loss = info["actor_loss"]
+
+            ups = updates_per_pass / (time.perf_counter() - t_pass)
+            print(f"[PRETRAIN] passe {p + 1}/{args.passes} : {ups:.0f} updates/s, "
+                  f"critic_loss={critic_loss:.4f} actor_loss={actor_loss:.4f}")
+
+            if args.save_every and (p + 1) % args.save_every == 0:
+                agent.save_full(args.out)
+
+    except KeyboardInterrupt:
+        print("[PRETRAIN] Interrompu")
+
+    finally:
+        agent.save_full(args.out)
+        print(f"[PRETRAIN] Terminé : {agent.total_it} updates en "
+              f"{time.perf_counter() - t_start:.1f} s")
+        print(f"[PRETRAIN] Modèle sauvegardé : {args.out}")
+
+    return agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-entraînement TD3 sur les épisodes enregistrés")
+    parser.add_argument("--replay-dir", default=EPISODE_REPLAY_DIR)
+    parser.add_argument("--rescan", action="store_true", help="reconstruit l'index des épisodes")
+    parser.add_argument("--workers", type=int, default=4, help="threads de chargement")
+    parser.add_argument("--passes", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=cfg.CONFIG["batch_size"])
+    parser.add_argument("--bc-alpha", type=float, default=2.5, help="TD3+BC (0 = TD3 pur)")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="threads torch")
+    parser.add_argument("--save-every", type=int, default=5, help="passes entre sauvegardes")
+    parser.add_argument("--out", default=AGENT_PATH)
+    parser.add_argument("--resume", action="store_true")
+    pretrain(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
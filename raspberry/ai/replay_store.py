@@ -0,0 +1,148 @@
+"""
+replay_store.py
+---------------
+Stockage persistant du replay buffer (np.memmap sous data/).
+
+Un répertoire par buffer :
+    states.npy, actions.npy, rewards.npy, next_states.npy, dones.npy
+        colonnes au format .npy (np.lib.format.open_memmap), taille =
+        capacité ; rouvertes en memory-map : rien n'est relu en RAM au
+        démarrage, les pages sont chargées à la demande par sample()
+    replay.json
+        métadonnées : capacité, dimensions, tête (pos), taille, épisodes
+        NPZ déjà importés ; écrit atomiquement APRÈS le flush des colonnes
+        (sync) : après un arrêt brutal, pos / size ne désignent que des
+        lignes déjà sur disque
+
+Préchargement : preload_episodes() importe les replay_ep_*.npz écrits par
+train_rl._save_episode_replay qui ne sont pas encore dans le buffer
+(index et chargement parallèle : dataset.py).
+"""
+
+import os
+import json
+
+import numpy as np
+
+from ai.dataset import EpisodeIndex, load_episodes
+
+META_NAME = "replay.json"
+COLUMNS = ("states", "actions", "rewards", "next_states", "dones")
+
+
+# ----------------------------------------------------------------------
+#  Métadonnées
+# ----------------------------------------------------------------------
+def read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(directory, meta):
+    path = os.path.join(directory, META_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------------------------
+#  Colonnes memory-map
+# ----------------------------------------------------------------------
+def _shapes(capacity, state_dim, action_dim):
+    return {
+        "states": (capacity, state_dim),
+        "actions": (capacity, action_dim),
+        "rewards": (capacity,),
+        "next_states": (capacity, state_dim),
+        "dones": (capacity,),
+    }
+
+
+def open_columns(directory, capacity, state_dim, action_dim):
+    """
+    Ouvre (ou crée) les colonnes du buffer dans `directory`.
+
+    Retourne (colonnes, meta). Si le stockage existant ne correspond pas
+    (capacité / dimensions), il est recréé vide.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shapes = _shapes(capacity, state_dim, action_dim)
+
+    meta = read_meta(directory)
+    compatible = (
+        meta is not None
+        and meta.get("capacity") == capacity
+        and meta.get("state_dim") == state_dim
+        and meta.get("action_dim") == action_dim
+        and all(os.path.exists(os.path.join(directory, c + ".npy")) for c in COLUMNS)
+    )
+
+    if compatible:
+        try:
+            columns = {c: np.load(os.path.join(directory, c + ".npy"), mmap_mode="r+")
+                       for c in COLUMNS}
+            if all(columns[c].shape == shapes[c] for c in COLUMNS):
+                print(f"[REPLAY] Stockage rouvert : {directory} ({meta['size']} transitions)")
+                return columns, meta
+        except (OSError, ValueError) as e:
+            print("[REPLAY] Stockage illisible, recréé :", e)
+    elif meta is not None:
+        print(f"[REPLAY] Stockage incompatible (capacité / dimensions), recréé : {directory}")
+
+    # Fichiers creux : l'espace n'est réellement occupé qu'à l'écriture
+    columns = {
+        c: np.lib.format.open_memmap(os.path.join(directory, c + ".npy"), mode="w+",
+                                     dtype=np.float32, shape=shapes[c])
+        for c in COLUMNS
+    }
+    meta = {
+        "capacity": capacity,
+        "state_dim": state_dim,
+        "action_dim": action_dim,
+        "pos": 0,
+        "size": 0,
+        "episodes": {},
+    }
+    write_meta(directory, meta)
+    return columns, meta
+
+
+# ----------------------------------------------------------------------
+#  Préchargement des épisodes NPZ
+# ----------------------------------------------------------------------
+def preload_episodes(buffer, replay_dir, lock=None, index=None, workers=4):
+    """
+    Pousse dans `buffer` les épisodes de l'index (dataset.EpisodeIndex) pas
+    encore importés (suivis dans buffer.meta["episodes"]).
+    Retourne le nombre de transitions.
+    """
+    if not os.path.isdir(replay_dir):
+        return 0
+    if index is None:
+        index = EpisodeIndex(replay_dir)
+    if not index.exists:
+        index.scan()        # premier passage : index absent
+
+    imported = buffer.meta.setdefault("episodes", {})
+    todo = [e for e in index.entries() if imported.get(e["name"]) != e["key"]]
+
+    total = 0
+    for entry, batch in load_episodes(replay_dir, todo, workers):
+        if lock is not None:
+            with lock:
+                buffer.push_batch(*batch)
+                imported[entry["name"]] = entry["key"]
+        else:
+            buffer.push_batch(*batch)
+            imported[entry["name"]] = entry["key"]
+        total += len(batch[2])
+
+    if total:
+        print(f"[REPLAY] {total} transitions préchargées depuis {replay_dir}")
+    return total
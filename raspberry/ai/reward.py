@@ -0,0 +1,134 @@
+"""
+reward.py
+---------
+Reward de l'environnement de simulation, partagée par RobotEnv (scalaire,
+un robot à 20 Hz) et VectorRobotEnv (N robots en un pas NumPy).
+
+Les deux versions utilisent les mêmes constantes : toute modification
+de la reward se fait ici et vaut pour les deux chemins.
+"""
+
+import math
+import numpy as np
+
+
+# ----------------------------------------------------------------------
+#  Reward : constantes communes aux versions scalaire et vectorisée
+# ----------------------------------------------------------------------
+DANGER_PENALTY = 0.3        # zone dangereuse (d < danger_threshold_cm)
+DISTANCE_SCALE_CM = 200.0   # normalisation du terme distance
+SLOW_ZONE_CM = 50.0         # ralentissement exigé sous cette distance
+SLOW_PENALTY = 0.2
+ROTATION_PENALTY = 0.1
+REVERSE_PENALTY = 0.05
+BAD_REVERSE_PENALTY = 1.0   # marche arrière + rotation / strafe (fin d'épisode)
+CMD_DEADBAND = 0.1          # |commande| en dessous : considérée nulle
+CONFLICT_THRESHOLD = 0.3    # strafe + rotation avec vx faible
+CONFLICT_MAX_PENALTY = 0.5
+SPIN_THRESHOLD = 0.5        # rotation seule sur place
+SPIN_PENALTY = 0.5
+COLLISION_CM = 5.0
+
+
+def compute_reward(d, vx_cmd, vy_cmd, w_cmd, speed_x, speed_y,
+                   max_speed_linear, reward_distance_weight, reward_speed_weight,
+                   reward_collision_penalty, danger_threshold_cm):
+    """
+    Version scalaire de compute_rewards (RobotEnv, un robot à 20 Hz) :
+    aucune allocation de tableau NumPy par tick.
+    Retourne (reward, done).
+    """
+    reward = 0.0
+
+    # Zone dangereuse (soft penalty)
+    if d < danger_threshold_cm:
+        reward -= DANGER_PENALTY * (1.0 - d / danger_threshold_cm)
+
+    # Distance + vitesse
+    reward += reward_distance_weight * (d / DISTANCE_SCALE_CM)
+    speed_mag = math.sqrt(speed_x * speed_x + speed_y * speed_y)
+    reward += reward_speed_weight * speed_mag
+
+    # Ralentissement proche obstacle
+    speed_norm = speed_mag / max_speed_linear if max_speed_linear > 0 else 0.0
+    danger = min(max(1.0 - d / SLOW_ZONE_CM, 0.0), 1.0)
+    reward -= SLOW_PENALTY * danger * speed_norm
+
+    # Rotation + marche arrière
+    reward -= abs(w_cmd) * ROTATION_PENALTY
+    if vx_cmd < 0:
+        reward -= REVERSE_PENALTY * abs(vx_cmd)
+
+    # Marche arrière + rotation ou strafe : malus fort + fin d'épisode
+    bad_reverse = vx_cmd < 0 and (abs(w_cmd) > CMD_DEADBAND or abs(vy_cmd) > CMD_DEADBAND)
+    if bad_reverse:
+        reward -= BAD_REVERSE_PENALTY
+
+    # Commandes conflictuelles (strafe + rotation avec vx faible)
+    low_vx = abs(vx_cmd) < CMD_DEADBAND
+    lateral_rot_mag = math.sqrt(vy_cmd * vy_cmd + w_cmd * w_cmd)
+    if low_vx and lateral_rot_mag > CONFLICT_THRESHOLD:
+        reward -= min(CONFLICT_MAX_PENALTY, lateral_rot_mag * 0.5)
+
+    # Rotation seule sur place
+    if low_vx and abs(vy_cmd) < CMD_DEADBAND and abs(w_cmd) > SPIN_THRESHOLD:
+        reward -= SPIN_PENALTY
+
+    # Collision immédiate
+    collision = d < COLLISION_CM
+    if collision:
+        reward = reward_collision_penalty
+
+    return float(reward), bool(collision or bad_reverse)
+
+
+# ----------------------------------------------------------------------
+#  Reward vectorisée (même logique que compute_reward)
+# ----------------------------------------------------------------------
+def compute_rewards(d, vx_cmd, vy_cmd, w_cmd, speed_x, speed_y,
+                    max_speed_linear, reward_distance_weight, reward_speed_weight,
+                    reward_collision_penalty, danger_threshold_cm):
+    """
+    Tous les arguments tableaux ont la forme (n,).
+    Retourne (rewards, dones).
+    """
+    reward = np.zeros_like(d, dtype=np.float64)
+
+    # Zone dangereuse (soft penalty)
+    in_danger = d < danger_threshold_cm
+    reward -= np.where(in_danger, DANGER_PENALTY * (1.0 - d / danger_threshold_cm), 0.0)
+
+    # Distance + vitesse
+    reward += reward_distance_weight * (d / DISTANCE_SCALE_CM)
+    speed_mag = np.sqrt(speed_x ** 2 + speed_y ** 2)
+    reward += reward_speed_weight * speed_mag
+
+    # Ralentissement proche obstacle
+    speed_norm = speed_mag / max_speed_linear if max_speed_linear > 0 else 0.0
+    danger = np.clip(1.0 - d / SLOW_ZONE_CM, 0.0, 1.0)
+    reward -= SLOW_PENALTY * danger * speed_norm
+
+    # Rotation + marche arrière
+    reward -= np.abs(w_cmd) * ROTATION_PENALTY
+    reward -= np.where(vx_cmd < 0, REVERSE_PENALTY * np.abs(vx_cmd), 0.0)
+
+    # Marche arrière + rotation ou strafe : malus fort + fin d'épisode
+    bad_reverse = (vx_cmd < 0) & ((np.abs(w_cmd) > CMD_DEADBAND) | (np.abs(vy_cmd) > CMD_DEADBAND))
+    reward -= np.where(bad_reverse, BAD_REVERSE_PENALTY, 0.0)
+
+    # Commandes conflictuelles (strafe + rotation avec vx faible)
+    low_vx = np.abs(vx_cmd) < CMD_DEADBAND
+    lateral_rot_mag = np.sqrt(vy_cmd ** 2 + w_cmd ** 2)
+    reward -= np.where(low_vx & (lateral_rot_mag > CONFLICT_THRESHOLD),
+                       np.minimum(CONFLICT_MAX_PENALTY, lateral_rot_mag * 0.5), 0.0)
+
+    # Rotation seule sur place
+    spinning = low_vx & (np.abs(vy_cmd) < CMD_DEADBAND) & (np.abs(w_cmd) > SPIN_THRESHOLD)
+    reward -= np.where(spinning, SPIN_PENALTY, 0.0)
+
+    # Collision immédiate
+    collision = d < COLLISION_CM
+    reward = np.where(collision, reward_collision_penalty, reward)
+    dones = collision | bad_reverse
+
+    return reward, dones
@@ -1,12 +1,32 @@
 import math
 import numpy as np
 import asyncio
-import websockets
 import random
 
 from ai import config as cfg
-import hardware.radar_hcsr04 as radar
-from hardware.uart import send_to_mega
+from ai.reward import compute_reward
+from ai.sim_radar import SimRadar
+from telemetry import tracing
+
+# Obstacles simulés par défaut : (x, y, rayon) en cm
+DEFAULT_OBSTACLES = [
+    (100, 100, 40),
+    (-80, 50, 30),
+    (50, -120, 50)
+]
+
+# Échelle de la simulation : cm parcourus par seconde pour une vitesse de 1
+SIM_CM_PER_UNIT = 20
+
+
+def sim_integrate(x, y, angle, vx, vy, w, dt):
+    """
+    Cinématique simulée (partagée avec hardware/mega_emulator.py) :
+    vx, vy, w = vitesses envoyées au Mega (VEL), pose en cm / rad.
+    """
+    return (x + vx * SIM_CM_PER_UNIT * dt,
+            y + vy * SIM_CM_PER_UNIT * dt,
+            angle + w * dt)
 
 
 class RobotEnv:
@@ -20,6 +40,13 @@ class RobotEnv:
         self.dt = dt
         self.mode = mode
 
+        # Matériel importé seulement en mode réel (la simulation tourne hors robot)
+        if mode == "real":
+            import hardware.radar_hcsr04 as radar
+            from hardware import uart_link
+            self.radar = radar
+            self.uart = uart_link
+
         # Commandes actuelles (actions continues)
         self.vx_cmd = 0.0
         self.vy_cmd = 0.0
@@ -38,11 +65,8 @@ class RobotEnv:
         self.sim_x = 0.0
         self.sim_y = 0.0
         self.sim_angle = 0.0
-        self.sim_obstacles = [
-            (100, 100, 40),
-            (-80, 50, 30),
-            (50, -120, 50)
-        ]
+        self.sim_obstacles = list(DEFAULT_OBSTACLES)
+        self.sim_radar = SimRadar(self.sim_obstacles)
 
         # Paramètres cockpit-driven
         self._apply_config()
@@ -62,11 +86,20 @@ class RobotEnv:
 
         self.danger_threshold_cm = cfg.CONFIG["danger_threshold_cm"]
 
+        self.sim_radar.set_beam(cfg.CONFIG["sim_radar_beam_deg"], cfg.CONFIG["sim_radar_rays"])
+
+    # ----------------------------------------------------------------------
+    def set_obstacles(self, obstacles):
+        """Remplace les obstacles simulés : liste de (x, y, rayon) en cm."""
+        self.sim_obstacles = list(obstacles)
+        self.sim_radar.set_obstacles(self.sim_obstacles)
+
     # ----------------------------------------------------------------------
     async def connect(self):
         """Connexion WebSocket (optionnelle)."""
         if self.mode != "real":
             return
+        import websockets
         try:
             self.ws = await websockets.connect("ws://localhost:8765/ws-ctrl")
             print("[ENV] Connecté à server.py")
@@ -82,7 +115,7 @@ class RobotEnv:
 
         if self.mode == "real":
             self.angle = 0
-            self.distance = radar.distance_value
+            self.distance = self.radar.distance_value
             self.speed_x = 0
             self.speed_y = 0
         else:
@@ -94,10 +127,15 @@ class RobotEnv:
         return self._get_state()
 
     # ----------------------------------------------------------------------
-    async def step(self, action):
+    async def step(self, action, dt=None, trace=None):
         """
         Action = [vx, vy, w] (continu)
+        dt     = durée réelle du pas (s), sinon self.dt inchangé
+        trace  = trace de latence (telemetry/tracing.py) de la commande VEL
         """
+        if dt is not None:
+            self.dt = dt
+
         # Clamp action
         self.vx_cmd = float(np.clip(action[0], -1, 1))
         self.vy_cmd = float(np.clip(action[1], -1, 1))
@@ -110,9 +148,10 @@ class RobotEnv:
 
         # Mode réel
         if self.mode == "real":
-            send_to_mega(f"VEL {vx} {vy} {w}")
+            self.uart.send_vel(vx, vy, w, trace=trace)   # non bloquant (thread UART)
 
-            self.distance = radar.distance_value
+            with tracing.span("ai.radar"):
+                self.distance = self.radar.distance_value
             if self.distance < 0:
                 self.distance = 200.0
 
@@ -158,103 +197,36 @@ class RobotEnv:
             - pénalités marche arrière
             - pénalités commandes conflictuelles (strafe + rotation)
             - pénalités collision
-        """
 
-        reward = 0.0
-        done = False
-        d = self.distance
-
-        # -----------------------------
-        # Collision immédiate
-        # -----------------------------
-        if d < 5:
-            return self.reward_collision_penalty, True
-
-        # -----------------------------
-        # Zone dangereuse (soft penalty)
-        # -----------------------------
-        if d < self.danger_threshold_cm:
-            danger_ratio = 1.0 - (d / self.danger_threshold_cm)
-            reward -= 0.3 * danger_ratio
-
-        # -----------------------------
-        # Distance reward
-        # -----------------------------
-        reward += self.reward_distance_weight * (d / 200.0)
-
-        # -----------------------------
-        # Vitesse reward
-        # -----------------------------
-        speed_mag = math.sqrt(self.speed_x**2 + self.speed_y**2)
-        reward += self.reward_speed_weight * speed_mag
-
-        # -----------------------------
-        # Ralentissement proche obstacle
-        # -----------------------------
-        speed_norm = speed_mag / self.max_speed_linear if self.max_speed_linear > 0 else 0.0
-        danger = max(0.0, min(1.0, 1.0 - d / 50.0))
-        reward -= 0.2 * danger * speed_norm
-
-        # -----------------------------
-        # Rotation penalty
-        # -----------------------------
-        reward -= abs(self.w_cmd) * 0.1
-
-        # -----------------------------
-        # Légère pénalité marche arrière
-        # -----------------------------
-        if self.vx_cmd < 0:
-            reward -= 0.05 * abs(self.vx_cmd)
-
-        # -----------------------------
-        # Interdire marche arrière + rotation ou strafe
-        # -----------------------------
-        if self.vx_cmd < 0 and (abs(self.w_cmd) > 0.1 or abs(self.vy_cmd) > 0.1):
-            reward -= 1.0   # malus fort
-            done = True     # fin d'épisode pour RL
-
-        # -----------------------------
-        # Pénalité commandes conflictuelles (strafe + rotation avec vx faible)
-        # -----------------------------
-        if abs(self.vx_cmd) < 0.1:
-            lateral_rot_mag = math.sqrt(self.vy_cmd**2 + self.w_cmd**2)
-            if lateral_rot_mag > 0.3:
-                reward -= min(0.5, lateral_rot_mag * 0.5)
-
-        # -----------------------------
-        # Optionnel : rotation seule sur place (pour éviter spinning inutile)
-        # -----------------------------
-        if abs(self.vx_cmd) < 0.1 and abs(self.vy_cmd) < 0.1 and abs(self.w_cmd) > 0.5:
-            reward -= 0.5
-
-        return reward, done
+        Version scalaire (vector_env.compute_reward) : mêmes constantes que
+        la version vectorisée de VectorRobotEnv, sans tableau par tick.
+        """
+        return compute_reward(
+            float(self.distance), self.vx_cmd, self.vy_cmd, self.w_cmd,
+            self.speed_x, self.speed_y,
+            self.max_speed_linear, self.reward_distance_weight, self.reward_speed_weight,
+            self.reward_collision_penalty, self.danger_threshold_cm,
+        )
 
 
     # ----------------------------------------------------------------------
     def _sim_step(self):
         """Simulation simple omniwheel + obstacles."""
-        self.sim_angle += self.w_cmd * self.max_speed_angular * self.dt
-
-        self.sim_x += self.vx_cmd * self.max_speed_linear * 20 * self.dt
-        self.sim_y += self.vy_cmd * self.max_speed_linear * 20 * self.dt
-
-        self.distance = self._sim_radar()
+        self.sim_x, self.sim_y, self.sim_angle = sim_integrate(
+            self.sim_x, self.sim_y, self.sim_angle,
+            self.vx_cmd * self.max_speed_linear,
+            self.vy_cmd * self.max_speed_linear,
+            self.w_cmd * self.max_speed_angular,
+            self.dt,
+        )
+
+        with tracing.span("ai.radar"):
+            self.distance = self._sim_radar()
         self.speed_x = self.vx_cmd * self.max_speed_linear
         self.speed_y = self.vy_cmd * self.max_speed_linear
         self.angle = self.sim_angle
 
     # ----------------------------------------------------------------------
     def _sim_radar(self):
-        """Raycast simple pour obstacles."""
-        max_dist = 200
-        step = 2
-
-        for d in range(0, max_dist, step):
-            x = self.sim_x + d * math.cos(self.sim_angle)
-            y = self.sim_y + d * math.sin(self.sim_angle)
-
-            for (ox, oy, r) in self.sim_obstacles:
-                if (x - ox)**2 + (y - oy)**2 < r*r:
-                    return d
-
-        return max_dist
+        """Distance du premier écho (faisceau conique, intersection exacte)."""
+        return self.sim_radar.measure(self.sim_x, self.sim_y, self.sim_angle)
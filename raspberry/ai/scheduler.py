@@ -0,0 +1,112 @@
+"""
+scheduler.py
+------------
+Cadenceur à échéances fixes pour la boucle IA (ai_loop.py).
+
+Au lieu d'attendre une durée fixe après chaque pas (la période réelle
+devenant 50 ms + temps de calcul), on vise des échéances absolues
+t0, t0 + T, t0 + 2T, ... avec T = 1 / train_frequency_hz.
+
+- Un tick qui démarre après son échéance est compté comme dépassement
+  (overrun) et marqué `late` : la boucle peut alors alléger le pas suivant.
+- Après un dépassement, l'échéance est réalignée sur l'instant courant
+  (pas de rafale pour rattraper les ticks perdus).
+- dt mesuré entre deux ticks : transmis à RobotEnv.
+- Gigue (retard réel vs échéance) : percentiles p50 / p95 / p99.
+- next_deadline() : échéance du tick suivant, pour borner le travail
+  facultatif (apprentissage) fait pendant le tick courant.
+"""
+
+import time
+import asyncio
+from collections import deque
+
+import numpy as np
+
+
+class LoopScheduler:
+    """
+    Usage :
+        sched = LoopScheduler(lambda: cfg.CONFIG["train_frequency_hz"])
+        while running:
+            dt = await sched.tick()
+            ... (sched.late -> tick en retard)
+    """
+
+    def __init__(self, hz_source, window=200):
+        self.hz_source = hz_source
+
+        self.ticks = 0
+        self.overruns = 0
+        self.late = False
+        self.dt = self._period()
+
+        self._deadline = None
+        self._last_start = None
+        self._jitter = deque(maxlen=window)
+
+    # ------------------------------------------------------------------
+    def _period(self):
+        hz = float(self.hz_source())
+        return 1.0 / hz if hz > 0 else 0.05
+
+    # ------------------------------------------------------------------
+    async def tick(self):
+        """
+        Attend l'échéance suivante et retourne le dt mesuré (s)
+        depuis le début du tick précédent.
+        """
+        period = self._period()
+        now = time.perf_counter()
+
+        if self._deadline is None:
+            self._deadline = now
+            self.late = False
+            target = now
+        else:
+            self._deadline += period
+            target = self._deadline
+            if now > self._deadline:
+                # Le pas précédent a dépassé la période : on réaligne
+                self.overruns += 1
+                self.late = True
+                self._deadline = now
+            else:
+                self.late = False
+                await asyncio.sleep(self._deadline - now)
+
+        start = time.perf_counter()
+        # Retard mesuré sur l'échéance visée (manquée ou non), avant réalignement
+        self._jitter.append(start - target)
+
+        if self._last_start is not None:
+            self.dt = start - self._last_start
+        else:
+            self.dt = period
+        self._last_start = start
+        self.ticks += 1
+
+        return self.dt
+
+    # ------------------------------------------------------------------
+    def next_deadline(self):
+        """Échéance (time.perf_counter) du prochain tick."""
+        if self._deadline is None:
+            return time.perf_counter() + self._period()
+        return self._deadline + self._period()
+
+    # ------------------------------------------------------------------
+    def stats(self):
+        """Compteurs pour le cockpit (/ws-ai)."""
+        if self._jitter:
+            p50, p95, p99 = np.percentile(np.fromiter(self._jitter, dtype=np.float64), (50, 95, 99))
+        else:
+            p50 = p95 = p99 = 0.0
+
+        return {
+            "loop_dt_ms": round(self.dt * 1000.0, 2),
+            "loop_overruns": int(self.overruns),
+            "jitter_p50_ms": round(float(p50) * 1000.0, 2),
+            "jitter_p95_ms": round(float(p95) * 1000.0, 2),
+            "jitter_p99_ms": round(float(p99) * 1000.0, 2),
+        }
@@ -0,0 +1,149 @@
+"""
+sim_radar.py
+------------
+Radar HC-SR04 simulé pour RobotEnv(mode="sim").
+
+- Intersection rayon–cercle en forme close (distance exacte, pas de ray-march)
+- Faisceau conique : `rays` rayons répartis sur `beam_deg` degrés ;
+  la mesure est le premier écho (distance minimale)
+- Index spatial (grille uniforme) au-delà de `grid_min_obstacles` obstacles :
+  chaque rayon parcourt les cellules traversées (DDA) et s'arrête dès
+  qu'un impact est plus proche que la sortie de la cellule courante
+
+Calcul scalaire en Python pur : quelques µs par mesure pour les petites
+scènes, sans surcoût NumPy. La version vectorisée (N robots) est
+vector_env.ray_circle_distances.
+"""
+
+import math
+
+RADAR_MAX_DIST = 200.0
+
+
+def beam_offsets(beam_deg, rays):
+    """
+    Décalages angulaires (rad) des `rays` rayons du faisceau, répartis
+    uniformément sur `beam_deg` degrés autour de l'axe du radar.
+    Partagé avec vector_env.VectorRobotEnv.
+    """
+    rays = max(1, int(rays))
+    half = math.radians(beam_deg) / 2.0
+    if rays == 1 or half == 0.0:
+        return (0.0,)
+    return tuple(-half + 2.0 * half * k / (rays - 1) for k in range(rays))
+
+
+def _nearest_hit(x, y, ux, uy, obstacles, best):
+    """
+    Plus petite distance d'impact < best parmi `obstacles`
+    (liste de (cx, cy, r²)). 0 si l'origine est dans un obstacle.
+    """
+    for cx, cy, r2 in obstacles:
+        mx = x - cx
+        my = y - cy
+        c = mx * mx + my * my - r2
+        if c <= 0.0:
+            return 0.0
+        b = mx * ux + my * uy
+        if b >= 0.0:
+            continue            # obstacle derrière l'origine
+        disc = b * b - c
+        if disc < 0.0:
+            continue
+        t = -b - math.sqrt(disc)
+        if t < best:
+            best = t
+    return best
+
+
+class ObstacleGrid:
+    """
+    Grille uniforme : chaque obstacle est référencé dans toutes les
+    cellules que couvre sa boîte englobante.
+    """
+
+    def __init__(self, obstacles, cell_size=50.0):
+        self.cell_size = float(cell_size)
+        self.cells = {}
+
+        cs = self.cell_size
+        for cx, cy, r2 in obstacles:
+            r = math.sqrt(r2)
+            for i in range(math.floor((cx - r) / cs), math.floor((cx + r) / cs) + 1):
+                for j in range(math.floor((cy - r) / cs), math.floor((cy + r) / cs) + 1):
+                    self.cells.setdefault((i, j), []).append((cx, cy, r2))
+
+    def cast(self, x, y, ux, uy, max_dist):
+        """Distance du premier impact le long du rayon (max_dist si aucun)."""
+        cs = self.cell_size
+        i = math.floor(x / cs)
+        j = math.floor(y / cs)
+
+        step_i = 1 if ux > 0 else -1
+        step_j = 1 if uy > 0 else -1
+        t_max_i = ((i + (ux > 0)) * cs - x) / ux if ux != 0.0 else math.inf
+        t_max_j = ((j + (uy > 0)) * cs - y) / uy if uy != 0.0 else math.inf
+        t_delta_i = cs / abs(ux) if ux != 0.0 else math.inf
+        t_delta_j = cs / abs(uy) if uy != 0.0 else math.inf
+
+        best = max_dist
+        while True:
+            items = self.cells.get((i, j))
+            if items:
+                best = _nearest_hit(x, y, ux, uy, items, best)
+
+            t_exit = min(t_max_i, t_max_j)
+            if best <= t_exit or t_exit >= max_dist:
+                return best
+
+            if t_max_i < t_max_j:
+                i += step_i
+                t_max_i += t_delta_i
+            else:
+                j += step_j
+                t_max_j += t_delta_j
+
+
+class SimRadar:
+    """
+    API :
+        - measure(x, y, angle) -> distance (cm)
+        - set_obstacles(obstacles) : liste de (x, y, rayon)
+        - set_beam(beam_deg, rays)
+    """
+
+    def __init__(self, obstacles, max_dist=RADAR_MAX_DIST, beam_deg=15.0, rays=5,
+                 cell_size=50.0, grid_min_obstacles=16):
+        self.max_dist = max_dist
+        self.cell_size = cell_size
+        self.grid_min_obstacles = grid_min_obstacles
+
+        self.offsets = (0.0,)
+        self.set_beam(beam_deg, rays)
+        self.set_obstacles(obstacles)
+
+    def set_beam(self, beam_deg, rays):
+        self.offsets = beam_offsets(beam_deg, rays)
+
+    def set_obstacles(self, obstacles):
+        self.obstacles = [(float(x), float(y), float(r) * float(r)) for x, y, r in obstacles]
+        if len(self.obstacles) >= self.grid_min_obstacles:
+            self.grid = ObstacleGrid(self.obstacles, self.cell_size)
+        else:
+            self.grid = None
+
+    def measure(self, x, y, angle):
+        best = self.max_dist
+        for offset in self.offsets:
+            a = angle + offset
+            ux = math.cos(a)
+            uy = math.sin(a)
+            if self.grid is not None:
+                d = self.grid.cast(x, y, ux, uy, best)
+            else:
+                d = _nearest_hit(x, y, ux, uy, self.obstacles, best)
+            if d < best:
+                best = d
+                if best == 0.0:
+                    break
+        return best
@@ -0,0 +1,317 @@
+"""
+step_logger.py
+--------------
+Loggers asynchrones pour les logs d'entraînement (train_rl.py).
+
+La boucle IA ne fait plus d'open/write/close à chaque pas : les records
+sont déposés dans une file mémoire bornée, vidée par un thread d'écriture
+qui regroupe les records et écrit :
+    - dès que `flush_records` records sont en attente
+    - ou au plus tard toutes les `flush_interval` secondes
+
+Deux formats :
+    - JsonlLogger     : une ligne JSON par record, rotation par taille
+                        (train_steps.jsonl -> .1 -> ... -> .<backup_count>)
+    - NpyChunkLogger  : tableaux structurés NumPy à schéma fixe (STEP_DTYPE),
+                        un fichier .npy par bloc de `chunk_size` lignes,
+                        relisibles en memory-map (np.load(mmap_mode="r"))
+
+Si la file est pleine, le record est abandonné et compté (`dropped`).
+Une écriture en erreur (disque, record hors schéma) est journalisée et
+comptée (`errors`) ; le thread continue.
+
+flush() et close() attendent le thread d'écriture : depuis l'event loop,
+les appeler via asyncio.to_thread.
+"""
+
+import os
+import glob
+import json
+import time
+import queue
+import struct
+import threading
+
+import numpy as np
+
+_FLUSH = object()
+_CLOSE = object()
+
+# Schéma fixe d'un record de step (voir train_rl._log_step)
+# Les champs absents / None valent NaN (float) ou 0 (entiers).
+STEP_DTYPE = np.dtype([
+    ("t", np.float64),
+    ("episode", np.int32),
+    ("episode_step", np.int32),
+    ("global_step", np.int64),
+    ("reward", np.float32),
+    ("done", np.bool_),
+    ("action_vx", np.float32),
+    ("action_vy", np.float32),
+    ("action_w", np.float32),
+    ("speed_x", np.float32),
+    ("speed_y", np.float32),
+    ("distance", np.float32),
+    ("steps_updates", np.int64),
+    ("critic_loss", np.float32),
+    ("actor_loss", np.float32),
+])
+
+
+class _QueuedWriter:
+    """
+    Base commune : file bornée + thread d'écriture.
+    Les sous-classes implémentent _open(), _write(records) et _close().
+
+    API :
+        - log(record)   : non bloquant
+        - flush()       : force l'écriture de la file (attend le thread)
+        - close()       : vide la file et arrête le thread
+        - stats()
+    """
+
+    def __init__(self, name, queue_size=10000, flush_records=200, flush_interval=1.0):
+        self.name = name
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._flushed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"logger-{name}", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    #  API (appelée depuis la boucle IA)
+    # ------------------------------------------------------------------
+    def log(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                print(f"[LOG] File pleine, {self.dropped} records abandonnés ({self.name})")
+
+    def flush(self, timeout=2.0):
+        if not self._thread.is_alive():
+            return
+        self._flushed.clear()
+        self._queue.put(_FLUSH)
+        self._flushed.wait(timeout)
+
+    def close(self, timeout=2.0):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "log_queued": self._queue.qsize(),
+            "log_written": int(self.written),
+            "log_dropped": int(self.dropped),
+            "log_errors": int(self.errors),
+        }
+
+    # ------------------------------------------------------------------
+    #  Thread d'écriture
+    # ------------------------------------------------------------------
+    def _run(self):
+        self._open()
+
+        pending = []
+        last_flush = time.monotonic()
+        running = True
+
+        while running:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            force = False
+            if item is _CLOSE:
+                running = False
+                force = True
+            elif item is _FLUSH:
+                force = True
+            elif item is not None:
+                pending.append(item)
+
+            due = time.monotonic() - last_flush >= self.flush_interval
+            if pending and (force or due or len(pending) >= self.flush_records):
+                try:
+                    self._write(pending)
+                    self.written += len(pending)
+                except Exception as e:
+                    # Bloc perdu, mais le thread survit (sinon la file se
+                    # remplit et tous les records suivants sont abandonnés)
+                    self.errors += 1
+                    print(f"[LOG] ERREUR écriture ({self.name}, {len(pending)} records) :",
+                          repr(e))
+                pending = []
+
+            if force or due:
+                last_flush = time.monotonic()
+            if item is _FLUSH:
+                self._flushed.set()
+
+        self._close()
+        self._flushed.set()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+# ----------------------------------------------------------------------
+#  JSONL (rotation par taille)
+# ----------------------------------------------------------------------
+class JsonlLogger(_QueuedWriter):
+
+    def __init__(self, path, queue_size=10000, flush_records=200, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, backup_count=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotations = 0
+        self._f = None
+        super().__init__(path, queue_size, flush_records, flush_interval)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, records):
+        self._f.write("\n".join(json.dumps(r) for r in records) + "\n")
+        self._f.flush()
+
+        if self._f.tell() >= self.max_bytes:
+            self._f.close()
+            self._rotate()
+            self._open()
+
+    def _close(self):
+        self._f.close()
+
+    def _rotate(self):
+        """Décale path.N-1 -> path.N, ..., path -> path.1"""
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        print(f"[LOG] Rotation : {self.path}")
+
+
+# ----------------------------------------------------------------------
+#  Blocs NumPy (.npy, schéma fixe)
+# ----------------------------------------------------------------------
+class NpyChunkLogger(_QueuedWriter):
+    """
+    Écrit <directory>/<prefix>_<NNNNNN>.npy, `chunk_size` lignes par fichier.
+
+    Le bloc courant reste ouvert : chaque flush ajoute seulement les
+    nouvelles lignes en fin de fichier, puis réécrit l'en-tête .npy (taille
+    fixe, seul `shape` change). Les lignes sont écrites avant l'en-tête :
+    un arrêt brutal laisse un fichier valide et ne perd que le dernier
+    intervalle. Un nouveau lancement ne réécrit jamais les blocs existants.
+    """
+
+    def __init__(self, directory, prefix="steps", dtype=STEP_DTYPE, chunk_size=4096,
+                 queue_size=10000, flush_records=200, flush_interval=10.0):
+        self.directory = directory
+        self.prefix = prefix
+        self.dtype = dtype
+        self.chunk_size = chunk_size
+        self.chunks = 0
+
+        self._chunk = None
+        self._fill = 0
+        self._index = 0
+        self._f = None
+        self._on_disk = 0
+        self._header_len = self._header_size()
+        super().__init__(directory, queue_size, flush_records, flush_interval)
+
+    def _chunk_path(self, index):
+        return os.path.join(self.directory, f"{self.prefix}_{index:06d}.npy")
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        existing = glob.glob(os.path.join(self.directory, f"{self.prefix}_*.npy"))
+        indices = [int(os.path.basename(p)[len(self.prefix) + 1:-4]) for p in existing]
+        self._index = max(indices) + 1 if indices else 0
+
+        self._chunk = np.zeros(self.chunk_size, dtype=self.dtype)
+        self._fill = 0
+
+    def _write(self, records):
+        names = self.dtype.names
+        for record in records:
+            row = self._chunk[self._fill]
+            for name in names:
+                value = record.get(name)
+                if value is None:
+                    value = np.nan if self.dtype[name].kind == "f" else 0
+                row[name] = value
+            self._fill += 1
+
+            if self._fill == self.chunk_size:
+                self._append()
+                self._f.close()
+                self._f = None
+                self._index += 1
+                self._fill = 0
+                self._on_disk = 0
+                self.chunks += 1
+
+        if self._fill > self._on_disk:
+            self._append()
+
+    def _close(self):
+        if self._f is not None:
+            self._append()
+            self._f.close()
+            self._f = None
+
+    # ------------------------------------------------------------------
+    #  Fichier .npy complété sur place
+    # ------------------------------------------------------------------
+    def _header(self, rows):
+        """En-tête .npy v1.0 de `rows` lignes, toujours self._header_len octets."""
+        text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype), rows)
+        body = self._header_len - 10
+        return (np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack("<H", body)
+                + text.ljust(body - 1).encode("latin1") + b"\n")
+
+    def _header_size(self):
+        text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype), self.chunk_size)
+        return -(-(10 + len(text) + 1) // 64) * 64      # aligné sur 64 octets
+
+    def _append(self):
+        if self._f is None:
+            self._f = open(self._chunk_path(self._index), "wb")
+            self._f.write(self._header(0))
+        if self._fill > self._on_disk:
+            self._f.seek(0, os.SEEK_END)
+            self._f.write(self._chunk[self._on_disk:self._fill].tobytes())
+            self._on_disk = self._fill
+        self._f.seek(0)
+        self._f.write(self._header(self._on_disk))
+        self._f.flush()
@@ -0,0 +1,271 @@
+"""
+train_offline.py
+----------------
+Entraînement TD3 hors ligne (sans cockpit, websockets, UART ni radar).
+
+- N processus de rollout, chacun avec un VectorRobotEnv (simulation)
+  et une copie CPU de l'actor
+- Les transitions sont envoyées par blocs au processus principal, qui
+  les ajoute au replay buffer de TD3Agent et entraîne en continu
+- Les poids de l'actor sont republiés vers les workers toutes les
+  `--sync-every` mises à jour
+- Checkpoint via TD3Agent.save_full : le fichier produit se copie tel quel
+  dans data/agent_td3_full.pth sur le robot
+
+Usage (depuis raspberry/) :
+    python3 -m ai.train_offline --workers 3 --envs 32 --steps 500000
+    python3 -m ai.train_offline --resume --out data/agent_td3_full.pth
+"""
+
+import os
+import time
+import queue
+import argparse
+import multiprocessing as mp
+from collections import deque
+
+import numpy as np
+
+from ai import config as cfg
+from ai.train_rl import STATE_DIM, ACTION_DIM, AGENT_PATH
+
+
+# ---------------------------------------------------------------------------
+#  WORKER DE ROLLOUT (processus séparé)
+# ---------------------------------------------------------------------------
+def _rollout_worker(worker_id, num_envs, rollout_len, start_steps, noise_scale, dt, seed,
+                    transition_q, weights_q, stop_event):
+    import torch
+    from ai.agent_td3 import Actor
+    from ai.vector_env import VectorRobotEnv
+
+    torch.set_num_threads(1)
+
+    rng = np.random.default_rng(seed)
+    env = VectorRobotEnv(num_envs, dt=dt, seed=seed)
+    actor = Actor(STATE_DIM, ACTION_DIM)
+    actor.eval()
+
+    states = env.reset()
+    ep_returns = np.zeros(num_envs)
+    steps = 0
+
+    while not stop_event.is_set():
+        # Derniers poids publiés (non bloquant)
+        try:
+            weights = weights_q.get_nowait()
+            actor.load_state_dict({k: torch.from_numpy(v) for k, v in weights.items()})
+        except queue.Empty:
+            pass
+
+        s_buf, a_buf, r_buf, ns_buf, d_buf = [], [], [], [], []
+        finished_returns = []
+
+        for _ in range(rollout_len):
+            if steps < start_steps:
+                actions = rng.uniform(-1.0, 1.0, (num_envs, ACTION_DIM)).astype(np.float32)
+            else:
+                with torch.no_grad():
+                    actions = actor(torch.from_numpy(states)).numpy()
+                actions = np.clip(actions + rng.normal(0.0, noise_scale, actions.shape), -1.0, 1.0)
+                actions = actions.astype(np.float32)
+
+            next_states, rewards, dones, truncated = env.step(actions)
+
+            s_buf.append(states)
+            a_buf.append(actions)
+            r_buf.append(rewards)
+            ns_buf.append(next_states)
+            d_buf.append(dones.astype(np.float32))
+
+            ep_returns += rewards
+            finished = dones | truncated
+            if finished.any():
+                finished_returns.extend(ep_returns[finished].tolist())
+                ep_returns[finished] = 0.0
+                states = env.reset(mask=finished)
+            else:
+                states = next_states
+            steps += num_envs
+
+        block = (
+            np.concatenate(s_buf), np.concatenate(a_buf), np.concatenate(r_buf),
+            np.concatenate(ns_buf), np.concatenate(d_buf), finished_returns,
+        )
+
+        # Envoi avec contre-pression (le learner fixe le rythme)
+        while not stop_event.is_set():
+            try:
+                transition_q.put(block, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+
+
+# ---------------------------------------------------------------------------
+#  PROCESSUS PRINCIPAL
+# ---------------------------------------------------------------------------
+def _actor_weights(agent):
+    return {k: v.detach().cpu().numpy().copy() for k, v in agent.actor.state_dict().items()}
+
+
+def _check_workers(workers):
+    """
+    Un worker ne s'arrête qu'avec stop_event : s'il est terminé avant, la
+    collecte est incomplète (et sans aucun worker, la boucle attendrait
+    indéfiniment des transitions).
+    """
+    dead = [(i, p.exitcode) for i, p in enumerate(workers) if not p.is_alive()]
+    if dead:
+        codes = ", ".join(f"worker {i} : code {code}" for i, code in dead)
+        raise RuntimeError(f"Worker(s) de rollout arrêté(s) ({codes})")
+
+
+def _publish(agent, weights_queues):
+    weights = _actor_weights(agent)
+    for q in weights_queues:
+        # Remplace les poids pas encore lus par le worker
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(weights)
+        except queue.Full:
+            pass
+
+
+def train(args):
+    import torch
+    from ai.agent_td3 import TD3Agent
+
+    torch.set_num_threads(args.threads)
+
+    agent = TD3Agent(
+        state_dim=STATE_DIM,
+        action_dim=ACTION_DIM,
+        buffer_capacity=args.buffer,
+        prioritized=cfg.CONFIG["replay_prioritized"],
+        per_alpha=cfg.CONFIG["per_alpha"],
+        per_beta=cfg.CONFIG["per_beta"],
+    )
+    cfg.apply_to_agent(agent)
+
+    if args.resume and os.path.exists(args.out):
+        agent.load_full(args.out)
+        print(f"[OFFLINE] Reprise depuis {args.out} (updates={agent.total_it})")
+
+    # Avant la boucle : save_every écrit déjà dans ce répertoire
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    transition_q = ctx.Queue(maxsize=4 * args.workers)
+    weights_queues = [ctx.Queue(maxsize=1) for _ in range(args.workers)]
+
+    dt = 1.0 / cfg.CONFIG["train_frequency_hz"]
+    workers = []
+    for i in range(args.workers):
+        p = ctx.Process(
+            target=_rollout_worker,
+            args=(i, args.envs, args.rollout_len, args.start_steps // args.workers,
+                  cfg.CONFIG["noise_scale"], dt, args.seed + i,
+                  transition_q, weights_queues[i], stop_event),
+            daemon=True,
+        )
+        p.start()
+        workers.append(p)
+
+    _publish(agent, weights_queues)
+    print(f"[OFFLINE] {args.workers} workers x {args.envs} envs, objectif {args.steps} steps")
+
+    env_steps = 0
+    updates = 0
+    returns = deque(maxlen=100)     # retours des 100 derniers épisodes
+    episodes = 0
+    t_start = time.perf_counter()
+    t_report = t_start
+    steps_report = 0
+    updates_report = 0
+
+    try:
+        while env_steps < args.steps:
+            # 1. Récupération des transitions disponibles
+            blocking = len(agent.buffer) < args.batch_size
+            while True:
+                try:
+                    s, a, r, ns, d, ep_returns = transition_q.get(timeout=1.0 if blocking else 0.0)
+                except queue.Empty:
+                    _check_workers(workers)
+                    break
+                with agent.buffer_lock:
+                    agent.buffer.push_batch(s, a, r, ns, d)
+                env_steps += len(r)
+                returns.extend(ep_returns)
+                episodes += len(ep_returns)
+                blocking = False
+
+            # 2. Apprentissage
+            for _ in range(args.updates_per_block):
+                if agent.train_step(batch_size=args.batch_size) is None:
+                    break
+                updates += 1
+
+                if updates % args.sync_every == 0:
+                    _publish(agent, weights_queues)
+
+                if updates % args.save_every == 0:
+                    agent.save_full(args.out)
+
+            # 3. Rapport
+            now = time.perf_counter()
+            if now - t_report >= args.report_every:
+                sps = (env_steps - steps_report) / (now - t_report)
+                ups = (updates - updates_report) / (now - t_report)
+                mean_ret = float(np.mean(returns)) if returns else 0.0
+                print(f"[OFFLINE] steps={env_steps} ({sps:.0f}/s) updates={updates} ({ups:.0f}/s) "
+                      f"episodes={episodes} R_moy100={mean_ret:.3f}")
+                t_report, steps_report, updates_report = now, env_steps, updates
+
+    except KeyboardInterrupt:
+        print("[OFFLINE] Interrompu")
+
+    finally:
+        stop_event.set()
+        for p in workers:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+
+        agent.save_full(args.out)
+
+        elapsed = time.perf_counter() - t_start
+        print(f"[OFFLINE] Terminé : {env_steps} steps, {updates} updates en {elapsed:.1f} s "
+              f"({env_steps / max(elapsed, 1e-9):.0f} steps/s)")
+        print(f"[OFFLINE] Modèle sauvegardé : {args.out}")
+
+    return agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement TD3 hors ligne (simulation)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--envs", type=int, default=32, help="environnements par worker")
+    parser.add_argument("--steps", type=int, default=500000, help="steps d'environnement au total")
+    parser.add_argument("--rollout-len", type=int, default=16, help="pas par bloc envoyé")
+    parser.add_argument("--start-steps", type=int, default=10000, help="steps à actions aléatoires")
+    parser.add_argument("--batch-size", type=int, default=cfg.CONFIG["batch_size"])
+    parser.add_argument("--buffer", type=int, default=1000000, help="capacité du replay buffer")
+    parser.add_argument("--updates-per-block", type=int, default=8)
+    parser.add_argument("--sync-every", type=int, default=100, help="updates entre publications")
+    parser.add_argument("--save-every", type=int, default=5000)
+    parser.add_argument("--report-every", type=float, default=5.0, help="secondes")
+    parser.add_argument("--threads", type=int, default=1, help="threads torch du learner")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=AGENT_PATH)
+    parser.add_argument("--resume", action="store_true")
+    train(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
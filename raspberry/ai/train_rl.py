@@ -14,11 +14,19 @@ Améliorations :
 import os
 import json
 import time
+import asyncio
 import numpy as np
+import torch
 
 from ai.robot_env import RobotEnv
 from ai.agent_td3 import TD3Agent
+from ai.learner import Learner
+from ai.checkpoint import CheckpointManager
+from ai.replay_store import preload_episodes
+from ai.dataset import EpisodeIndex
+from ai.step_logger import JsonlLogger, NpyChunkLogger
 from ai import config as cfg
+from telemetry import tracing, metrics
 
 # Dimensions
 STATE_DIM = 7
@@ -27,17 +35,35 @@ ACTION_DIM = 3
 # Logging
 LOG_DIR = "data/logs"
 STEP_LOG_PATH = os.path.join(LOG_DIR, "train_steps.jsonl")
+STEP_CHUNK_DIR = os.path.join(LOG_DIR, "steps")
 EPISODE_LOG_PATH = os.path.join(LOG_DIR, "episodes.jsonl")
+EPISODE_REPLAY_DIR = os.path.join(LOG_DIR, "replay")
+
+# Modèle (export : toujours le dernier checkpoint)
+AGENT_PATH = "data/agent_td3_full.pth"
+CHECKPOINT_DIR = "data/checkpoints"
+REPLAY_BUFFER_DIR = "data/replay_buffer"
 
 # Globals
 env = None
 agent = None
+learner = None
+step_logger = None
+checkpoints = None
+episode_index = None
 state = None
 
 episode_idx = 0
 episode_step = 0
 global_step = 0
 
+# Apprentissage synchrone : durée moyenne d'un train_step (s, EMA)
+update_time = None
+last_learner_updates = 0
+
+TRAIN_UPDATES = metrics.counter("ai_train_updates_total", "Mises à jour TD3 (synchrones ou Learner)")
+TRANSITIONS = metrics.counter("ai_transitions_total", "Transitions ajoutées au replay buffer")
+
 episode_states = []
 episode_actions = []
 episode_rewards = []
@@ -52,6 +78,29 @@ def _ensure_log_dir():
     os.makedirs(LOG_DIR, exist_ok=True)
 
 
+def _get_step_logger():
+    """
+    Logger asynchrone des steps (créé à la demande, fermé par close_logs).
+    Format choisi par CONFIG["step_log_format"] : "jsonl" ou "npy".
+    """
+    global step_logger
+    if step_logger is None:
+        if cfg.CONFIG["step_log_format"] == "npy":
+            step_logger = NpyChunkLogger(STEP_CHUNK_DIR)
+        else:
+            step_logger = JsonlLogger(STEP_LOG_PATH)
+    return step_logger
+
+
+def close_logs():
+    """Vide et ferme le logger des steps (bloquant : stop_ai, via to_thread)."""
+    global step_logger
+    if step_logger is not None:
+        step_logger.close()
+        print(f"[LOG] Logger fermé ({step_logger.written} records, {step_logger.dropped} abandonnés)")
+        step_logger = None
+
+
 def _append_jsonl(path, record):
     with open(path, "a", encoding="utf-8") as f:
         f.write(json.dumps(record) + "\n")
@@ -61,8 +110,9 @@ def _save_episode_replay(ep_idx):
     if len(episode_states) == 0:
         return
 
-    filename = f"replay/replay_ep_{ep_idx:05d}.npz"
-    path = os.path.join(LOG_DIR, filename)
+    os.makedirs(EPISODE_REPLAY_DIR, exist_ok=True)
+    filename = f"replay_ep_{ep_idx:05d}.npz"
+    path = os.path.join(EPISODE_REPLAY_DIR, filename)
 
     np.savez_compressed(
         path,
@@ -72,12 +122,22 @@ def _save_episode_replay(ep_idx):
         next_states=np.array(episode_next_states, dtype=np.float32),
         dones=np.array(episode_dones, dtype=np.float32),
     )
+
+    # Index incrémental + transitions déjà dans le buffer (pas de ré-import)
+    entry = _get_episode_index().add(path, len(episode_rewards))
+    with agent.buffer_lock:     # meta relu par buffer.sync (thread checkpoint)
+        agent.buffer.meta.setdefault("episodes", {})[filename] = entry["key"]
     print(f"[LOG] Replay épisode sauvegardé : {path}")
 
 
-def _log_step(ep_idx, ep_step, g_step, state, action, reward, next_state, done, info, train_info):
-    _ensure_log_dir()
+def _get_episode_index():
+    global episode_index
+    if episode_index is None:
+        episode_index = EpisodeIndex(EPISODE_REPLAY_DIR)
+    return episode_index
 
+
+def _log_step(ep_idx, ep_step, g_step, state, action, reward, next_state, done, info, train_info):
     record = {
         "t": time.time(),
         "episode": ep_idx,
@@ -107,7 +167,7 @@ def _log_step(ep_idx, ep_step, g_step, state, action, reward, next_state, done,
         record["critic_loss"] = None
         record["actor_loss"] = None
 
-    _append_jsonl(STEP_LOG_PATH, record)
+    _get_step_logger().log(record)
 
 
 def _log_episode_summary(ep_idx, total_reward, length):
@@ -132,18 +192,49 @@ async def init_agent(mode="real"):
 
     # Environnement
     if env is None:
-        env = RobotEnv(dt=0.1, mode=mode)
+        env = RobotEnv(dt=1.0 / cfg.CONFIG["train_frequency_hz"], mode=mode)
         await env.connect()
 
     # Agent
     if agent is None:
-        agent = TD3Agent(state_dim=STATE_DIM, action_dim=ACTION_DIM)
+        torch.set_num_threads(int(cfg.CONFIG["torch_threads"]))
+
+        agent = TD3Agent(
+            state_dim=STATE_DIM,
+            action_dim=ACTION_DIM,
+            buffer_path=REPLAY_BUFFER_DIR if cfg.CONFIG["replay_persistent"] else None,
+            prioritized=cfg.CONFIG["replay_prioritized"],
+            per_alpha=cfg.CONFIG["per_alpha"],
+            per_beta=cfg.CONFIG["per_beta"],
+        )
 
         cfg.apply_to_agent(agent)
-        
-        if os.path.exists("data/agent_td3_full.pth"):
-            agent.load_full("data/agent_td3_full.pth")
-            print("[TD3] Modèle chargé depuis data/agent_td3_full.pth")
+
+        metrics.gauge("replay_buffer_size", "Transitions dans le replay buffer") \
+            .set_function(lambda: agent.buffer.size)
+        metrics.gauge("replay_buffer_capacity", "Capacité du replay buffer") \
+            .set_function(lambda: agent.buffer.capacity)
+
+        # Reprise : dernier checkpoint (+ replay), sauf si le modèle exporté
+        # est plus récent (produit hors ligne : pretrain.py, train_offline.py)
+        latest = _get_checkpoints().path("latest")
+        exported_newer = os.path.exists(AGENT_PATH) and (
+            latest is None or not os.path.exists(latest)
+            or os.path.getmtime(AGENT_PATH) > os.path.getmtime(latest)
+        )
+        if exported_newer:
+            agent.load_full(AGENT_PATH)
+            print(f"[TD3] Modèle chargé depuis {AGENT_PATH}")
+        else:
+            # torch.load + éventuel replay : hors event loop
+            await asyncio.to_thread(_get_checkpoints().load, agent)
+
+        # Expérience passée : épisodes NPZ pas encore dans le buffer
+        if cfg.CONFIG["replay_preload_episodes"]:
+            n = await asyncio.to_thread(preload_episodes, agent.buffer, EPISODE_REPLAY_DIR,
+                                        agent.buffer_lock, _get_episode_index())
+            if n:
+                await asyncio.to_thread(agent.buffer.sync, agent.buffer_lock)
 
     # Premier état
     if state is None:
@@ -161,32 +252,96 @@ async def init_agent(mode="real"):
         episode_dones = []
 
 
+# ---------------------------------------------------------------------------
+#  APPRENTISSAGE SYNCHRONE (UTD + budget)
+# ---------------------------------------------------------------------------
+def _train_for_tick(deadline=None):
+    """
+    Enchaîne jusqu'à CONFIG["utd_ratio"] train_step tant que le suivant
+    tient dans le budget du tick :
+        - CONFIG["train_budget_ms"] depuis le début de l'apprentissage
+        - et l'échéance du tick suivant moins CONFIG["train_deadline_margin_ms"]
+
+    La durée d'un update est estimée par moyenne glissante ; le premier
+    update n'est lancé que si cette estimation tient dans le budget.
+
+    Retourne (dernier train_info, nombre d'updates).
+    """
+    global update_time
+
+    t_start = time.perf_counter()
+    t_stop = t_start + cfg.CONFIG["train_budget_ms"] / 1000.0
+    if deadline is not None:
+        t_stop = min(t_stop, deadline - cfg.CONFIG["train_deadline_margin_ms"] / 1000.0)
+
+    train_info = None
+    updates = 0
+    max_updates = max(1, int(cfg.CONFIG["utd_ratio"]))
+
+    while updates < max_updates:
+        t0 = time.perf_counter()
+        if update_time is not None and t0 + update_time > t_stop:
+            break
+
+        info = agent.train_step(batch_size=cfg.CONFIG["batch_size"])
+        if info is None:
+            break   # buffer encore trop petit
+
+        elapsed = time.perf_counter() - t0
+        update_time = elapsed if update_time is None else 0.9 * update_time + 0.1 * elapsed
+
+        train_info = info
+        updates += 1
+
+        # Checkpoint périodique (écriture en tâche de fond)
+        if agent.total_it % max(1, int(cfg.CONFIG["checkpoint_every"])) == 0:
+            _get_checkpoints().save(agent)
+
+    return train_info, updates
+
+
 # ---------------------------------------------------------------------------
 #  UNE ÉTAPE RL
 # ---------------------------------------------------------------------------
-async def run_agent_once():
+async def run_agent_once(dt=None, train=True, deadline=None):
+    """
+    dt       : durée réelle du tick (s), transmise à RobotEnv
+    train    : False pour sauter l'apprentissage synchrone (tick en retard)
+    deadline : échéance du tick suivant (time.perf_counter), borne le
+               temps d'apprentissage synchrone
+    """
     global env, agent, state
-    global episode_idx, episode_step, global_step
+    global episode_idx, episode_step, global_step, last_learner_updates
     global episode_states, episode_actions, episode_rewards, episode_next_states, episode_dones
 
     await init_agent()
 
+    # Trace de latence de la commande (jusqu'à l'écho encodeur en mode réel)
+    trace = tracing.start("ai") if env.mode == "real" else None
+
     # 1. Action TD3
-    action = agent.select_action(state, noise_scale=cfg.CONFIG["noise_scale"])
+    with tracing.span("ai.select_action"):
+        action = agent.select_action(state, noise_scale=cfg.CONFIG["noise_scale"])
 
     # 2. Step env
-    next_state, reward, done = await env.step(action)
+    with tracing.span("ai.env_step"):
+        next_state, reward, done = await env.step(action, dt=dt, trace=trace)
 
     # 3. Replay buffer
     agent.push_transition(state, action, reward, next_state, float(done))
-
-    # 4. Train TD3
-    train_info = agent.train_step(batch_size=cfg.CONFIG["batch_size"])
-
-    # 5. Sauvegarde périodique
-    if agent.total_it > 0 and agent.total_it % 1000 == 0:
-        agent.save_full("data/agent_td3_full.pth")
-        print("[TD3] Modèle sauvegardé.")
+    TRANSITIONS.inc()
+
+    # 4. Train TD3 (synchrone seulement si aucun learner en thread)
+    if learner is not None and learner.running:
+        train_info = learner.last_info
+        updates = learner.updates - last_learner_updates
+        last_learner_updates = learner.updates
+    elif not train:
+        train_info, updates = None, 0
+    else:
+        train_info, updates = _train_for_tick(deadline)
+    if updates:
+        TRAIN_UPDATES.inc(updates)
 
     # Infos cockpit
     info = {
@@ -195,6 +350,7 @@ async def run_agent_once():
         "action_w": float(action[2]),
         "reward": float(reward),
         "steps_updates": int(agent.total_it),
+        "updates_per_tick": int(updates),
         "speed_x": float(env.speed_x),
         "speed_y": float(env.speed_y),
         "distance": float(env.distance),
@@ -205,6 +361,15 @@ async def run_agent_once():
         if train_info.get("actor_loss") is not None:
             info["actor_loss"] = float(train_info["actor_loss"])
 
+    if learner is not None:
+        info.update(learner.stats())
+
+    if step_logger is not None:
+        info["log_dropped"] = step_logger.dropped
+
+    if checkpoints is not None:
+        info.update(checkpoints.stats())
+
     # 6. Logging
     global_step += 1
     episode_step += 1
@@ -239,6 +404,9 @@ async def run_agent_once():
         _save_episode_replay(episode_idx)
         _log_episode_summary(episode_idx, total_reward, episode_step)
 
+        if _get_checkpoints().is_best(total_reward):
+            save_checkpoint(episode_reward=total_reward, best=True)
+
         episode_idx += 1
         episode_step = 0
 
@@ -253,6 +421,97 @@ async def run_agent_once():
     return reward, info, episode_idx
 
 
+# ---------------------------------------------------------------------------
+#  CHECKPOINTS
+# ---------------------------------------------------------------------------
+def _get_checkpoints():
+    global checkpoints
+    if checkpoints is None:
+        checkpoints = CheckpointManager(
+            CHECKPOINT_DIR,
+            keep=cfg.CONFIG["checkpoint_keep"],
+            export_path=AGENT_PATH,
+            save_replay=cfg.CONFIG["checkpoint_replay"],
+        )
+    return checkpoints
+
+
+def save_checkpoint(episode_reward=None, best=False):
+    """
+    Checkpoint non bloquant. Si le Learner tourne, l'instantané est pris
+    dans son thread entre deux updates (pas d'état à moitié mis à jour).
+    """
+    if agent is None:
+        return
+    if learner is not None and learner.running:
+        learner.request_save(episode_reward=episode_reward, best=best)
+    else:
+        _get_checkpoints().save(agent, episode_reward=episode_reward, best=best)
+
+
+def _read_weights(which):
+    data, path = _get_checkpoints().read(which, agent.device)
+    if data is None and os.path.exists(AGENT_PATH):
+        data, path = torch.load(AGENT_PATH, map_location=agent.device), AGENT_PATH
+    return data, path
+
+
+async def load_checkpoint(which="latest"):
+    """
+    Recharge les poids (sans le replay, déjà en mémoire). Lecture du
+    fichier hors event loop ; l'état est appliqué entre deux updates :
+    dans le thread du Learner s'il tourne (comme save_checkpoint), sinon
+    sur l'event loop, où se font les updates synchrones de run_agent_once.
+    """
+    if agent is None:
+        return None
+    data, path = await asyncio.to_thread(_read_weights, which)
+    if data is None:
+        return None
+    if learner is not None and learner.running:
+        await asyncio.wrap_future(learner.request_call(agent.load_state, data))
+    else:
+        agent.load_state(data)
+    return path
+
+
+def flush_checkpoints():
+    """
+    Attend la fin des écritures en cours et rend le replay persistant
+    durable (appelé par stop_ai, hors event loop).
+    """
+    if checkpoints is not None:
+        checkpoints.flush()
+    if agent is not None:
+        agent.buffer.sync(agent.buffer_lock)
+
+
+# ---------------------------------------------------------------------------
+#  LEARNER (apprentissage en thread)
+# ---------------------------------------------------------------------------
+def start_learner():
+    """Lance l'apprentissage en tâche de fond si CONFIG['async_learner']."""
+    global learner, last_learner_updates
+
+    if agent is None or not cfg.CONFIG["async_learner"]:
+        return
+
+    if learner is None:
+        learner = Learner(agent, checkpoints=_get_checkpoints())
+    learner.start()
+    last_learner_updates = learner.updates
+
+
+def stop_learner():
+    """
+    False si le Learner finit encore un update (arrêt différé).
+    Bloquant : stop_ai l'appelle via asyncio.to_thread.
+    """
+    if learner is not None:
+        return learner.stop()
+    return True
+
+
 # ---------------------------------------------------------------------------
 #  ACCÈS À L'AGENT
 # ---------------------------------------------------------------------------
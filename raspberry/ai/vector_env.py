@@ -0,0 +1,195 @@
+"""
+vector_env.py
+-------------
+Simulation vectorisée : N robots omniwheel simulés en un seul pas NumPy.
+
+Mêmes dynamique, observation et reward que RobotEnv(mode="sim"), mais :
+- poses / commandes / distances stockées dans des tableaux (N,)
+- radar par intersection analytique rayon–cercle (pas de ray-march),
+  faisceau conique comme sim_radar.SimRadar
+- reward calculée pour les N robots à la fois (compute_rewards)
+
+Aucune dépendance matériel / websockets : utilisable hors robot pour
+pré-entraîner TD3 à plusieurs milliers de steps/s sur un CPU de portable.
+
+Usage :
+    env = VectorRobotEnv(num_envs=64)
+    states = env.reset()
+    next_states, rewards, dones, truncated = env.step(actions)   # actions (N, 3)
+    states = env.reset(mask=dones | truncated)
+"""
+
+import math
+import numpy as np
+
+from ai import config as cfg
+from ai.reward import compute_rewards
+from ai.robot_env import DEFAULT_OBSTACLES, sim_integrate
+from ai.sim_radar import RADAR_MAX_DIST, beam_offsets
+
+
+# ----------------------------------------------------------------------
+#  Radar : intersection rayon–cercle
+# ----------------------------------------------------------------------
+def ray_circle_distances(ox, oy, angle, obstacles, max_dist=RADAR_MAX_DIST):
+    """
+    Distance au premier obstacle le long de chaque rayon.
+
+    ox, oy, angle : tableaux (n,) — origine et direction des rayons
+    obstacles     : tableau (M, 3) — (x, y, rayon)
+
+    Retourne un tableau (n,) : distance d'impact exacte, 0 si l'origine
+    est dans un obstacle, max_dist si aucun impact à portée.
+    """
+    ox = np.asarray(ox, dtype=np.float64)
+    n = ox.shape[0]
+    obstacles = np.asarray(obstacles, dtype=np.float64).reshape(-1, 3)
+    if len(obstacles) == 0:
+        return np.full(n, max_dist)
+
+    ux = np.cos(angle)[:, None]
+    uy = np.sin(angle)[:, None]
+
+    # m = origine - centre, pour chaque couple (rayon, obstacle)
+    mx = ox[:, None] - obstacles[None, :, 0]
+    my = np.asarray(oy, dtype=np.float64)[:, None] - obstacles[None, :, 1]
+    r2 = obstacles[None, :, 2] ** 2
+
+    b = mx * ux + my * uy
+    c = mx * mx + my * my - r2
+    disc = b * b - c
+
+    # t = -b - sqrt(disc) : première intersection ; c <= 0 : origine dedans
+    hit = disc >= 0.0
+    t = -b - np.sqrt(np.where(hit, disc, 0.0))
+    t = np.where(c <= 0.0, 0.0, t)
+    t = np.where(hit & (t >= 0.0), t, np.inf)
+
+    return np.minimum(t.min(axis=1), max_dist)
+
+
+# ----------------------------------------------------------------------
+#  Environnement vectorisé
+# ----------------------------------------------------------------------
+class VectorRobotEnv:
+    """
+    N environnements de simulation indépendants, pas synchrone.
+
+    - step(actions) -> next_states (N, 7), rewards (N,), dones (N,), truncated (N,)
+    - reset(mask=None) -> states (N, 7), réinitialise les robots de `mask`
+    """
+
+    def __init__(self, num_envs, dt=0.05, obstacles=DEFAULT_OBSTACLES,
+                 max_episode_steps=1000, random_start=False, seed=None):
+        self.num_envs = num_envs
+        self.dt = dt
+        self.max_episode_steps = max_episode_steps
+        self.random_start = random_start
+        self.rng = np.random.default_rng(seed)
+
+        self.obstacles = np.asarray(obstacles, dtype=np.float64).reshape(-1, 3)
+
+        n = num_envs
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.angle = np.zeros(n)
+        self.vx_cmd = np.zeros(n)
+        self.vy_cmd = np.zeros(n)
+        self.w_cmd = np.zeros(n)
+        self.speed_x = np.zeros(n)
+        self.speed_y = np.zeros(n)
+        self.distance = np.full(n, RADAR_MAX_DIST)
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+
+        self.episodes = 0
+        self._apply_config()
+
+    # ----------------------------------------------------------------------
+    def _apply_config(self):
+        """Applique les paramètres cockpit-driven (comme RobotEnv)."""
+        self.max_speed_linear = cfg.CONFIG["max_speed_linear"]
+        self.max_speed_angular = cfg.CONFIG["max_speed_angular"]
+
+        self.reward_distance_weight = cfg.CONFIG["reward_distance_weight"]
+        self.reward_speed_weight = cfg.CONFIG["reward_speed_weight"]
+        self.reward_collision_penalty = cfg.CONFIG["reward_collision_penalty"]
+
+        self.danger_threshold_cm = cfg.CONFIG["danger_threshold_cm"]
+
+        # Faisceau conique (même modèle que sim_radar.SimRadar)
+        self.beam_offsets = np.asarray(beam_offsets(cfg.CONFIG["sim_radar_beam_deg"],
+                                                    cfg.CONFIG["sim_radar_rays"]))
+
+    # ----------------------------------------------------------------------
+    def reset(self, mask=None):
+        """Reset des robots sélectionnés (tous si mask=None)."""
+        if mask is None:
+            self._apply_config()
+            mask = np.ones(self.num_envs, dtype=bool)
+
+        k = int(mask.sum())
+        if k:
+            self.x[mask] = 0.0
+            self.y[mask] = 0.0
+            self.angle[mask] = self.rng.uniform(0, 2 * math.pi, k) if self.random_start else 0.0
+            self.vx_cmd[mask] = 0.0
+            self.vy_cmd[mask] = 0.0
+            self.w_cmd[mask] = 0.0
+            self.speed_x[mask] = 0.0
+            self.speed_y[mask] = 0.0
+            self.episode_steps[mask] = 0
+            self.distance[mask] = self._radar(self.x[mask], self.y[mask], self.angle[mask])
+            self.episodes += k
+
+        return self._get_states()
+
+    # ----------------------------------------------------------------------
+    def step(self, actions):
+        actions = np.clip(np.asarray(actions, dtype=np.float64), -1.0, 1.0)
+        self.vx_cmd = actions[:, 0]
+        self.vy_cmd = actions[:, 1]
+        self.w_cmd = actions[:, 2]
+
+        # Même intégration que RobotEnv._sim_step
+        self.speed_x = self.vx_cmd * self.max_speed_linear
+        self.speed_y = self.vy_cmd * self.max_speed_linear
+        self.x, self.y, self.angle = sim_integrate(
+            self.x, self.y, self.angle,
+            self.speed_x, self.speed_y, self.w_cmd * self.max_speed_angular, self.dt,
+        )
+        self.distance = self._radar(self.x, self.y, self.angle)
+
+        rewards, dones = compute_rewards(
+            self.distance, self.vx_cmd, self.vy_cmd, self.w_cmd, self.speed_x, self.speed_y,
+            self.max_speed_linear, self.reward_distance_weight, self.reward_speed_weight,
+            self.reward_collision_penalty, self.danger_threshold_cm,
+        )
+
+        self.episode_steps += 1
+        truncated = ~dones & (self.episode_steps >= self.max_episode_steps)
+
+        return self._get_states(), rewards.astype(np.float32), dones, truncated
+
+    # ----------------------------------------------------------------------
+    def _radar(self, x, y, angle):
+        """Premier écho du faisceau pour chaque robot."""
+        k = len(self.beam_offsets)
+        angles = (angle[:, None] + self.beam_offsets[None, :]).ravel()
+        d = ray_circle_distances(np.repeat(x, k), np.repeat(y, k), angles, self.obstacles)
+        return d.reshape(-1, k).min(axis=1)
+
+    # ----------------------------------------------------------------------
+    def _get_states(self):
+        """
+        États normalisés (N, 7), même ordre que RobotEnv._get_state :
+        [distance_norm, angle_norm, vx_cmd, vy_cmd, w_cmd, speed_x, speed_y]
+        """
+        states = np.empty((self.num_envs, 7), dtype=np.float32)
+        states[:, 0] = np.clip(self.distance, 0, 200) / 200.0
+        states[:, 1] = (self.angle % (2 * math.pi)) / (2 * math.pi)
+        states[:, 2] = self.vx_cmd
+        states[:, 3] = self.vy_cmd
+        states[:, 4] = self.w_cmd
+        states[:, 5] = self.speed_x
+        states[:, 6] = self.speed_y
+        return states
@@ -9,11 +9,47 @@ Ce fichier lance :
 
 Usage :
     python3 app.py
+    python3 app.py --hil                 # sans robot : matériel simulé (hardware/hil.py)
+    python3 app.py --hil --hil-binary --hil-baud 115200
+    python3 app.py --metrics-port 0      # sans endpoint Prometheus
+
+Métriques : http://<ip_du_pi>:8081/metrics (telemetry/metrics_http.py)
+et WebSocket /ws-metrics.
 """
 
+import time
+import argparse
+import resource
 import threading
 import asyncio
 
+import psutil
+
+_T_START = time.perf_counter()
+
+
+# ----------------------------------------------------------------------
+#  Matériel réel ou simulé : choisi AVANT d'importer les modules qui
+#  font `from hardware.uart import ...`
+# ----------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="AxisOne")
+    parser.add_argument("--hil", action="store_true",
+                        help="matériel simulé (Mega sur pty, radar et caméra synthétiques)")
+    parser.add_argument("--hil-binary", action="store_true",
+                        help="HIL : trames binaires négociées sur le lien série")
+    parser.add_argument("--hil-baud", type=int, default=None,
+                        help="HIL : débit série simulé (défaut : sans limite)")
+    parser.add_argument("--metrics-port", type=int, default=8081,
+                        help="port de l'endpoint Prometheus /metrics (0 : désactivé)")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+if ARGS.hil:
+    from hardware import hil
+    hil.install(binary=ARGS.hil_binary, baud=ARGS.hil_baud)
+
 # Serveur HTTP cockpit
 from web.http_server import start_http_server
 
@@ -21,6 +57,9 @@ from web.http_server import start_http_server
 from webSocket.server import start_ws_server
 from hardware.uart import start_uart_thread
 from hardware.radar_hcsr04 import start_radar
+from hardware import radar_hcsr04
+from telemetry import metrics
+from telemetry.metrics_http import start_metrics_server
 
 
 # ----------------------------------------------------------------------
@@ -32,6 +71,31 @@ def start_http_thread():
     print("[APP] Serveur HTTP lancé.")
 
 
+# ----------------------------------------------------------------------
+#  Métriques lues à l'export (valeurs tenues par les modules matériels)
+# ----------------------------------------------------------------------
+def register_metrics():
+    proc = psutil.Process()
+    metrics.gauge("radar_distance_cm", "Distance radar filtrée") \
+        .set_function(lambda: radar_hcsr04.distance_value)
+    metrics.gauge("radar_signal_strength", "Qualité du signal radar (0-1)") \
+        .set_function(lambda: radar_hcsr04.signal_strength)
+    metrics.gauge("process_resident_memory_bytes", "Mémoire résidente du serveur") \
+        .set_function(lambda: proc.memory_info().rss)
+    metrics.counter("process_cpu_seconds_total", "Temps CPU du serveur (user + system)") \
+        .set_function(lambda: sum(proc.cpu_times()[:2]))
+    metrics.gauge("process_threads", "Threads du serveur") \
+        .set_function(threading.active_count)
+
+
+# ----------------------------------------------------------------------
+#  Rapport de démarrage (temps + mémoire)
+# ----------------------------------------------------------------------
+def report_startup():
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print(f"[APP] Démarrage en {time.perf_counter() - _T_START:.2f} s, RSS max {rss_mb:.0f} MB")
+
+
 # ----------------------------------------------------------------------
 #  Lancement du serveur principal (WebSockets)
 # ----------------------------------------------------------------------
@@ -44,10 +108,13 @@ def start_main_server():
 #  MAIN
 # ----------------------------------------------------------------------
 def main():
-    print("=== AXISONE APP (UN SEUL LANCEMENT) ===")
+    print("=== AXISONE APP (UN SEUL LANCEMENT) ===" + (" [HIL]" if ARGS.hil else ""))
 
-    # 1) Serveur HTTP cockpit
+    # 1) Serveur HTTP cockpit (+ endpoint Prometheus)
     start_http_thread()
+    register_metrics()
+    if ARGS.metrics_port:
+        start_metrics_server(ARGS.metrics_port)
 
     # 2) UART
     start_uart_thread()
@@ -55,6 +122,8 @@ def main():
     # 3) Radar
     start_radar()
 
+    report_startup()
+
     # 4) Serveur WebSockets (bloquant)
     start_main_server()
 
@@ -0,0 +1,193 @@
+"""
+bench_hil.py
+------------
+Benchmark de bout en bout sans robot : lance `app.py --hil` (matériel
+simulé, hardware/hil.py) et le charge comme le ferait le cockpit.
+
+- un client /ws-ctrl envoie OMNI à --cmd-hz (joystick), vx alterne entre
+  +v et -v toutes les --step-s secondes
+- latence commande -> encodeur : du premier OMNI d'un nouveau sens au
+  premier message /ws-enc dont la roue avant gauche tourne dans ce sens
+  (chemin complet ws_ctrl -> uart_link -> pty -> Mega simulé -> ENC ->
+  ws_enc ; trames ENC à 10 Hz comme le firmware)
+- --viewers onglets cockpit supplémentaires abonnés à /ws-enc, /ws-radar
+  et /ws-sys
+- CPU (% d'un cœur) et RSS du processus serveur, échantillonnés chaque seconde
+
+Usage (depuis raspberry/) :
+    python3 -m bench.bench_hil
+    python3 -m bench.bench_hil --viewers 8 --duration 30 --binary
+    python3 -m bench.bench_hil --url ws://robot.local:8765 --no-spawn
+"""
+
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import psutil
+import websockets
+
+FL = 0          # roue avant gauche (même signe que vx)
+
+
+def _wait_port(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+# ----------------------------------------------------------------------
+#  Clients
+# ----------------------------------------------------------------------
+async def _viewer(url, counts, stop):
+    try:
+        async with websockets.connect(url) as ws:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(ws.recv(), 0.5)
+                    counts[url.rsplit("/", 1)[1]] += 1
+                except asyncio.TimeoutError:
+                    pass
+    except Exception as e:
+        print("[BENCH] Viewer interrompu :", e)
+
+
+async def _controller(base, args, steps, stop):
+    period = 1.0 / args.cmd_hz
+    sign = 1.0
+    async with websockets.connect(base + "/ws-ctrl") as ws:
+        await ws.send("MODE MANUAL")
+        next_step = time.perf_counter()
+        while not stop.is_set():
+            now = time.perf_counter()
+            if now >= next_step:
+                sign = -sign
+                steps.append([sign, now, None])
+                next_step = now + args.step_s
+            await ws.send(f"OMNI {sign * args.speed:.2f} 0 0")
+            await asyncio.sleep(period)
+        await ws.send("STOP")
+
+
+async def _enc_probe(base, steps, stop):
+    """Date la première trame ENC qui suit chaque changement de sens."""
+    async with websockets.connect(base + "/ws-enc") as ws:
+        while not stop.is_set():
+            try:
+                msg = await asyncio.wait_for(ws.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            now = time.perf_counter()
+            if not steps or steps[-1][2] is not None:
+                continue
+            sign, _, _ = steps[-1]
+            speed = json.loads(msg)["speed"][FL]
+            if speed * sign > 0:
+                steps[-1][2] = now
+
+
+async def _cpu_sampler(proc, samples, stop):
+    proc.cpu_percent(None)
+    while not stop.is_set():
+        await asyncio.sleep(1.0)
+        samples.append((proc.cpu_percent(None), proc.memory_info().rss / 2**20))
+
+
+async def run(args, proc):
+    base = args.url.rstrip("/")
+    stop = asyncio.Event()
+    steps, cpu = [], []
+    counts = {"ws-enc": 0, "ws-radar": 0, "ws-sys": 0}
+
+    tasks = [
+        asyncio.create_task(_controller(base, args, steps, stop)),
+        asyncio.create_task(_enc_probe(base, steps, stop)),
+    ]
+    for _ in range(args.viewers):
+        for path in ("/ws-enc", "/ws-radar", "/ws-sys"):
+            tasks.append(asyncio.create_task(_viewer(base + path, counts, stop)))
+    if proc is not None:
+        tasks.append(asyncio.create_task(_cpu_sampler(proc, cpu, stop)))
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return steps, cpu, counts
+
+
+def report(args, steps, cpu, counts):
+    lat = np.array([(t1 - t0) * 1000.0 for _, t0, t1 in steps if t1 is not None])
+    missed = sum(1 for s in steps if s[2] is None)
+    print(f"\n[BENCH] {args.duration:.0f} s, OMNI à {args.cmd_hz:.0f} Hz, "
+          f"{args.viewers} viewers, {'binaire' if args.binary else 'texte'}")
+    if len(lat):
+        p50, p95, p99 = np.percentile(lat, (50, 95, 99))
+        print(f"[BENCH] Commande -> ENC : p50 {p50:.1f} ms, p95 {p95:.1f} ms, "
+              f"p99 {p99:.1f} ms, max {lat.max():.1f} ms ({len(lat)} échelons, {missed} sans réponse)")
+    else:
+        print(f"[BENCH] Aucun ENC reçu ({missed} échelons)")
+    rates = ", ".join(f"{k} {v / args.duration / max(1, args.viewers):.1f} msg/s"
+                      for k, v in counts.items())
+    print(f"[BENCH] Débit par viewer : {rates}")
+    if cpu:
+        c = np.array([s[0] for s in cpu[1:] or cpu])
+        print(f"[BENCH] Serveur : CPU moy {c.mean():.1f} %, max {c.max():.1f} % ; "
+              f"RSS {cpu[-1][1]:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HIL de bout en bout")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765")
+    parser.add_argument("--no-spawn", action="store_true", help="serveur déjà lancé")
+    parser.add_argument("--binary", action="store_true", help="app.py --hil-binary")
+    parser.add_argument("--baud", type=int, default=None, help="app.py --hil-baud")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--viewers", type=int, default=2)
+    parser.add_argument("--cmd-hz", type=float, default=20.0)
+    parser.add_argument("--step-s", type=float, default=0.5)
+    parser.add_argument("--speed", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = proc = None
+    log = tempfile.TemporaryFile()
+    if not args.no_spawn:
+        cmd = [sys.executable, "app.py", "--hil"]
+        if args.binary:
+            cmd.append("--hil-binary")
+        if args.baud:
+            cmd += ["--hil-baud", str(args.baud)]
+        # Sortie gardée pour le diagnostic si le serveur ne démarre pas
+        server = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        proc = psutil.Process(server.pid)
+
+    try:
+        host, port = args.url.split("//", 1)[1].split(":")
+        if not _wait_port(host, int(port), timeout=30.0):
+            print("[BENCH] Serveur injoignable :", args.url)
+            if server is not None and server.poll() is not None:
+                print(f"[BENCH] app.py terminé (code {server.returncode}) :")
+                log.seek(0)
+                print(log.read().decode(errors="replace")[-2000:])
+            return
+        steps, cpu, counts = asyncio.run(run(args, proc))
+        report(args, steps, cpu, counts)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(5)
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
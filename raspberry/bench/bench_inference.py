@@ -0,0 +1,74 @@
+"""
+bench_inference.py
+------------------
+Latence de TD3Agent.select_action (un état, CPU), p50 / p99.
+
+Compare :
+- torch  : ancien chemin (torch.FloatTensor par appel + forward PyTorch)
+- numpy  : NumpyPolicy (poids figés, tampons préalloués)
+
+Usage (depuis raspberry/) :
+    python3 -m bench.bench_inference
+    python3 -m bench.bench_inference --iters 20000 --threads 1
+"""
+
+import time
+import argparse
+
+import numpy as np
+import torch
+
+from ai.agent_td3 import TD3Agent
+
+STATE_DIM = 7
+ACTION_DIM = 3
+
+
+def _torch_select(agent, state):
+    """Référence : chemin PyTorch d'origine (sans bruit)."""
+    state_t = torch.FloatTensor(state).unsqueeze(0).to(agent.device)
+    with torch.no_grad():
+        action = agent.actor(state_t).cpu().numpy()[0]
+    return np.clip(action, -1.0, 1.0).astype(np.float32)
+
+
+def _latencies_us(fn, states):
+    out = np.empty(len(states))
+    for i, s in enumerate(states):
+        t0 = time.perf_counter()
+        fn(s)
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark select_action")
+    parser.add_argument("--iters", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=1, help="torch.set_num_threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    agent = TD3Agent(STATE_DIM, ACTION_DIM, buffer_capacity=1)
+    states = np.random.rand(args.iters, STATE_DIM).astype(np.float32)
+
+    # Vérification : mêmes actions aux arrondis float32 près
+    err = max(np.abs(_torch_select(agent, s) - agent.select_action(s, noise_scale=0.0)).max()
+              for s in states[:100])
+    print(f"[BENCH] torch threads={args.threads}, écart max torch/numpy = {err:.2e}")
+
+    cases = {
+        "torch": lambda s: _torch_select(agent, s),
+        "numpy": lambda s: agent.select_action(s, noise_scale=0.0),
+        "numpy+bruit": lambda s: agent.select_action(s, noise_scale=0.1),
+    }
+
+    print(f"{'chemin':>12} {'p50 µs':>8} {'p99 µs':>8} {'moy µs':>8}")
+    for name, fn in cases.items():
+        _latencies_us(fn, states[:200])   # échauffement
+        lat = _latencies_us(fn, states)
+        p50, p99 = np.percentile(lat, (50, 99))
+        print(f"{name:>12} {p50:>8.1f} {p99:>8.1f} {lat.mean():>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+bench_replay.py
+---------------
+Benchmark du replay buffer : uniforme vs priorisé (sum-tree).
+
+Mesure, pour 10k / 100k / 1M transitions :
+- sample(batch)              : coût d'échantillonnage
+- update_priorities(batch)   : coût de mise à jour (PER uniquement)
+- push(transition)           : coût d'insertion unitaire
+
+Usage (depuis raspberry/) :
+    python3 -m bench.bench_replay
+    python3 -m bench.bench_replay --batch 128 --iters 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ai.agent_td3 import ReplayBuffer, PrioritizedReplayBuffer
+
+STATE_DIM = 7
+ACTION_DIM = 3
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def _fill(buffer, n, chunk=100_000):
+    """Remplit le buffer par blocs avec des transitions aléatoires."""
+    done = 0
+    while done < n:
+        k = min(chunk, n - done)
+        buffer.push_batch(
+            np.random.rand(k, STATE_DIM).astype(np.float32),
+            np.random.uniform(-1, 1, (k, ACTION_DIM)).astype(np.float32),
+            np.random.randn(k).astype(np.float32),
+            np.random.rand(k, STATE_DIM).astype(np.float32),
+            np.zeros(k, dtype=np.float32),
+        )
+        done += k
+
+
+def _time_us(fn, iters):
+    """Temps moyen par appel (µs)."""
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) / iters * 1e6
+
+
+def bench(size, batch, iters):
+    results = {}
+
+    uni = ReplayBuffer(STATE_DIM, ACTION_DIM, capacity=size)
+    _fill(uni, size)
+    results["uniform"] = {
+        "sample": _time_us(lambda: uni.sample(batch), iters),
+        "update": 0.0,
+        "push": _time_us(lambda: uni.push(np.zeros(STATE_DIM), np.zeros(ACTION_DIM), 0.0,
+                                          np.zeros(STATE_DIM), 0.0), iters),
+        "mb": uni.nbytes / 1e6,
+    }
+    del uni
+
+    per = PrioritizedReplayBuffer(STATE_DIM, ACTION_DIM, capacity=size)
+    _fill(per, size)
+    per.update_priorities(np.arange(size), np.random.rand(size))
+
+    idx = per.sample(batch)[-1]
+    td = np.random.rand(batch)
+    results["prioritized"] = {
+        "sample": _time_us(lambda: per.sample(batch), iters),
+        "update": _time_us(lambda: per.update_priorities(idx, td), iters),
+        "push": _time_us(lambda: per.push(np.zeros(STATE_DIM), np.zeros(ACTION_DIM), 0.0,
+                                          np.zeros(STATE_DIM), 0.0), iters),
+        "mb": per.nbytes / 1e6,
+    }
+    del per
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replay buffer")
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--iters", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"[BENCH] batch={args.batch}, iters={args.iters}")
+    print(f"{'size':>9} {'mode':>12} {'sample µs':>10} {'update µs':>10} {'push µs':>9} {'MB':>7}")
+
+    for size in SIZES:
+        for mode, r in bench(size, args.batch, args.iters).items():
+            print(f"{size:>9} {mode:>12} {r['sample']:>10.1f} {r['update']:>10.1f} "
+                  f"{r['push']:>9.1f} {r['mb']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+bench_startup.py
+----------------
+Temps d'import et mémoire (RSS max) au démarrage du serveur.
+
+Chaque scénario est mesuré dans un interpréteur neuf :
+- lazy   : import de webSocket.server (routeur à chargement différé)
+- eager  : import de tous les handlers /ws-* (ancien routeur)
+- ai     : pile IA seule (ai.ai_loop -> torch)
+- rtc    : signalisation vidéo seule (ws.ws_rtc -> aiortc)
+
+Usage (depuis raspberry/, sur le Pi) :
+    python3 -m bench.bench_startup
+"""
+
+import sys
+import json
+import subprocess
+
+SCENARIOS = {
+    "lazy": ["webSocket.server"],
+    "eager": ["webSocket.server", "ws.ws_ctrl", "ws.ws_ai", "ws.ws_ai_config",
+              "ws.ws_radar", "ws.ws_enc", "ws.ws_sys", "ws.ws_rtc", "ai.ai_loop"],
+    "ai": ["ai.ai_loop"],
+    "rtc": ["ws.ws_rtc"],
+}
+
+_PROBE = """
+import sys, json, time, resource, importlib
+t0 = time.perf_counter()
+error = None
+try:
+    for name in sys.argv[1:]:
+        importlib.import_module(name)
+except Exception as e:
+    error = repr(e)
+print(json.dumps({
+    "seconds": time.perf_counter() - t0,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    "error": error,
+}))
+"""
+
+
+def measure(modules):
+    out = subprocess.check_output([sys.executable, "-c", _PROBE, *modules])
+    return json.loads(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'scénario':>10} {'import s':>9} {'RSS MB':>8}")
+    for name, modules in SCENARIOS.items():
+        r = measure(modules)
+        line = f"{name:>10} {r['seconds']:>9.2f} {r['rss_mb']:>8.0f}"
+        if r["error"]:
+            line += f"   (ERREUR : {r['error']})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
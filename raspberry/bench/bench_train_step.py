@@ -0,0 +1,101 @@
+"""
+bench_train_step.py
+-------------------
+Débit de TD3Agent.train_step (updates/s, CPU) selon le nombre de threads torch.
+
+Mesure aussi, par appel, les deux étapes réécrites :
+- soft update : boucle Python d'origine (un tenseur temporaire par
+                paramètre) vs foreach lerp_ en place
+- batch       : fancy indexing + torch.FloatTensor vs échantillonnage
+                direct dans les tenseurs réutilisés (vues NumPy)
+
+Usage (depuis raspberry/) :
+    python3 -m bench.bench_train_step
+    python3 -m bench.bench_train_step --threads 1 2 3 4 --updates 2000
+"""
+
+import time
+import argparse
+
+import numpy as np
+import torch
+
+from ai.agent_td3 import TD3Agent
+
+STATE_DIM = 7
+ACTION_DIM = 3
+
+
+def _legacy_soft_update(tau, params, target_params):
+    for param, target_param in zip(params, target_params):
+        target_param.data.copy_(tau * param.data + (1.0 - tau) * target_param.data)
+
+
+def _legacy_batch(agent, batch_size):
+    s, a, r, ns, d = agent.buffer.sample(batch_size)
+    return (
+        torch.FloatTensor(s), torch.FloatTensor(a), torch.FloatTensor(r).unsqueeze(1),
+        torch.FloatTensor(ns), torch.FloatTensor(d).unsqueeze(1),
+    )
+
+
+def _current_batch(agent, batch_size):
+    batch = agent._batch_tensors(batch_size)
+    agent.buffer.sample(batch_size, out=agent._batch_views)
+    return batch
+
+
+def _make_agent(batch_size):
+    agent = TD3Agent(STATE_DIM, ACTION_DIM, buffer_capacity=100000)
+    n = 50000
+    agent.buffer.push_batch(
+        np.random.rand(n, STATE_DIM), np.random.uniform(-1, 1, (n, ACTION_DIM)),
+        np.random.rand(n), np.random.rand(n, STATE_DIM), np.zeros(n),
+    )
+    return agent
+
+
+def _per_call_us(fn, iters=2000):
+    for _ in range(50):
+        fn()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) / iters * 1e6
+
+
+def _updates_per_sec(agent, batch_size, updates):
+    for _ in range(20):             # échauffement
+        agent.train_step(batch_size)
+    t0 = time.perf_counter()
+    for _ in range(updates):
+        agent.train_step(batch_size)
+    return updates / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark train_step TD3")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    agent = _make_agent(args.batch_size)
+    params, targets = agent._critic_params, agent._critic_target_params
+    bs = args.batch_size
+
+    print(f"{'threads':>7} {'up/s':>7} {'soft anc. µs':>13} {'soft act. µs':>13} "
+          f"{'batch anc. µs':>14} {'batch act. µs':>14}")
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        ups = _updates_per_sec(agent, bs, args.updates)
+        soft_old = _per_call_us(lambda: _legacy_soft_update(agent.tau, params, targets))
+        soft_new = _per_call_us(lambda: agent._soft_update(params, targets))
+        batch_old = _per_call_us(lambda: _legacy_batch(agent, bs))
+        batch_new = _per_call_us(lambda: _current_batch(agent, bs))
+        print(f"{threads:>7} {ups:>7.0f} {soft_old:>13.1f} {soft_new:>13.1f} "
+              f"{batch_old:>14.1f} {batch_new:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+bench_uart_codec.py
+-------------------
+Protocole texte vs trames binaires (hardware/uart_codec.py) sur le lien
+Raspberry <-> Mega, sans robot : le Mega est simulé sur un pty
+(hardware/mega_emulator.py).
+
+Mesures :
+- taille d'une commande VEL et débit max théorique à --baud (8N1)
+- coût d'encodage / décodage côté Python (µs)
+- débit : N commandes VEL écrites d'affilée, reçues par l'émulateur
+- aller-retour PING -> PONG (texte) et trame PING -> PONG (seq), p50 / p99
+
+Usage (depuis raspberry/) :
+    python3 -m bench.bench_uart_codec
+    python3 -m bench.bench_uart_codec --baud 115200 --vel 2000 --pings 500
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+from hardware import uart_codec
+from hardware.uart_link import format_vel
+from hardware.mega_emulator import MegaEmulator, open_port, read_available
+
+
+def _per_call_us(fn, args_list):
+    t0 = time.perf_counter()
+    for a in args_list:
+        fn(*a)
+    return (time.perf_counter() - t0) / len(args_list) * 1e6
+
+
+def _parse_text(line):
+    parts = line.split()
+    return tuple(float(p) for p in parts[1:4])
+
+
+# ----------------------------------------------------------------------
+#  Codec seul
+# ----------------------------------------------------------------------
+def bench_codec(cmds, baud):
+    lines = [format_vel(*c) for c in cmds]
+    frames = [uart_codec.encode_vel(*c) for c in cmds]
+    text_bytes = np.mean([len(line) + 1 for line in lines])
+    bin_bytes = len(frames[0])
+
+    decoder = uart_codec.FrameDecoder()
+    text_stream = [((line + "\n").encode("ascii"),) for line in lines]
+
+    rows = {
+        "texte": (text_bytes,
+                  _per_call_us(lambda *c: format_vel(*c), cmds),
+                  _per_call_us(_parse_text, [(line,) for line in lines]),
+                  _per_call_us(decoder.feed, text_stream)),
+        "binaire": (bin_bytes,
+                    _per_call_us(uart_codec.encode_vel, cmds),
+                    _per_call_us(uart_codec.decode_vel, [(f[3:-1],) for f in frames]),
+                    _per_call_us(decoder.feed, [(f,) for f in frames])),
+    }
+
+    print(f"[BENCH] VEL : taille et coût Python (débit théorique à {baud} bauds)")
+    print(f"{'format':>8} {'octets':>7} {'VEL/s max':>10} {'encode µs':>10} "
+          f"{'parse µs':>9} {'flux µs':>8}")
+    for name, (size, enc, parse, stream) in rows.items():
+        print(f"{name:>8} {size:>7.1f} {baud / (10.0 * size):>10.0f} {enc:>10.2f} "
+              f"{parse:>9.2f} {stream:>8.2f}")
+
+
+# ----------------------------------------------------------------------
+#  Lien pty
+# ----------------------------------------------------------------------
+def _wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def _write_all(fd, data):
+    """os.write non bloquant : écritures partielles quand le tampon pty est plein."""
+    view = memoryview(data)
+    while view:
+        try:
+            view = view[os.write(fd, view):]
+        except BlockingIOError:
+            time.sleep(0.0005)
+
+
+def bench_throughput(emu, fd, cmds, binary):
+    before = emu.vel_binary if binary else emu.vel_text
+    payloads = ([uart_codec.encode_vel(*c) for c in cmds] if binary
+                else [(format_vel(*c) + "\n").encode("ascii") for c in cmds])
+
+    t0 = time.perf_counter()
+    for p in payloads:
+        _write_all(fd, p)
+    counter = (lambda: emu.vel_binary) if binary else (lambda: emu.vel_text)
+    ok = _wait_for(lambda: counter() - before >= len(cmds), timeout=30.0)
+    dt = time.perf_counter() - t0
+    return len(cmds) / dt, ok, sum(len(p) for p in payloads)
+
+
+def bench_rtt(fd, n, binary):
+    decoder = uart_codec.FrameDecoder()
+    out = np.empty(n)
+    lost = 0
+    for i in range(n):
+        t0 = time.perf_counter()
+        _write_all(fd, uart_codec.encode_ping(i) if binary else b"PING\n")
+        got = False
+        deadline = time.monotonic() + 0.5
+        while not got and time.monotonic() < deadline:
+            for kind, value in decoder.feed(read_available(fd, 0.01)):
+                if binary and kind == uart_codec.PONG and uart_codec.decode_seq(value) == i & 0xFFFF:
+                    got = True
+                elif not binary and kind == "line" and value == "PONG":
+                    got = True
+        out[i] = time.perf_counter() - t0
+        lost += not got
+    return out * 1e6, lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark protocole texte / binaire")
+    parser.add_argument("--vel", type=int, default=5000, help="commandes VEL (débit)")
+    parser.add_argument("--pings", type=int, default=1000, help="allers-retours")
+    parser.add_argument("--baud", type=int, default=115200,
+                        help="débit du lien (théorique, et simulé si --simulate-baud)")
+    parser.add_argument("--simulate-baud", action="store_true",
+                        help="l'émulateur attend len*10/baud par bloc reçu")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    cmds = [tuple(v) for v in rng.uniform(-1.0, 1.0, size=(args.vel, 3)).round(3)]
+    bench_codec(cmds, args.baud)
+
+    emu = MegaEmulator(binary=True, baud=args.baud if args.simulate_baud else None)
+    emu.start()
+    fd = open_port(emu.port)
+    try:
+        ok = uart_codec.handshake(lambda b: _write_all(fd, b), lambda: read_available(fd, 0.01))
+        print(f"\n[BENCH] Négociation PING BIN : {'PONG BIN' if ok else 'échec'}")
+
+        print(f"\n[BENCH] Lien pty ({'baud simulé' if args.simulate_baud else 'sans limite de baud'})")
+        print(f"{'format':>8} {'VEL/s':>10} {'octets':>9} {'RTT p50 µs':>11} "
+              f"{'RTT p99 µs':>11} {'perdus':>7}")
+        for name, binary in (("texte", False), ("binaire", True)):
+            rate, complete, nbytes = bench_throughput(emu, fd, cmds, binary)
+            read_available(fd, 0.05)        # vide les réponses en attente
+            rtt, lost = bench_rtt(fd, args.pings, binary)
+            p50, p99 = np.percentile(rtt, (50, 99))
+            flag = "" if complete else " (incomplet)"
+            print(f"{name:>8} {rate:>10.0f} {nbytes:>9} {p50:>11.1f} {p99:>11.1f} {lost:>7}{flag}")
+
+        stats = emu.stats()
+        print(f"\n[BENCH] Émulateur : {stats['vel_text']} VEL texte, {stats['vel_binary']} VEL binaires, "
+              f"{stats['crc_errors']} erreurs CRC")
+    finally:
+        os.close(fd)
+        emu.stop()
+
+
+if __name__ == "__main__":
+    main()
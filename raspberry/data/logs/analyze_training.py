@@ -4,7 +4,8 @@ analyze_training.py
 Script d'analyse des logs d'entraînement RL (TD3).
 
 Analyse :
-- train_steps.jsonl : log par step
+- steps/steps_*.npy : log par step, blocs columnaires (memory-map)
+- train_steps.jsonl : log par step (si aucun bloc .npy)
 - episodes.jsonl    : résumé par épisode
 
 Génère :
@@ -12,13 +13,25 @@ Génère :
 - logs/img/fig_reward_episodes.png  : reward total par épisode
 - logs/img/fig_losses.png           : critic/actor loss
 - logs/img/fig_distance.png         : distance vs steps
+- logs/img/fig_actor_loss.png       : actor loss (mode streaming)
+
+Mode streaming (--stream) : train_steps.jsonl (+ rotations .1 .. .N) et les
+blocs steps/steps_*.npy (step_log_format="npy") sont lus par blocs, sans tout
+charger en RAM. Les séries sont décimées (min/max/moyenne par intervalle de
+global_step) et le résumé est mis en cache dans train_steps.summary.json :
+une nouvelle analyse ne lit que les lignes ajoutées depuis la précédente
+(offset par inode pour le JSONL, lignes lues par nom de bloc pour le .npy).
 
 Usage :
     python analyze_training.py
+    python analyze_training.py --stream
+    python analyze_training.py --stream --rebuild   (ignore le cache)
 """
 
 import os
+import glob
 import json
+import argparse
 from typing import List, Dict
 
 import numpy as np
@@ -27,6 +40,18 @@ import matplotlib.pyplot as plt
 LOG_DIR = "data/logs"
 STEP_LOG_PATH = os.path.join(LOG_DIR, "train_steps.jsonl")
 EPISODE_LOG_PATH = os.path.join(LOG_DIR, "episodes.jsonl")
+STEP_CHUNK_DIR = os.path.join(LOG_DIR, "steps")
+STEP_SUMMARY_PATH = os.path.join(LOG_DIR, "train_steps.summary.json")
+
+# Streaming
+STREAM_CHUNK_LINES = 50000
+STREAM_MAX_BUCKETS = 2000
+STREAM_SERIES = ("reward", "distance", "critic_loss", "actor_loss")
+
+# Colonnes de steps : nom -> np.ndarray (même longueur)
+Columns = Dict[str, np.ndarray]
+# Steps par blocs : une entrée par fichier .npy (vues memory-map, sans copie)
+Chunks = List[Columns]
 
 
 def load_jsonl(path: str) -> List[Dict]:
@@ -49,16 +74,59 @@ def load_jsonl(path: str) -> List[Dict]:
     return records
 
 
-def plot_reward_steps(steps: List[Dict]):
+def step_chunk_files(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, "steps_*.npy")))
+
+
+def open_step_chunk(path: str) -> Columns:
+    """Colonnes d'un bloc NpyChunkLogger : vues memory-map, rien n'est copié."""
+    data = np.load(path, mmap_mode="r")
+    return {name: data[name] for name in data.dtype.names}
+
+
+def load_step_chunks(directory: str) -> Chunks:
+    """
+    Ouvre les blocs steps_*.npy écrits par NpyChunkLogger, un par un en
+    memory-map. Les colonnes ne sont pas concaténées : seules les pages
+    lues par les tracés sont chargées.
+    """
+    chunks = [open_step_chunk(p) for p in step_chunk_files(directory)]
+    chunks = [c for c in chunks if len(c["global_step"])]
+    if chunks:
+        n = sum(len(c["global_step"]) for c in chunks)
+        print(f"[INFO] Ouvert {n} steps depuis {len(chunks)} blocs ({directory})")
+    return chunks
+
+
+def records_to_columns(records: List[Dict]) -> Columns:
+    """Convertit une liste de dict JSONL en colonnes (None -> NaN)."""
+    if not records:
+        return {}
+
+    keys = records[0].keys()
+    return {
+        k: np.array([np.nan if r.get(k) is None else r.get(k) for r in records], dtype=np.float64)
+        for k in keys
+    }
+
+
+def load_steps() -> Chunks:
+    """Blocs .npy si présents, sinon train_steps.jsonl (un seul bloc)."""
+    chunks = load_step_chunks(STEP_CHUNK_DIR)
+    if chunks:
+        return chunks
+    columns = records_to_columns(load_jsonl(STEP_LOG_PATH))
+    return [columns] if columns else []
+
+
+def plot_reward_steps(steps: Chunks):
     """Trace le reward par step."""
     if not steps:
         return
 
-    gs = [r["global_step"] for r in steps]
-    rw = [r["reward"] for r in steps]
-
     plt.figure(figsize=(10, 4))
-    plt.plot(gs, rw, ".", markersize=2, alpha=0.7)
+    for chunk in steps:
+        plt.plot(chunk["global_step"], chunk["reward"], ".", color="C0", markersize=2, alpha=0.7)
     plt.xlabel("Global step")
     plt.ylabel("Reward")
     plt.title("Reward par step")
@@ -91,23 +159,24 @@ def plot_reward_episodes(episodes: List[Dict]):
     print(f"[PLOT] {out}")
 
 
-def plot_losses(steps: List[Dict]):
+def plot_losses(steps: Chunks):
     """Trace critic_loss et actor_loss en fonction des steps."""
     if not steps:
         return
 
-    gs = [r["global_step"] for r in steps if r.get("critic_loss") is not None]
-    critic = [r["critic_loss"] for r in steps if r.get("critic_loss") is not None]
-    actor = [r["actor_loss"] for r in steps if r.get("actor_loss") is not None]
-
-    if not gs:
+    if not any((~np.isnan(c["critic_loss"])).any() for c in steps):
         print("[INFO] Pas de losses dans les logs.")
         return
 
     plt.figure(figsize=(10, 4))
-    plt.plot(gs, critic, label="critic_loss", alpha=0.8)
-    if any(a is not None for a in actor):
-        plt.plot(gs, actor, label="actor_loss", alpha=0.8)
+    for name, color in (("critic_loss", "C0"), ("actor_loss", "C1")):
+        label = name
+        for chunk in steps:
+            mask = ~np.isnan(chunk[name])
+            if mask.any():
+                plt.plot(chunk["global_step"][mask], chunk[name][mask],
+                         color=color, label=label, alpha=0.8)
+                label = None
     plt.xlabel("Global step")
     plt.ylabel("Loss")
     plt.title("Losses TD3")
@@ -120,16 +189,14 @@ def plot_losses(steps: List[Dict]):
     print(f"[PLOT] {out}")
 
 
-def plot_distance(steps: List[Dict]):
+def plot_distance(steps: Chunks):
     """Trace la distance mesurée par rapport aux steps."""
     if not steps:
         return
 
-    gs = [r["global_step"] for r in steps]
-    dist = [r.get("distance", 0.0) for r in steps]
-
     plt.figure(figsize=(10, 4))
-    plt.plot(gs, dist, ".", markersize=2, alpha=0.7)
+    for chunk in steps:
+        plt.plot(chunk["global_step"], chunk["distance"], ".", color="C0", markersize=2, alpha=0.7)
     plt.xlabel("Global step")
     plt.ylabel("Distance")
     plt.title("Distance vs steps")
@@ -156,8 +223,271 @@ def print_stats(episodes: List[Dict]):
     print("[STATS] Longueur moy.  :", float(lengths.mean()))
 
 
+# ---------------------------------------------------------------------------
+#  MODE STREAMING (mémoire bornée + cache incrémental)
+# ---------------------------------------------------------------------------
+class DecimatedSeries:
+    """
+    Série décimée par intervalles de global_step de largeur `width`.
+    Chaque intervalle garde [min, max, somme, nombre].
+    Au-delà de `max_buckets` intervalles, la largeur double (fusion 2 à 2) :
+    la mémoire reste bornée quelle que soit la longueur du log.
+    """
+
+    def __init__(self, width: int = 1, max_buckets: int = STREAM_MAX_BUCKETS):
+        self.width = width
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, List[float]] = {}
+
+    def add(self, x: np.ndarray, y: np.ndarray):
+        mask = ~np.isnan(y)
+        if not mask.any():
+            return
+        x, y = x[mask], y[mask]
+
+        keys, inv = np.unique(x.astype(np.int64) // self.width, return_inverse=True)
+        lo = np.full(len(keys), np.inf)
+        hi = np.full(len(keys), -np.inf)
+        np.minimum.at(lo, inv, y)
+        np.maximum.at(hi, inv, y)
+        sums = np.bincount(inv, weights=y, minlength=len(keys))
+        counts = np.bincount(inv, minlength=len(keys))
+
+        for k, a, b, sm, n in zip(keys.tolist(), lo.tolist(), hi.tolist(), sums.tolist(), counts.tolist()):
+            self._merge(k, a, b, sm, n)
+
+        while len(self.buckets) > self.max_buckets:
+            self._coarsen()
+
+    def _merge(self, key, lo, hi, total, count):
+        b = self.buckets.get(key)
+        if b is None:
+            self.buckets[key] = [lo, hi, total, count]
+        else:
+            b[0] = min(b[0], lo)
+            b[1] = max(b[1], hi)
+            b[2] += total
+            b[3] += count
+
+    def _coarsen(self):
+        old = self.buckets
+        self.width *= 2
+        self.buckets = {}
+        for k, (lo, hi, total, count) in old.items():
+            self._merge(k // 2, lo, hi, total, count)
+
+    def arrays(self):
+        """Retourne x, min, max, moyenne triés par x."""
+        keys = sorted(self.buckets)
+        data = np.array([self.buckets[k] for k in keys], dtype=np.float64).reshape(-1, 4)
+        x = np.array(keys, dtype=np.float64) * self.width
+        return x, data[:, 0], data[:, 1], data[:, 2] / np.maximum(data[:, 3], 1)
+
+    def to_dict(self) -> Dict:
+        return {"width": self.width, "buckets": {str(k): v for k, v in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "DecimatedSeries":
+        series = cls(width=d["width"])
+        series.buckets = {int(k): v for k, v in d["buckets"].items()}
+        return series
+
+
+def _empty_summary() -> Dict:
+    return {
+        "files": {},          # inode -> octets déjà traités (JSONL)
+        "chunks": {},         # nom de bloc .npy -> lignes déjà traitées
+        "count": 0,
+        "done_count": 0,
+        "reward_sum": 0.0,
+        "reward_min": None,
+        "reward_max": None,
+        "last_global_step": None,
+        "series": {},
+    }
+
+
+def _step_log_files() -> List[str]:
+    """Rotations les plus anciennes d'abord, fichier courant en dernier."""
+    rotated = glob.glob(STEP_LOG_PATH + ".*")
+    rotated = [p for p in rotated if p.rsplit(".", 1)[-1].isdigit()]
+    rotated.sort(key=lambda p: int(p.rsplit(".", 1)[-1]), reverse=True)
+    if os.path.exists(STEP_LOG_PATH):
+        rotated.append(STEP_LOG_PATH)
+    return rotated
+
+
+def _iter_line_blocks(path: str, offset: int, block_lines: int):
+    """
+    Lit `path` à partir de `offset` par blocs de lignes complètes.
+    Produit (records, nouvel offset). Une ligne incomplète en fin de
+    fichier (écriture en cours) est laissée pour la prochaine analyse.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        records = []
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                records.append(json.loads(raw))
+            except json.JSONDecodeError:
+                pass
+            if len(records) >= block_lines:
+                yield records, offset
+                records = []
+        yield records, offset
+
+
+def _aggregate_block(summary: Dict, series: Dict[str, DecimatedSeries], records: List[Dict]):
+    _aggregate_columns(summary, series, records_to_columns(records))
+
+
+def _aggregate_columns(summary: Dict, series: Dict[str, DecimatedSeries], cols: Columns):
+    gs = cols["global_step"]
+    reward = cols["reward"]
+
+    summary["count"] += len(gs)
+    summary["done_count"] += int(np.nansum(cols.get("done", np.zeros(0))))
+    summary["reward_sum"] += float(np.nansum(reward))
+    lo, hi = float(np.nanmin(reward)), float(np.nanmax(reward))
+    summary["reward_min"] = lo if summary["reward_min"] is None else min(summary["reward_min"], lo)
+    summary["reward_max"] = hi if summary["reward_max"] is None else max(summary["reward_max"], hi)
+    summary["last_global_step"] = int(gs[-1])
+
+    for name in STREAM_SERIES:
+        if name in cols:
+            series[name].add(gs, cols[name])
+
+
+def stream_steps(rebuild: bool = False):
+    """
+    Met à jour le résumé en ne lisant que les nouvelles lignes.
+    Retourne (summary, series).
+    """
+    summary = None
+    if not rebuild and os.path.exists(STEP_SUMMARY_PATH):
+        try:
+            with open(STEP_SUMMARY_PATH, "r", encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            summary = None
+    if summary is None:
+        summary = _empty_summary()
+
+    series = {name: DecimatedSeries.from_dict(summary["series"][name])
+              if name in summary["series"] else DecimatedSeries()
+              for name in STREAM_SERIES}
+
+    new_records = 0
+    seen = set()
+    for path in _step_log_files():
+        st = os.stat(path)
+        key = str(st.st_ino)   # stable malgré la rotation (rename)
+        seen.add(key)
+        offset = summary["files"].get(key, 0)
+        if offset > st.st_size:
+            offset = 0         # fichier tronqué / inode réutilisé
+
+        for records, offset in _iter_line_blocks(path, offset, STREAM_CHUNK_LINES):
+            if records:
+                _aggregate_block(summary, series, records)
+                new_records += len(records)
+            summary["files"][key] = offset
+    # Rotations supprimées : leurs inodes peuvent être réutilisés
+    summary["files"] = {k: v for k, v in summary["files"].items() if k in seen}
+
+    new_records += _stream_chunks(summary, series)
+
+    summary["series"] = {name: s.to_dict() for name, s in series.items()}
+
+    tmp = STEP_SUMMARY_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f)
+    os.replace(tmp, STEP_SUMMARY_PATH)
+
+    print(f"[INFO] Streaming : {new_records} nouvelles lignes, {summary['count']} au total")
+    return summary, series
+
+
+def _stream_chunks(summary: Dict, series: Dict[str, DecimatedSeries]) -> int:
+    """
+    Blocs steps_*.npy : seules les lignes au-delà de celles déjà traitées
+    sont lues (le bloc courant grandit tant que NpyChunkLogger écrit).
+    """
+    done = summary.setdefault("chunks", {})
+    seen = set()
+    new_records = 0
+    for path in step_chunk_files(STEP_CHUNK_DIR):
+        name = os.path.basename(path)
+        seen.add(name)
+        try:
+            chunk = open_step_chunk(path)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Bloc illisible {name} : {e}")
+            continue
+        n = len(chunk["global_step"])
+        start = done.get(name, 0)
+        if start > n:
+            start = 0          # bloc réécrit
+        for i in range(start, n, STREAM_CHUNK_LINES):
+            j = min(n, i + STREAM_CHUNK_LINES)
+            cols = {k: np.asarray(v[i:j], dtype=np.float64) for k, v in chunk.items()}
+            _aggregate_columns(summary, series, cols)
+            new_records += j - i
+        done[name] = n
+    summary["chunks"] = {k: v for k, v in done.items() if k in seen}
+    return new_records
+
+
+def print_stream_stats(summary: Dict):
+    if summary["count"] == 0:
+        print("[STATS] Aucun step loggé.")
+        return
+    print("[STATS] Steps          :", summary["count"])
+    print("[STATS] Reward moyen   :", summary["reward_sum"] / summary["count"])
+    print("[STATS] Reward min/max :", summary["reward_min"], "/", summary["reward_max"])
+    print("[STATS] Fins d'épisode :", summary["done_count"])
+
+
+def plot_decimated(series: DecimatedSeries, ylabel: str, title: str, filename: str):
+    """Trace l'enveloppe min/max et la moyenne par intervalle."""
+    if not series.buckets:
+        return
+
+    x, lo, hi, mean = series.arrays()
+
+    plt.figure(figsize=(10, 4))
+    plt.fill_between(x, lo, hi, alpha=0.3, step="post", label="min/max")
+    plt.plot(x, mean, linewidth=1, label="moyenne")
+    plt.xlabel(f"Global step (intervalles de {series.width})")
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    out = os.path.join(LOG_DIR, "img", filename)
+    plt.tight_layout()
+    plt.savefig(out)
+    plt.close()
+    print(f"[PLOT] {out}")
+
+
+def main_stream(rebuild: bool):
+    summary, series = stream_steps(rebuild)
+    episodes = load_jsonl(EPISODE_LOG_PATH)
+
+    print_stats(episodes)
+    print_stream_stats(summary)
+    plot_decimated(series["reward"], "Reward", "Reward par step", "fig_reward_steps.png")
+    plot_reward_episodes(episodes)
+    plot_decimated(series["critic_loss"], "Critic loss", "Critic loss TD3", "fig_losses.png")
+    plot_decimated(series["actor_loss"], "Actor loss", "Actor loss TD3", "fig_actor_loss.png")
+    plot_decimated(series["distance"], "Distance", "Distance vs steps", "fig_distance.png")
+
+
 def main():
-    steps = load_jsonl(STEP_LOG_PATH)
+    steps = load_steps()
     episodes = load_jsonl(EPISODE_LOG_PATH)
 
     print_stats(episodes)
@@ -168,4 +498,14 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyse des logs TD3")
+    parser.add_argument("--stream", action="store_true",
+                        help="lecture par blocs + cache incrémental (JSONL et blocs .npy)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="ignore le cache du mode streaming")
+    args = parser.parse_args()
+
+    if args.stream:
+        main_stream(args.rebuild)
+    else:
+        main()
\ No newline at end of file
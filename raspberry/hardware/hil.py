@@ -0,0 +1,91 @@
+"""
+hil.py
+------
+Matériel simulé (hardware-in-the-loop) : le serveur complet tourne sans
+robot, sur un PC ou une machine de CI.
+
+install() remplace, AVANT leur premier import :
+    hardware.uart          -> hil_uart    (Mega simulé sur pty, ENC à 10 Hz)
+    hardware.radar_hcsr04  -> hil_radar   (SimRadar depuis la pose simulée)
+    hardware.camera        -> hil_camera  (mire synthétique WebRTC)
+    web.http_server        -> hil_http    (www/ en statique, seulement si
+                                           le serveur cockpit est absent)
+Les modules qui font `from hardware.uart import ...` reçoivent donc la
+version simulée sans modification.
+
+Usage :
+    python3 app.py --hil
+    python3 app.py --hil --hil-binary --hil-baud 115200
+"""
+
+import sys
+import types
+import importlib
+
+_BACKENDS = {
+    "hardware.uart": "hardware.hil_uart",
+    "hardware.radar_hcsr04": "hardware.hil_radar",
+    "hardware.camera": "hardware.hil_camera",
+}
+
+installed = False
+
+
+def install(binary=False, baud=None, encoder_hz=None):
+    """
+    binary     : négociation "PING BIN" puis trames binaires (uart_codec.py)
+    baud       : débit série simulé (None = pty sans limite)
+    encoder_hz : fréquence des trames ENC (défaut : celle du firmware)
+    """
+    global installed
+    for real in _BACKENDS:
+        if real in sys.modules and not installed:
+            raise RuntimeError(f"{real} déjà importé : appeler hil.install() plus tôt")
+
+    from hardware import hil_uart
+    hil_uart.BINARY = binary
+    hil_uart.BAUD = baud
+    if encoder_hz is not None:
+        hil_uart.ENCODER_HZ = encoder_hz
+
+    package = importlib.import_module("hardware")
+    for real, sim in _BACKENDS.items():
+        if sim == "hardware.hil_camera":
+            # aiortc n'est importé qu'à la première connexion /ws-rtc
+            sys.modules[real] = _LazyModule(sim)
+        else:
+            sys.modules[real] = importlib.import_module(sim)
+        setattr(package, real.rsplit(".", 1)[1], sys.modules[real])
+
+    _install_http()
+
+    installed = True
+    print(f"[HIL] Matériel simulé (binaire={'oui' if binary else 'non'}, "
+          f"baud={baud or 'illimité'})")
+
+
+def _install_http():
+    """Cockpit HTTP : le vrai serveur s'il est présent, sinon hil_http."""
+    try:
+        importlib.import_module("web.http_server")
+        return
+    except ModuleNotFoundError as e:
+        if e.name not in ("web", "web.http_server"):
+            raise
+    if "web" not in sys.modules:
+        web = types.ModuleType("web")
+        web.__path__ = []
+        sys.modules["web"] = web
+    sys.modules["web.http_server"] = importlib.import_module("hardware.hil_http")
+    sys.modules["web"].http_server = sys.modules["web.http_server"]
+    print("[HIL] web/http_server absent : cockpit servi par hil_http (www/)")
+
+
+class _LazyModule:
+    """Module importé au premier accès à un attribut."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
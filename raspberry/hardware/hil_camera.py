@@ -0,0 +1,62 @@
+"""
+hil_camera.py
+-------------
+Remplaçant simulé de hardware/camera.py (mode HIL, voir hardware/hil.py).
+
+CameraTrack : piste vidéo aiortc synthétique (mire défilante + jauge de
+distance radar), même cadence et même résolution que la caméra CSI, pour
+mesurer le coût d'encodage WebRTC sans caméra.
+"""
+
+import asyncio
+import fractions
+import time
+
+import numpy as np
+from av import VideoFrame
+from aiortc import VideoStreamTrack
+
+WIDTH = 640
+HEIGHT = 480
+FPS = 30
+
+_TIME_BASE = fractions.Fraction(1, 90000)
+
+
+class CameraTrack(VideoStreamTrack):
+
+    kind = "video"
+
+    def __init__(self):
+        super().__init__()
+        # Mire calculée une fois : chaque image n'est qu'un décalage
+        x = np.linspace(0, 255, WIDTH, dtype=np.float32)
+        y = np.linspace(0, 255, HEIGHT, dtype=np.float32)[:, None]
+        self._pattern = np.stack([
+            np.broadcast_to(x, (HEIGHT, WIDTH)),
+            np.broadcast_to(y, (HEIGHT, WIDTH)),
+            np.full((HEIGHT, WIDTH), 96, dtype=np.float32),
+        ], axis=-1).astype(np.uint8)
+        self._frame = np.empty_like(self._pattern)
+        self._count = 0
+        self._start = None
+
+    async def recv(self):
+        if self._start is None:
+            self._start = time.monotonic()
+        self._count += 1
+        delay = self._start + self._count / FPS - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        from hardware import hil_radar
+
+        np.copyto(self._frame, np.roll(self._pattern, self._count * 4, axis=1))
+        # Jauge : largeur proportionnelle à la distance radar
+        gauge = int(WIDTH * max(0.0, min(1.0, hil_radar.distance_value / 200.0)))
+        self._frame[-24:, :gauge] = (255, 255, 255)
+
+        frame = VideoFrame.from_ndarray(self._frame, format="rgb24")
+        frame.pts = int(self._count * 90000 / FPS)
+        frame.time_base = _TIME_BASE
+        return frame
@@ -0,0 +1,37 @@
+"""
+hil_http.py
+-----------
+Remplaçant de web/http_server.py (mode HIL, voir hardware/hil.py), utilisé
+seulement si le serveur cockpit n'est pas présent dans l'arbre.
+
+Même API que le module réel :
+    start_http_server()   (bloquant, lancé dans un thread par app.py)
+
+Serveur statique minimal (bibliothèque standard) sur www/, port HTTP_PORT :
+le cockpit reste utilisable sur http://localhost:8080 pendant un essai HIL.
+"""
+
+import os
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+HTTP_PORT = 8080
+WWW_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "www")
+
+
+class _Handler(SimpleHTTPRequestHandler):
+
+    def log_message(self, fmt, *args):
+        pass            # pas une ligne par fichier servi
+
+
+def start_http_server(port=HTTP_PORT, host="0.0.0.0"):
+    handler = partial(_Handler, directory=WWW_DIR)
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        print(f"[HTTP-HIL] Port {port} indisponible ({e}), cockpit non servi")
+        return
+    server.daemon_threads = True
+    print(f"[HTTP-HIL] Cockpit sur http://{host}:{port}/index.html")
+    server.serve_forever()
@@ -0,0 +1,78 @@
+"""
+hil_radar.py
+------------
+Remplaçant simulé de hardware/radar_hcsr04.py (mode HIL, voir hardware/hil.py).
+
+Même API que le module réel :
+    start_radar(), distance_value, signal_strength,
+    set_alpha(a), set_median_window_size(n)
+
+La distance est celle du radar simulé de RobotEnv (ai/sim_radar.py,
+faisceau conique) depuis la pose du Mega simulé (hil_uart.emulator),
+avec un bruit gaussien, puis le même filtrage que le capteur réel :
+médiane glissante puis moyenne exponentielle (alpha).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+from ai import config as cfg
+from ai.robot_env import DEFAULT_OBSTACLES
+from ai.sim_radar import SimRadar, RADAR_MAX_DIST
+from telemetry import metrics
+
+RATE_HZ = 16.0          # cadence typique d'un HC-SR04 (écho jusqu'à ~4 m)
+NOISE_CM = 0.8          # écart-type du bruit de mesure
+
+distance_value = RADAR_MAX_DIST
+signal_strength = 0.0
+
+_alpha = cfg.CONFIG["radar_alpha"]
+_window = deque(maxlen=cfg.CONFIG["radar_median_window"])
+_thread = None
+
+READS = metrics.counter("radar_reads_total", "Mesures radar acquises")
+
+
+def set_alpha(alpha):
+    global _alpha
+    _alpha = float(alpha)
+
+
+def set_median_window_size(n):
+    global _window
+    _window = deque(_window, maxlen=max(1, int(n)))
+
+
+def _loop():
+    global distance_value, signal_strength
+    from hardware import hil_uart
+
+    radar = SimRadar(DEFAULT_OBSTACLES)
+    radar.set_beam(cfg.CONFIG["sim_radar_beam_deg"], cfg.CONFIG["sim_radar_rays"])
+    filtered = None
+
+    while True:
+        pose = hil_uart.emulator.pose if hil_uart.emulator is not None else (0.0, 0.0, 0.0)
+        raw = radar.measure(*pose) + random.gauss(0.0, NOISE_CM)
+        raw = min(max(raw, 0.0), RADAR_MAX_DIST)
+
+        _window.append(raw)
+        READS.inc()
+        median = sorted(_window)[len(_window) // 2]
+        filtered = median if filtered is None else filtered + _alpha * (median - filtered)
+
+        distance_value = round(filtered, 1)
+        signal_strength = round(1.0 - filtered / RADAR_MAX_DIST, 3)
+        time.sleep(1.0 / RATE_HZ)
+
+
+def start_radar():
+    global _thread
+    if _thread is not None:
+        return
+    _thread = threading.Thread(target=_loop, name="radar-hil", daemon=True)
+    _thread.start()
+    print("[RADAR-HIL] Radar simulé démarré")
@@ -0,0 +1,115 @@
+"""
+hil_uart.py
+-----------
+Remplaçant simulé de hardware/uart.py (mode HIL, voir hardware/hil.py).
+
+Même API que le module réel :
+    start_uart_thread(), send_to_mega(msg), set_event_loop(loop), latest_enc
+
+Le port série est le pty d'un Mega simulé (mega_emulator.py) qui parle le
+protocole de Protocol.cpp et renvoie des trames "ENC ..." à ENCODER_HZ :
+tout le chemin cockpit -> ws_ctrl -> uart_link -> port série -> Mega ->
+ENC -> /ws-enc est exercé, seul le robot manque.
+
+Si BINARY est vrai, la négociation "PING BIN" est faite au démarrage et
+uart_link passe en trames binaires (uart_codec.py).
+"""
+
+import os
+import time
+import asyncio
+import threading
+
+from hardware import uart_codec
+from hardware.mega_emulator import MegaEmulator, open_port, read_available
+from telemetry import tracing
+
+ENCODER_HZ = 10.0       # mecanumUpdateEncoders : toutes les 100 ms
+BINARY = False
+BAUD = None             # débit simulé (None = pty sans limite)
+
+emulator = None
+latest_enc = {"ticks": [0, 0, 0, 0], "speed": [0.0, 0.0, 0.0, 0.0]}
+
+_fd = None
+_loop = None
+_write_lock = threading.Lock()
+
+
+def set_event_loop(loop):
+    """Event loop du serveur WS (diffusion /ws-enc depuis le thread UART)."""
+    global _loop
+    _loop = loop
+
+
+# ----------------------------------------------------------------------
+#  Écriture
+# ----------------------------------------------------------------------
+def _write_raw(data):
+    view = memoryview(data)
+    with _write_lock:
+        while view:
+            try:
+                view = view[os.write(_fd, view):]
+            except BlockingIOError:
+                time.sleep(0.0005)
+
+
+def send_to_mega(msg):
+    _write_raw((msg + "\n").encode("ascii"))
+
+
+# ----------------------------------------------------------------------
+#  Lecture (thread)
+# ----------------------------------------------------------------------
+def _parse_enc(line):
+    parts = line.split()
+    if len(parts) < 9:
+        return None
+    try:
+        return {
+            "ticks": [int(p) for p in parts[1:5]],
+            "speed": [float(p) for p in parts[5:9]],
+        }
+    except ValueError:
+        return None
+
+
+def _reader():
+    from ws.ws_enc import broadcast_enc
+
+    decoder = uart_codec.FrameDecoder()
+    while True:
+        for kind, value in decoder.feed(read_available(_fd, 0.1)):
+            if kind != "line":
+                continue
+            tracing.mega_line()
+            if value.startswith("ENC"):
+                enc = _parse_enc(value)
+                if enc is None:
+                    continue
+                latest_enc.update(enc)
+                if _loop is not None:
+                    asyncio.run_coroutine_threadsafe(broadcast_enc(dict(enc)), _loop)
+            else:
+                print("[UART-HIL] Reçu :", value)
+
+
+def start_uart_thread():
+    global emulator, _fd
+    if emulator is not None:
+        return
+    emulator = MegaEmulator(binary=True, baud=BAUD, encoder_hz=ENCODER_HZ)
+    emulator.start()
+    _fd = open_port(emulator.port)
+
+    if BINARY:
+        # Négociation avant le thread de lecture (il consommerait la réponse)
+        if uart_codec.handshake(_write_raw, lambda: read_available(_fd, 0.01)):
+            from hardware import uart_link
+            uart_link.get_link().enable_binary(_write_raw)
+        else:
+            print("[UART-HIL] Négociation binaire refusée, protocole texte")
+
+    threading.Thread(target=_reader, name="uart-hil-reader", daemon=True).start()
+    print(f"[UART-HIL] Mega simulé sur {emulator.port}")
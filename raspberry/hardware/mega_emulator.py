@@ -0,0 +1,300 @@
+"""
+mega_emulator.py
+----------------
+Arduino Mega simulé sur un pseudo-terminal (pty), pour tester et mesurer
+le lien série sans robot (PC Linux ou Raspberry seule).
+
+Reproduit le protocole de arduino/src/Protocol.cpp :
+- lignes texte : VEL vx vy w, MODE MANUAL / AI (écho "MODE ..."),
+  PING (-> PONG), PING BIN (-> PONG BIN, ou PONG avec binary=False pour
+  simuler un ancien firmware)
+- trames binaires (hardware/uart_codec.py) : VEL, MODE, PING (-> PONG seq)
+- baud : si fourni, chaque bloc reçu coûte len * 10 / baud secondes
+  (8N1), pour approcher le débit réel de Serial3 (115200)
+- encoder_hz > 0 : comme MecanumControl.cpp, envoie "ENC ticks[4]
+  speed[4]" (10 Hz sur le robot). Mixage mecanum et normalisation du
+  firmware, moteurs du premier ordre (motor_tau), watchdog de 500 ms ;
+  la pose (cm / rad) suit la cinématique de RobotEnv (sim_integrate) et
+  sert au radar simulé (hardware/hil.py)
+
+Usage (depuis raspberry/) :
+    python3 -m hardware.mega_emulator            # affiche le port /dev/pts/N
+    python3 -m hardware.mega_emulator --text-only --baud 115200
+    python3 -m hardware.mega_emulator --encoder-hz 10
+
+    emu = MegaEmulator()
+    emu.start()
+    fd = open_port(emu.port)
+"""
+
+import os
+import math
+import time
+import tty
+import select
+import argparse
+import threading
+
+from ai.robot_env import sim_integrate
+from hardware import uart_codec
+
+MAX_WHEEL_SPEED = 500.0     # ticks/s (RobotConfig.h)
+WATCHDOG_S = 0.5            # WATCHDOG_TIMEOUT (RobotConfig.h)
+MOTOR_TAU = 0.05            # constante de temps moteur simulée (s)
+
+
+def wheel_mix(vx, vy, w):
+    """Commande omni -> consignes roues FL, FR, RR, RL (mecanumToWheelTargets)."""
+    m = [vx - vy - w, vx + vy + w, vx - vy + w, vx + vy - w]
+    peak = max(abs(v) for v in m)
+    if peak > 1.0:
+        m = [v / peak for v in m]
+    return [v * MAX_WHEEL_SPEED for v in m]
+
+
+def body_velocity(speeds):
+    """Vitesses roues (ticks/s) -> (vx, vy, w) : inverse de wheel_mix."""
+    fl, fr, rr, rl = (v / MAX_WHEEL_SPEED for v in speeds)
+    return ((fl + fr + rr + rl) / 4.0,
+            (-fl + fr - rr + rl) / 4.0,
+            (-fl + fr + rr - rl) / 4.0)
+
+
+def open_port(path):
+    """Ouvre un port (pty ou tty) en mode brut, lecture non bloquante."""
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    tty.setraw(fd)
+    return fd
+
+
+def read_available(fd, timeout=0.05):
+    """Octets disponibles sur `fd` (b"" après `timeout` secondes)."""
+    ready, _, _ = select.select([fd], [], [], timeout)
+    if not ready:
+        return b""
+    try:
+        return os.read(fd, 4096)
+    except (BlockingIOError, OSError):
+        return b""
+
+
+class MegaEmulator:
+
+    def __init__(self, binary=True, baud=None, on_vel=None, encoder_hz=0.0, motor_tau=MOTOR_TAU):
+        self.binary = binary
+        self.baud = baud
+        self.on_vel = on_vel            # on_vel(vx, vy, w), thread émulateur
+        self.encoder_hz = encoder_hz
+        self.motor_tau = motor_tau
+
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._running = False
+        self._thread = None
+        self._enc_thread = None
+        self._lock = threading.Lock()
+        self.decoder = uart_codec.FrameDecoder()
+
+        # État "firmware"
+        self.mode = "MANUAL"
+        self.command = (0.0, 0.0, 0.0)
+        self.last_command_time = None
+
+        # Roues et pose simulées
+        self.ticks = [0.0] * 4
+        self.wheel_speed = [0.0] * 4
+        self.pose = (0.0, 0.0, 0.0)     # x (cm), y (cm), angle (rad)
+
+        # Compteurs
+        self.vel_text = 0
+        self.vel_binary = 0
+        self.pings = 0
+        self.bytes_in = 0
+        self.enc_sent = 0
+        self.watchdog_stops = 0
+
+    # ------------------------------------------------------------------
+    #  Démarrage / arrêt
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._running:
+            return self.port
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mega-emulator", daemon=True)
+        self._thread.start()
+        if self.encoder_hz > 0:
+            self._enc_thread = threading.Thread(target=self._encoder_loop,
+                                                name="mega-encoders", daemon=True)
+            self._enc_thread.start()
+        print(f"[MEGA-EMU] Port série simulé : {self.port} "
+              f"(binaire={'oui' if self.binary else 'non'}, baud={self.baud or 'illimité'}, "
+              f"ENC={self.encoder_hz or 'non'} Hz)")
+        return self.port
+
+    def stop(self):
+        self._running = False
+        for t in (self._thread, self._enc_thread):
+            if t is not None:
+                t.join(1.0)
+        self._thread = self._enc_thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    # ------------------------------------------------------------------
+    #  Boucle de réception
+    # ------------------------------------------------------------------
+    def _run(self):
+        while self._running:
+            data = read_available(self._master, 0.05)
+            if not data:
+                continue
+            if self.baud:
+                time.sleep(len(data) * 10.0 / self.baud)
+            self.bytes_in += len(data)
+            for kind, value in self.decoder.feed(data):
+                if kind == "line":
+                    self._handle_line(value)
+                elif self.binary:
+                    self._handle_frame(kind, value)
+
+    def write(self, data):
+        """Envoi Mega -> Raspberry (str = ligne texte, bytes = trame)."""
+        if isinstance(data, str):
+            data = (data + "\r\n").encode("ascii")
+        with self._lock:
+            if self._master is not None:
+                os.write(self._master, data)
+
+    def _apply_vel(self, vx, vy, w):
+        # Protection du firmware contre une combinaison instable
+        if abs(vx) < 0.1 and abs(vy) > 0.3 and abs(w) > 0.3:
+            w = 0.0
+        self.command = (vx, vy, w)
+        self.last_command_time = time.monotonic()
+        if self.on_vel is not None:
+            self.on_vel(vx, vy, w)
+
+    def _apply_mode(self, mode):
+        self.mode = mode
+        self.last_command_time = time.monotonic()
+        self.write("MODE " + mode)
+
+    # ------------------------------------------------------------------
+    #  Commandes (mêmes règles que Protocol.cpp)
+    # ------------------------------------------------------------------
+    def _handle_line(self, line):
+        parts = line.split()
+        if not parts:
+            return
+
+        if parts[0] == "VEL":
+            if len(parts) < 4:
+                return
+            try:
+                vx, vy, w = (float(p.replace(",", ".")) for p in parts[1:4])
+            except ValueError:
+                return
+            self.vel_text += 1
+            self._apply_vel(vx, vy, w)
+
+        elif parts[0] == "MODE":
+            if "MANUAL" in parts[1:]:
+                self._apply_mode("MANUAL")
+            elif "AI" in parts[1:]:
+                self._apply_mode("AI")
+
+        elif parts[0] == "PING":
+            self.pings += 1
+            self.last_command_time = time.monotonic()
+            bin_request = line == uart_codec.HANDSHAKE_REQUEST and self.binary
+            self.write(uart_codec.HANDSHAKE_REPLY if bin_request else "PONG")
+
+    def _handle_frame(self, frame_type, payload):
+        if frame_type == uart_codec.VEL and len(payload) == 12:
+            self.vel_binary += 1
+            self._apply_vel(*uart_codec.decode_vel(payload))
+
+        elif frame_type == uart_codec.MODE and len(payload) == 1:
+            self._apply_mode("AI" if payload[0] else "MANUAL")
+
+        elif frame_type == uart_codec.PING and len(payload) == 2:
+            self.pings += 1
+            self.last_command_time = time.monotonic()
+            self.write(uart_codec.encode_pong(uart_codec.decode_seq(payload)))
+
+    # ------------------------------------------------------------------
+    #  Encodeurs (mecanumUpdateEncoders) + watchdog (protocolWatchdog)
+    # ------------------------------------------------------------------
+    def _encoder_loop(self):
+        period = 1.0 / self.encoder_hz
+        last = time.monotonic()
+        next_t = last + period
+        while self._running:
+            time.sleep(max(0.0, next_t - time.monotonic()))
+            now = time.monotonic()
+            dt, last = now - last, now
+            next_t += period
+
+            if (self.last_command_time is not None and self.command != (0.0, 0.0, 0.0)
+                    and now - self.last_command_time > WATCHDOG_S):
+                self.command = (0.0, 0.0, 0.0)
+                self.watchdog_stops += 1
+
+            # Moteurs du premier ordre vers les consignes roues
+            k = 1.0 - math.exp(-dt / self.motor_tau) if self.motor_tau > 0 else 1.0
+            target = wheel_mix(*self.command)
+            self.wheel_speed = [v + (t - v) * k for v, t in zip(self.wheel_speed, target)]
+            self.ticks = [n + v * dt for n, v in zip(self.ticks, self.wheel_speed)]
+            self.pose = sim_integrate(*self.pose, *body_velocity(self.wheel_speed), dt)
+
+            self.write("ENC " + " ".join(str(int(n)) for n in self.ticks) + " "
+                       + " ".join(f"{v:.2f}" for v in self.wheel_speed))
+            self.enc_sent += 1
+
+    # ------------------------------------------------------------------
+    #  Monitoring
+    # ------------------------------------------------------------------
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "command": self.command,
+            "vel_text": self.vel_text,
+            "vel_binary": self.vel_binary,
+            "enc_sent": self.enc_sent,
+            "watchdog_stops": self.watchdog_stops,
+            "pose": tuple(round(v, 2) for v in self.pose),
+            "pings": self.pings,
+            "bytes_in": self.bytes_in,
+            "frames": self.decoder.frames,
+            "crc_errors": self.decoder.crc_errors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arduino Mega simulé sur pty")
+    parser.add_argument("--text-only", action="store_true", help="ancien firmware (pas de trames)")
+    parser.add_argument("--baud", type=int, default=None, help="débit simulé (ex. 115200)")
+    parser.add_argument("--encoder-hz", type=float, default=0.0, help="trames ENC (robot : 10)")
+    args = parser.parse_args()
+
+    emu = MegaEmulator(binary=not args.text_only, baud=args.baud, encoder_hz=args.encoder_hz)
+    emu.start()
+    try:
+        while True:
+            time.sleep(1.0)
+            print("[MEGA-EMU]", emu.stats())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emu.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+uart_codec.py
+-------------
+Protocole binaire compact Raspberry <-> Arduino Mega (optionnel).
+
+Trame :
+    0xA5 | TYPE | LEN | PAYLOAD (LEN octets) | CRC8
+    - CRC-8 (polynôme 0x07, init 0x00) calculé sur TYPE, LEN et PAYLOAD
+    - flottants : float32 little-endian (format natif de l'AVR)
+
+Types :
+    VEL  0x01  vx, vy, w        3 x float32   (16 octets au lieu de ~20-30)
+    MODE 0x02  0 = MANUAL, 1 = AI  uint8
+    PING 0x03  seq                 uint16
+    PONG 0x83  seq                 uint16     (réponse du Mega)
+
+Cohabitation avec le protocole texte : l'octet de synchro 0xA5 n'est pas
+de l'ASCII, le Mega (Protocol.cpp) et FrameDecoder démultiplexent donc
+trames et lignes sur le même flux. Les réponses texte (MODE ..., ENC ...)
+restent inchangées.
+
+Négociation : la Raspberry envoie la ligne texte "PING BIN" ; un firmware
+compatible répond "PONG BIN", un ancien firmware répond "PONG" (et on
+reste en texte).
+
+Usage :
+    from hardware import uart_codec
+    ser.write(uart_codec.encode_vel(0.5, 0.0, -0.2))
+    dec = uart_codec.FrameDecoder()
+    for kind, value in dec.feed(ser.read(64)):
+        ...     # ("line", "ENC ...") ou (uart_codec.PONG, b"...")
+"""
+
+import time
+import struct
+
+SYNC = 0xA5
+
+VEL = 0x01
+MODE = 0x02
+PING = 0x03
+PONG = 0x83
+
+MAX_PAYLOAD = 16
+MAX_LINE = 128
+
+HANDSHAKE_REQUEST = "PING BIN"
+HANDSHAKE_REPLY = "PONG BIN"
+
+_VEL = struct.Struct("<3f")
+_SEQ = struct.Struct("<H")
+_MODES = {"MANUAL": 0, "AI": 1}
+
+
+# ----------------------------------------------------------------------
+#  CRC-8 (polynôme 0x07)
+# ----------------------------------------------------------------------
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+_CRC8 = _crc8_table()
+
+
+def crc8(data, crc=0):
+    for b in data:
+        crc = _CRC8[crc ^ b]
+    return crc
+
+
+# ----------------------------------------------------------------------
+#  Encodage
+# ----------------------------------------------------------------------
+def encode_frame(frame_type, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"payload trop long ({len(payload)} > {MAX_PAYLOAD})")
+    body = bytes((frame_type, len(payload))) + payload
+    return bytes((SYNC,)) + body + bytes((crc8(body),))
+
+
+def encode_vel(vx, vy, w):
+    return encode_frame(VEL, _VEL.pack(vx, vy, w))
+
+
+def encode_mode(mode):
+    """mode : "MANUAL" ou "AI"."""
+    return encode_frame(MODE, bytes((_MODES[mode],)))
+
+
+def encode_ping(seq=0):
+    return encode_frame(PING, _SEQ.pack(seq & 0xFFFF))
+
+
+def encode_pong(seq=0):
+    return encode_frame(PONG, _SEQ.pack(seq & 0xFFFF))
+
+
+def decode_vel(payload):
+    return _VEL.unpack(payload)
+
+
+def decode_seq(payload):
+    return _SEQ.unpack(payload)[0]
+
+
+def line_to_frame(line):
+    """
+    Équivalent binaire d'une commande texte ("VEL ...", "MODE AI", "PING"),
+    ou None si la commande n'a pas de trame (elle reste alors en texte).
+    """
+    parts = line.split()
+    if not parts:
+        return None
+    try:
+        if parts[0] == "VEL" and len(parts) == 4:
+            return encode_vel(*(float(p) for p in parts[1:]))
+        if parts[0] == "MODE" and len(parts) == 2 and parts[1] in _MODES:
+            return encode_mode(parts[1])
+        if parts[0] == "PING" and len(parts) == 1:
+            return encode_ping()
+    except ValueError:
+        pass
+    return None
+
+
+# ----------------------------------------------------------------------
+#  Décodage (flux mixte trames / lignes texte)
+# ----------------------------------------------------------------------
+class FrameDecoder:
+    """
+    Décodeur incrémental : feed(octets) produit des tuples
+        ("line", str)          ligne texte complète
+        (type, payload)        trame binaire valide
+    Une trame au CRC faux (ou trop longue) est abandonnée et le décodeur
+    se resynchronise sur le prochain 0xA5.
+    """
+
+    def __init__(self):
+        self._line = bytearray()
+        self._frame = bytearray()
+        self._need = 0            # octets restants de la trame en cours
+        self.frames = 0
+        self.lines = 0
+        self.crc_errors = 0
+
+    def feed(self, data):
+        out = []
+        for b in data:
+            if self._frame:
+                self._frame.append(b)
+                if len(self._frame) == 3:               # SYNC TYPE LEN
+                    if b > MAX_PAYLOAD:
+                        self.crc_errors += 1
+                        self._frame.clear()
+                        continue
+                    self._need = b + 1                  # payload + CRC
+                    continue
+                if len(self._frame) > 3:
+                    self._need -= 1
+                    if self._need == 0:
+                        body = bytes(self._frame[1:-1])
+                        if crc8(body) == self._frame[-1]:
+                            self.frames += 1
+                            out.append((body[0], body[2:]))
+                        else:
+                            self.crc_errors += 1
+                        self._frame.clear()
+                continue
+
+            if b == SYNC:
+                self._frame.append(b)
+            elif b in (0x0A, 0x0D):
+                if self._line:
+                    self.lines += 1
+                    out.append(("line", self._line.decode("ascii", "replace").strip()))
+                    self._line.clear()
+            elif len(self._line) < MAX_LINE:
+                self._line.append(b)
+        return out
+
+
+# ----------------------------------------------------------------------
+#  Négociation
+# ----------------------------------------------------------------------
+def handshake(write_fn, read_fn, timeout=0.5):
+    """
+    Envoie "PING BIN" et attend la réponse.
+
+    write_fn(bytes) / read_fn() -> bytes (éventuellement vides, non
+    bloquant ou avec un court timeout) : port série brut.
+    Retourne True si le Mega accepte les trames binaires.
+    """
+    write_fn((HANDSHAKE_REQUEST + "\n").encode("ascii"))
+    decoder = FrameDecoder()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for kind, value in decoder.feed(read_fn()):
+            if kind != "line":
+                continue
+            if value == HANDSHAKE_REPLY:
+                return True
+            if value == "PONG":
+                return False            # ancien firmware : texte seulement
+    return False
@@ -0,0 +1,325 @@
+"""
+uart_link.py
+------------
+Transport UART non bloquant vers l'Arduino Mega.
+
+Les coroutines (ws_ctrl, RobotEnv en mode réel) ne font plus d'écriture
+série sur l'event loop : elles déposent leurs commandes ici, et un thread
+d'écriture unique est le seul à appeler hardware.uart.send_to_mega.
+
+- VEL : dernière valeur gagnante (une seule commande en attente, les
+  précédentes sont remplacées et comptées `vel_coalesced`), débit plafonné
+  à `max_vel_hz`, format compact à précision fixe ("VEL 0.5 -0.25 0")
+- Commandes prioritaires (MODE, STOP) : passent avant tout le reste ;
+  STOP annule la VEL en attente
+- Autres commandes (PING, ...) : file FIFO
+- Trames binaires (uart_codec.py) : après la négociation "PING BIN" ->
+  "PONG BIN" faite par hardware.uart sur son port, enable_binary(write)
+  fait passer VEL / MODE / STOP / PING en trames de taille fixe (VEL :
+  16 octets, float32 exacts) ; les autres commandes restent en texte
+- Traces de latence (telemetry/tracing.py) : trace=... suit la commande
+  jusqu'à l'écriture série
+- Métriques (telemetry/metrics.py) : uart_tx_bytes_total,
+  uart_commands_total{format}, uart_vel_coalesced_total,
+  uart_write_errors_total, uart_queue_seconds, uart_write_seconds
+- Cadence VEL : CONFIG["uart_max_vel_hz"] (config.apply_to_uart, à chaud)
+- stats() : octets/s, commandes écrites, VEL fusionnées, latence
+  dépôt -> fin d'écriture (p50 / p99)
+
+Usage :
+    from hardware import uart_link
+    uart_link.send_vel(vx, vy, w)
+    uart_link.send_command("MODE AI", priority=True)
+    uart_link.send_stop()
+"""
+
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+from ai import config as cfg
+from hardware import uart_codec
+from telemetry import tracing, metrics
+
+MAX_VEL_HZ = 50.0      # défaut ; l'instance partagée lit CONFIG["uart_max_vel_hz"]
+VEL_DECIMALS = 3
+
+TX_BYTES = metrics.counter("uart_tx_bytes_total", "Octets écrits vers le Mega")
+COMMANDS = metrics.counter("uart_commands_total", "Commandes écrites vers le Mega", ("format",))
+COALESCED = metrics.counter("uart_vel_coalesced_total", "VEL remplacées avant écriture")
+ERRORS = metrics.counter("uart_write_errors_total", "Erreurs d'écriture série")
+QUEUE_TIME = metrics.histogram("uart_queue_seconds", "Dépôt -> début d'écriture")
+WRITE_TIME = metrics.histogram("uart_write_seconds", "Durée d'écriture série")
+
+
+def format_float(x, decimals=VEL_DECIMALS):
+    """Précision fixe sans zéros inutiles : 0.5, -0.25, 0, 1."""
+    s = f"{x:.{decimals}f}".rstrip("0").rstrip(".")
+    return "0" if s in ("", "-0") else s
+
+
+def format_vel(vx, vy, w, decimals=VEL_DECIMALS):
+    return f"VEL {format_float(vx, decimals)} {format_float(vy, decimals)} {format_float(w, decimals)}"
+
+
+class UartLink:
+    """
+    write_fn : fonction d'écriture bloquante (hardware.uart.send_to_mega),
+               appelée uniquement depuis le thread d'écriture.
+    binary_write_fn : écriture d'octets bruts (trames) ; None = texte seul.
+    """
+
+    def __init__(self, write_fn, max_vel_hz=MAX_VEL_HZ, decimals=VEL_DECIMALS, window=500,
+                 binary_write_fn=None):
+        self.write_fn = write_fn
+        self.binary_write_fn = binary_write_fn
+        self.max_vel_hz = max_vel_hz
+        self.decimals = decimals
+
+        self._cond = threading.Condition()
+        self._priority = deque()
+        self._queue = deque()
+        self._vel = None                 # ((vx, vy, w), t_dépôt, trace)
+        self._next_vel = 0.0
+        self._running = False
+        self._thread = None
+
+        # Compteurs
+        self.commands = 0
+        self.bytes = 0
+        self.vel_coalesced = 0
+        self.errors = 0
+        self.frames = 0
+        self._m_text = COMMANDS.labels("text")
+        self._m_binary = COMMANDS.labels("binary")
+        self._latency = deque(maxlen=window)
+        # Débit : fenêtre glissante d'au moins 1 s, recalculée dans stats()
+        self._rate_t0 = time.monotonic()
+        self._rate_bytes = 0     # valeur de self.bytes en début de fenêtre
+        self.bytes_per_sec = 0.0
+
+    # ------------------------------------------------------------------
+    #  Démarrage / arrêt
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="uart-writer", daemon=True)
+        self._thread.start()
+        print("[UART] Thread d'écriture démarré")
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def set_max_vel_hz(self, hz):
+        """Nouvelle cadence VEL maximale (0 = sans limite), effet immédiat."""
+        hz = max(0.0, float(hz))
+        with self._cond:
+            self.max_vel_hz = hz
+            limit = time.monotonic() + (1.0 / hz if hz > 0 else 0.0)
+            self._next_vel = min(self._next_vel, limit)
+            self._cond.notify()
+
+    def enable_binary(self, binary_write_fn):
+        """À appeler une fois la négociation réussie (uart_codec.handshake)."""
+        self.binary_write_fn = binary_write_fn
+        print("[UART] Trames binaires activées")
+
+    def disable_binary(self):
+        self.binary_write_fn = None
+
+    # ------------------------------------------------------------------
+    #  API (non bloquante, tout thread / coroutine)
+    # ------------------------------------------------------------------
+    def _item(self, msg, trace):
+        t = time.perf_counter()
+        if trace is not None:
+            tracing.enqueued(trace, t)
+        return msg, t, trace
+
+    def _drop_vel(self):
+        """Abandonne la VEL en attente (appelé sous self._cond)."""
+        self.vel_coalesced += 1
+        COALESCED.inc()
+        if self._vel[2] is not None:
+            tracing.dropped(self._vel[2])
+        self._vel = None
+
+    def send_vel(self, vx, vy, w, trace=None):
+        with self._cond:
+            if self._vel is not None:
+                self._drop_vel()
+            self._vel = self._item((float(vx), float(vy), float(w)), trace)
+            self._cond.notify()
+
+    def send_command(self, line, priority=False, trace=None):
+        with self._cond:
+            (self._priority if priority else self._queue).append(self._item(line, trace))
+            self._cond.notify()
+
+    def send_stop(self, trace=None):
+        """Arrêt moteurs prioritaire : la VEL en attente est abandonnée."""
+        with self._cond:
+            if self._vel is not None:
+                self._drop_vel()
+            self._priority.append(self._item((0.0, 0.0, 0.0), trace))
+            self._cond.notify()
+
+    # ------------------------------------------------------------------
+    #  Thread d'écriture
+    # ------------------------------------------------------------------
+    def _next_item(self):
+        """Prochaine commande à écrire, ou délai d'attente (s) / None."""
+        if self._priority:
+            return self._priority.popleft(), None
+        if self._queue:
+            return self._queue.popleft(), None
+        if self._vel is not None:
+            wait = self._next_vel - time.monotonic()
+            if wait <= 0:
+                item, self._vel = self._vel, None
+                if self.max_vel_hz > 0:
+                    self._next_vel = time.monotonic() + 1.0 / self.max_vel_hz
+                return item, None
+            return None, wait
+        return None, None
+
+    def _encode(self, msg):
+        """Commande déposée -> trame (bytes) ou ligne texte (str)."""
+        binary = self.binary_write_fn is not None
+        if isinstance(msg, tuple):                      # VEL
+            if binary:
+                return uart_codec.encode_vel(*msg)
+            return format_vel(*msg, self.decimals)
+        if binary:
+            frame = uart_codec.line_to_frame(msg)
+            if frame is not None:
+                return frame
+        return msg
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running:
+                        return
+                    item, wait = self._next_item()
+                    if item is not None:
+                        break
+                    self._cond.wait(wait)
+
+            msg, t_enqueue, trace = item
+            t_start = time.perf_counter()
+            try:
+                data = self._encode(msg)
+                if isinstance(data, bytes):
+                    self.binary_write_fn(data)
+                    self.frames += 1
+                    n = len(data)
+                    self._m_binary.inc()
+                else:
+                    self.write_fn(data)
+                    n = len(data) + 1    # + fin de ligne
+                    self._m_text.inc()
+            except Exception as e:
+                self.errors += 1
+                ERRORS.inc()
+                print("[UART] ERREUR écriture :", e)
+                continue
+
+            t_end = time.perf_counter()
+            self._latency.append(t_end - t_enqueue)
+            QUEUE_TIME.observe(t_start - t_enqueue)
+            WRITE_TIME.observe(t_end - t_start)
+            TX_BYTES.inc(n)
+            if trace is not None:
+                tracing.written(trace, t_start, t_end)
+            self.commands += 1
+            self.bytes += n
+
+    # ------------------------------------------------------------------
+    #  Monitoring
+    # ------------------------------------------------------------------
+    def _update_rate(self):
+        """
+        Débit moyen depuis le début de la fenêtre (≥ 1 s). Calculé à la
+        lecture et non après chaque écriture : retombe à 0 quand la liaison
+        est inactive.
+        """
+        now = time.monotonic()
+        elapsed = now - self._rate_t0
+        if elapsed >= 1.0:
+            total = self.bytes
+            self.bytes_per_sec = (total - self._rate_bytes) / elapsed
+            self._rate_t0 = now
+            self._rate_bytes = total
+        return self.bytes_per_sec
+
+    def stats(self):
+        if self._latency:
+            p50, p99 = np.percentile(np.fromiter(self._latency, dtype=np.float64), (50, 99))
+        else:
+            p50 = p99 = 0.0
+        return {
+            "uart_commands": int(self.commands),
+            "uart_bytes": int(self.bytes),
+            "uart_bytes_per_sec": round(float(self._update_rate()), 1),
+            "uart_vel_coalesced": int(self.vel_coalesced),
+            "uart_errors": int(self.errors),
+            "uart_binary": self.binary_write_fn is not None,
+            "uart_frames": int(self.frames),
+            "uart_pending": len(self._priority) + len(self._queue) + (self._vel is not None),
+            "uart_latency_p50_ms": round(float(p50) * 1000.0, 2),
+            "uart_latency_p99_ms": round(float(p99) * 1000.0, 2),
+        }
+
+
+# ----------------------------------------------------------------------
+#  Instance partagée (créée au premier envoi)
+# ----------------------------------------------------------------------
+_link = None
+_link_lock = threading.Lock()
+
+
+def get_link():
+    global _link
+    if _link is None:
+        with _link_lock:
+            if _link is None:
+                from hardware.uart import send_to_mega
+                link = UartLink(send_to_mega,
+                                max_vel_hz=float(cfg.CONFIG["uart_max_vel_hz"]))
+                link.start()
+                _link = link
+    return _link
+
+
+def set_max_vel_hz(hz):
+    """Cadence VEL maximale (config.apply_to_uart), appliquée à chaud."""
+    if _link is not None:
+        _link.set_max_vel_hz(hz)
+
+
+def link_stats():
+    """Compteurs du transport, None s'il n'a pas encore servi."""
+    return _link.stats() if _link is not None else None
+
+
+def send_vel(vx, vy, w, trace=None):
+    get_link().send_vel(vx, vy, w, trace)
+
+
+def send_command(line, priority=False, trace=None):
+    get_link().send_command(line, priority, trace)
+
+
+def send_stop(trace=None):
+    get_link().send_stop(trace)
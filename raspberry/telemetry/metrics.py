@@ -0,0 +1,315 @@
+"""
+metrics.py
+----------
+Registre de métriques du serveur (compteurs, jauges, histogrammes),
+exporté au format texte Prometheus (metrics_http.py, port 8081) et sur
+/ws-metrics (ws/ws_metrics.py).
+
+Enregistrement sans verrou, laissé actif en production :
+- Counter / Histogram : une cellule par thread écrivain (threading.local).
+  Chaque cellule n'a qu'un écrivain, donc aucune mise à jour perdue ; la
+  lecture (scrape, 1 Hz) additionne les cellules
+- Gauge : simple affectation, ou fonction évaluée à la lecture
+  (set_function) pour une valeur déjà tenue ailleurs (taille du replay
+  buffer, clients connectés)
+Le verrou du registre ne sert qu'aux créations (métrique, étiquette,
+cellule d'un nouveau thread).
+
+Usage :
+    from telemetry import metrics
+    SENT = metrics.counter("ws_messages_sent_total", "Messages envoyés", ("topic",))
+    SENT.labels("enc").inc()
+    TICK = metrics.histogram("ai_tick_seconds", "Durée d'un tick IA")
+    TICK.observe(0.012)
+    metrics.gauge("replay_buffer_size", "Transitions").set_function(lambda: buf.size)
+    text = metrics.render_prometheus()
+"""
+
+import math
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Secondes : de la sous-milliseconde (UART, hub) à la seconde (tick IA lent)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_lock = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+#  Cellules par thread
+# ----------------------------------------------------------------------
+class _Cells:
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._all = []
+
+    def get(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._factory()
+            with _lock:
+                self._all.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def all(self):
+        return list(self._all)
+
+
+# ----------------------------------------------------------------------
+#  Types de métriques (une instance par jeu d'étiquettes)
+# ----------------------------------------------------------------------
+class Counter:
+
+    def __init__(self):
+        self._cells = _Cells(lambda: [0])
+        self._fn = None
+
+    def inc(self, n=1):
+        self._cells.get()[0] += n
+
+    def set_function(self, fn):
+        """Compteur tenu ailleurs (valeur lue à chaque export)."""
+        self._fn = fn
+
+    def value(self):
+        if self._fn is not None:
+            return _call(self._fn)
+        return sum(c[0] for c in self._cells.all())
+
+
+class Gauge:
+
+    def __init__(self):
+        self._value = 0.0
+        self._fn = None
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, fn):
+        self._fn = fn
+
+    def value(self):
+        if self._fn is not None:
+            return _call(self._fn)
+        return self._value
+
+
+class Histogram:
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        n = len(self.buckets) + 1                   # + intervalle +Inf
+        self._cells = _Cells(lambda: [0] * n + [0.0])   # comptes..., somme
+
+    def observe(self, value):
+        cell = self._cells.get()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+    def value(self):
+        """(comptes par intervalle, somme) tous threads confondus."""
+        n = len(self.buckets) + 1
+        counts = [0] * n
+        total = 0.0
+        for cell in self._cells.all():
+            for i in range(n):
+                counts[i] += cell[i]
+            total += cell[-1]
+        return counts, total
+
+    def quantile(self, q, counts=None):
+        """Estimation par interpolation dans l'intervalle (histogram_quantile)."""
+        if counts is None:
+            counts, _ = self.value()
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c > 0:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                return lo + (self.buckets[i] - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+def _call(fn):
+    try:
+        return fn()
+    except Exception:
+        return math.nan
+
+
+# ----------------------------------------------------------------------
+#  Famille (nom + étiquettes)
+# ----------------------------------------------------------------------
+class Metric:
+
+    def __init__(self, name, help_text, kind, labelnames, factory):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._default = None
+        if not self.labelnames:
+            self._default = self._children[()] = factory()
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} : étiquettes attendues {self.labelnames}")
+            with _lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def children(self):
+        return list(self._children.items())
+
+    # Métrique sans étiquette : accès direct
+    def inc(self, n=1):
+        self._default.inc(n)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, fn):
+        self._default.set_function(fn)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def value(self):
+        return self._default.value()
+
+
+_metrics = {}
+
+
+def _register(name, help_text, kind, labelnames, factory):
+    metric = _metrics.get(name)
+    if metric is None:
+        with _lock:
+            metric = _metrics.get(name)
+            if metric is None:
+                metric = Metric(name, help_text, kind, labelnames, factory)
+                _metrics[name] = metric
+    if metric.kind != kind or metric.labelnames != tuple(labelnames):
+        raise ValueError(f"Métrique {name} déjà déclarée ({metric.kind}, {metric.labelnames})")
+    return metric
+
+
+def counter(name, help_text="", labels=()):
+    return _register(name, help_text, "counter", labels, Counter)
+
+
+def gauge(name, help_text="", labels=()):
+    return _register(name, help_text, "gauge", labels, Gauge)
+
+
+def histogram(name, help_text="", labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(name, help_text, "histogram", labels, lambda: Histogram(buckets))
+
+
+def families():
+    return list(_metrics.values())
+
+
+# ----------------------------------------------------------------------
+#  Export
+# ----------------------------------------------------------------------
+def _fmt(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render_prometheus():
+    """Toutes les métriques au format texte Prometheus (version 0.0.4)."""
+    lines = []
+    for name, metric in sorted(list(_metrics.items())):
+        lines.append(f"# HELP {name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for key, child in metric.children():
+            if metric.kind != "histogram":
+                lines.append(f"{name}{_label_str(metric.labelnames, key)} {_fmt(child.value())}")
+                continue
+            counts, total = child.value()
+            cumulative = 0
+            for le, c in zip(child.buckets + (math.inf,), counts):
+                cumulative += c
+                label = _label_str(metric.labelnames, key, f'le="{_fmt(le)}"')
+                lines.append(f"{name}_bucket{label} {cumulative}")
+            labels = _label_str(metric.labelnames, key)
+            lines.append(f"{name}_sum{labels} {_fmt(total)}")
+            lines.append(f"{name}_count{labels} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """
+    Valeurs courantes (dict JSON) :
+        compteur / jauge : valeur, ou {étiquette: valeur}
+        histogramme      : {"count", "sum", "p50", "p95", "p99"} (estimés)
+    """
+    out = {}
+    for name, metric in sorted(list(_metrics.items())):
+        values = {}
+        for key, child in metric.children():
+            if metric.kind == "histogram":
+                counts, total = child.value()
+                v = {"count": sum(counts), "sum": total}
+                for q in (0.5, 0.95, 0.99):
+                    v[f"p{int(q * 100)}"] = child.quantile(q, counts)
+            else:
+                v = child.value()
+                if isinstance(v, float) and math.isnan(v):
+                    v = None
+            values[",".join(key)] = v
+        out[name] = values[""] if not metric.labelnames and "" in values else values
+    return out
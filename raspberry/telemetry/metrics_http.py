@@ -0,0 +1,53 @@
+"""
+metrics_http.py
+---------------
+Endpoint Prometheus du registre telemetry/metrics.py, à côté du serveur
+HTTP cockpit (8080) :
+
+    http://<ip_du_pi>:8081/metrics
+
+Serveur HTTP minimal (bibliothèque standard) dans un thread démon : un
+scrape ne passe jamais par l'event loop des WebSockets.
+
+Exemple prometheus.yml :
+    scrape_configs:
+      - job_name: axisone
+        static_configs:
+          - targets: ["<ip_du_pi>:8081"]
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from telemetry import metrics
+
+METRICS_PORT = 8081
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SCRAPES = metrics.counter("metrics_scrapes_total", "Requêtes /metrics servies")
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        SCRAPES.inc()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass            # pas une ligne journald par scrape
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"[METRICS] Prometheus sur http://{host}:{port}/metrics")
+    return server
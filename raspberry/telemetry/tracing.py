@@ -0,0 +1,210 @@
+"""
+tracing.py
+----------
+Traces de latence de bout en bout, commande par commande.
+
+Chemin commande (une Trace par OMNI / STOP / MODE reçu sur /ws-ctrl, ou
+par tick IA) :
+    <origine>.recv        réception (ws_ctrl) ou début du tick IA ->
+                          dépôt dans uart_link
+    <origine>.uart_queue  dépôt -> prise par le thread d'écriture (attente,
+                          débit VEL plafonné)
+    <origine>.uart_write  durée de send_to_mega
+    <origine>.mega_ack    fin d'écriture -> première ligne reçue du Mega
+                          (écho MODE, ENC ; appel mega_line() par le lecteur
+                          série)
+    <origine>.enc_echo    fin d'écriture -> première diffusion ENC
+                          (ws_enc.broadcast_enc)
+    <origine>.total       réception -> première diffusion ENC
+Toutes les commandes écrites depuis la dernière trame ENC sont closes par
+la suivante. Une VEL remplacée avant écriture (uart_link, dernière valeur
+gagnante) n'a pas de suite : elle est comptée dans "coalesced" (total) et
+"coalesced_by_origin", ainsi que dans command_coalesced_total{origin}.
+
+Chemin IA (spans par tick, train_rl / robot_env) :
+    ai.select_action, ai.env_step, ai.radar
+
+Chaque étape garde ses WINDOW dernières durées : stats() donne p50 / p95 /
+p99 glissants (ms), diffusés sur /ws-sys ("trace"). La durée totale est
+aussi cumulée dans l'histogramme command_latency_seconds{origin}
+(telemetry/metrics.py, export Prometheus).
+
+Usage :
+    trace = tracing.start("ctrl", client_id, conn)
+    uart_link.send_vel(vx, vy, w, trace=trace)
+    with tracing.span("ai.env_step"):
+        ...
+"""
+
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from telemetry import metrics
+
+WINDOW = 512
+MAX_PENDING = 64        # commandes écrites en attente d'ENC (Mega muet)
+ENABLED = True
+
+LATENCY = metrics.histogram("command_latency_seconds",
+                            "Réception commande -> diffusion ENC", ("origin",))
+COALESCED = metrics.counter("command_coalesced_total",
+                            "VEL remplacées avant écriture, par origine", ("origin",))
+
+
+# ----------------------------------------------------------------------
+#  Durées par étape (fenêtre glissante)
+# ----------------------------------------------------------------------
+class HopStats:
+
+    __slots__ = ("samples", "count")
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, dt):
+        self.samples.append(dt)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count}
+        ms = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000.0
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        return {
+            "count": self.count,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(ms.max()), 3),
+        }
+
+
+_hops = {}
+coalesced = 0
+_coalesced_by_origin = {}
+
+
+def record(hop, dt):
+    stats = _hops.get(hop)
+    if stats is None:
+        stats = _hops.setdefault(hop, HopStats())
+    stats.add(dt)
+
+
+@contextmanager
+def span(hop):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(hop, time.perf_counter() - t0)
+
+
+# ----------------------------------------------------------------------
+#  Trace d'une commande (traverse event loop -> thread UART -> lecteur)
+# ----------------------------------------------------------------------
+class Trace:
+
+    __slots__ = ("id", "origin", "client_id", "conn", "t_recv", "t_enqueue", "t_written",
+                 "acked")
+
+    def __init__(self, trace_id, origin, client_id=None, conn=None):
+        self.id = trace_id
+        self.origin = origin
+        self.client_id = client_id      # seq côté client (cockpit)
+        self.conn = conn                # onglet cockpit d'origine
+        self.t_recv = time.perf_counter()
+        self.t_enqueue = None
+        self.t_written = None
+        self.acked = False
+
+
+_ids = itertools.count(1)
+_pending = deque(maxlen=MAX_PENDING)   # écrites, en attente d'ENC
+_pending_lock = threading.Lock()
+
+
+def start(origin="ctrl", client_id=None, conn=None):
+    """Nouvelle trace (None si le traçage est désactivé)."""
+    if not ENABLED:
+        return None
+    return Trace(next(_ids), origin, client_id, conn)
+
+
+def enqueued(trace, t):
+    """Dépôt dans uart_link (appelé par UartLink)."""
+    trace.t_enqueue = t
+
+
+def dropped(trace):
+    """VEL remplacée par une plus récente avant écriture : comptée par origine."""
+    global coalesced
+    coalesced += 1
+    o = trace.origin
+    _coalesced_by_origin[o] = _coalesced_by_origin.get(o, 0) + 1
+    COALESCED.labels(o).inc()
+
+
+def written(trace, t_start, t_end):
+    """Écriture série terminée (thread d'écriture UART)."""
+    o = trace.origin
+    record(o + ".recv", trace.t_enqueue - trace.t_recv)
+    record(o + ".uart_queue", t_start - trace.t_enqueue)
+    record(o + ".uart_write", t_end - t_start)
+    trace.t_written = t_end
+    with _pending_lock:
+        _pending.append(trace)
+
+
+def mega_line():
+    """Ligne reçue du Mega (lecteur série) : acquitte les commandes écrites."""
+    if not _pending:
+        return
+    now = time.perf_counter()
+    with _pending_lock:
+        for trace in _pending:
+            if not trace.acked:
+                trace.acked = True
+                record(trace.origin + ".mega_ack", now - trace.t_written)
+
+
+def enc_broadcast():
+    """
+    Diffusion ENC (ws_enc) : clôt les commandes en attente.
+    Retourne les traces closes, de la plus ancienne à la plus récente.
+    """
+    if not _pending:
+        return []
+    now = time.perf_counter()
+    with _pending_lock:
+        traces = list(_pending)
+        _pending.clear()
+    for trace in traces:
+        record(trace.origin + ".enc_echo", now - trace.t_written)
+        record(trace.origin + ".total", now - trace.t_recv)
+        LATENCY.labels(trace.origin).observe(now - trace.t_recv)
+    return traces
+
+
+# ----------------------------------------------------------------------
+#  Consultation
+# ----------------------------------------------------------------------
+def stats():
+    out = {hop: s.summary() for hop, s in sorted(list(_hops.items()))}
+    out["coalesced"] = coalesced
+    out["coalesced_by_origin"] = dict(_coalesced_by_origin)
+    return out
+
+
+def reset():
+    global coalesced
+    _hops.clear()
+    _pending.clear()
+    _coalesced_by_origin.clear()
+    coalesced = 0
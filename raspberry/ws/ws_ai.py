@@ -5,18 +5,18 @@ WebSocket /ws-ai
 Diffusion des informations IA (TD3 Live) vers le cockpit.
 
 Ce module ne génère aucune donnée IA.
-Il se contente de diffuser ce que ai_loop.py lui envoie.
+Il se contente de diffuser ce que ai_loop.py lui envoie (ws_hub.py).
 """
 
-import json
+from ws.ws_hub import get_topic
 
-# Liste des clients IA connectés
-ia_clients = set()
+# Flux IA (une file bornée par client)
+ai_topic = get_topic("ai", maxlen=32)
 
 
-def get_ia_clients():
-    """Permet à ai_loop.py de récupérer la liste des clients IA."""
-    return ia_clients
+def publish_ai(info):
+    """Appelé par ai_loop.py à chaque pas : sérialisé une fois, non bloquant."""
+    ai_topic.publish(info)
 
 
 # ----------------------------------------------------------------------
@@ -24,16 +24,13 @@ def get_ia_clients():
 # ----------------------------------------------------------------------
 async def ws_ai_handler(websocket):
     print("[WS-AI] Client IA connecté")
-    ia_clients.add(websocket)
 
     try:
-        async for _ in websocket:
-            # Le client IA ne parle pas, il ne fait que recevoir.
-            pass
+        # Le client IA ne parle pas, il ne fait que recevoir.
+        await ai_topic.serve(websocket)
 
     except Exception as e:
         print("[WS-AI] ERREUR :", e)
 
     finally:
-        ia_clients.discard(websocket)
         print("[WS-AI] Client IA déconnecté")
@@ -15,10 +15,21 @@ Ce module :
     - renvoie la configuration complète au cockpit
 """
 
+import sys
 import json
 from ai import config as cfg
-from ai.train_rl import get_agent
-from ai.ai_loop import get_env_instance
+
+
+def _ai_targets():
+    """
+    Agent et environnement courants, sans importer la pile IA (torch)
+    si elle n'a pas encore été chargée par MODE AI.
+    """
+    train_rl = sys.modules.get("ai.train_rl")
+    ai_loop = sys.modules.get("ai.ai_loop")
+    agent = train_rl.get_agent() if train_rl is not None else None
+    env = ai_loop.get_env_instance() if ai_loop is not None else None
+    return agent, env
 
 
 # ----------------------------------------------------------------------
@@ -67,11 +78,11 @@ async def ws_ai_config_handler(websocket):
                 reload(cfg)  # recharge config.py (valeurs par défaut)
 
                 # Appliquer aux modules
-                agent = get_agent()
-                env = get_env_instance()
+                agent, env = _ai_targets()
 
                 cfg.apply_to_agent(agent)
                 cfg.apply_to_radar()
+                cfg.apply_to_uart()
                 cfg.apply_to_env(env)
 
                 await send_full_config(websocket)
@@ -88,11 +99,11 @@ async def ws_ai_config_handler(websocket):
                 cfg.update_config(new_cfg)
 
                 # Application dynamique
-                agent = get_agent()
-                env = get_env_instance()
+                agent, env = _ai_targets()
 
                 cfg.apply_to_agent(agent)
                 cfg.apply_to_radar()
+                cfg.apply_to_uart()
                 cfg.apply_to_env(env)
 
                 # Confirmation au cockpit
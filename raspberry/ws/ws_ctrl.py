@@ -5,7 +5,7 @@ WebSocket /ws-ctrl
 Gestion des commandes cockpit → robot.
 
 Commandes supportées :
-    OMNI vx vy w
+    OMNI vx vy w [seq tab]
     STOP
     MODE MANUAL
     MODE AI
@@ -13,12 +13,42 @@ Commandes supportées :
     LOAD_AI
     REBOOT
     SHUTDOWN
+
+Chaque commande moteur ouvre une trace de latence (telemetry/tracing.py).
+`seq` et `tab` (optionnels, envoyés par le cockpit : numéro de commande
+et identifiant de l'onglet) sont renvoyés dans le premier message /ws-enc
+qui suit l'écriture ("acks": {tab: seq}) : chaque onglet mesure ainsi la
+latence joystick -> encodeur de ses propres commandes, avec sa propre
+horloge, en ignorant celles des autres.
 """
 
+import sys
 import json
-from hardware.uart import send_to_mega
-from ai.ai_loop import start_ai, stop_ai
-from ai.train_rl import init_agent, get_agent
+import asyncio
+import importlib
+from hardware import uart_link
+from telemetry import tracing, metrics
+
+MAX_TAB_LEN = 16         # identifiant d'onglet cockpit (OMNI ... seq tab)
+
+COMMANDS = metrics.counter("ws_ctrl_commands_total", "Commandes cockpit reçues", ("cmd",))
+# Étiquette bornée : nom de commande connu, sinon "other"
+_COMMAND_NAMES = {"OMNI", "STOP", "MODE", "SAVE_AI", "LOAD_AI", "REBOOT", "SHUTDOWN"}
+
+
+# ----------------------------------------------------------------------
+#  Accès paresseux à la pile IA (torch chargé au premier MODE AI)
+# ----------------------------------------------------------------------
+async def _load_ai(module_name):
+    """Importe ai.ai_loop / ai.train_rl dans un thread (import de torch)."""
+    return await asyncio.to_thread(importlib.import_module, module_name)
+
+
+async def _stop_ai():
+    """Arrête l'IA si elle a déjà été chargée (sinon rien à arrêter)."""
+    ai_loop = sys.modules.get("ai.ai_loop")
+    if ai_loop is not None:
+        await ai_loop.stop_ai()
 
 
 # ----------------------------------------------------------------------
@@ -29,72 +59,87 @@ async def ws_ctrl_handler(websocket):
 
     try:
         async for msg in websocket:
+            trace = tracing.start("ctrl")
             msg = msg.strip()
             print("[WS-CTRL] Reçu :", msg)
+            name = msg.split(" ", 1)[0]
+            COMMANDS.labels(name if name in _COMMAND_NAMES else "other").inc()
 
             # ----------------------------------------------------------
             #  Commande OMNI vx vy w
             # ----------------------------------------------------------
             if msg.startswith("OMNI"):
+                parts = msg.split()
                 try:
-                    _, sx, sy, sw = msg.split()
+                    _, sx, sy, sw = parts[:4]
                     vx, vy, w = float(sx), float(sy), float(sw)
-                except:
+                except (ValueError, IndexError):
                     print("[WS-CTRL] Commande OMNI invalide :", msg)
                     continue
 
+                # seq / tab invalides : commande appliquée, sans ack cockpit
+                if trace is not None and len(parts) >= 6:
+                    try:
+                        trace.client_id = int(parts[4])
+                        trace.conn = parts[5][:MAX_TAB_LEN]
+                    except ValueError:
+                        print("[WS-CTRL] seq OMNI invalide :", parts[4])
+
                 # Clamp sécurité
                 vx = max(-1, min(1, vx))
                 vy = max(-1, min(1, vy))
                 w  = max(-1, min(1, w))
 
-                send_to_mega(f"VEL {vx} {vy} {w}")
+                # Dernière valeur gagnante, écrite par le thread UART
+                uart_link.send_vel(vx, vy, w, trace=trace)
                 continue
 
             # ----------------------------------------------------------
             #  STOP
             # ----------------------------------------------------------
             if msg == "STOP":
-                await stop_ai()
-                send_to_mega("VEL 0 0 0")
+                # Arrêt moteurs d'abord : l'arrêt de l'IA peut prendre
+                # plusieurs secondes (threads, checkpoint)
+                uart_link.send_stop(trace=trace)
+                await _stop_ai()
                 continue
 
             # ----------------------------------------------------------
             #  MODE MANUAL
             # ----------------------------------------------------------
             if msg == "MODE MANUAL":
-                await stop_ai()
-                send_to_mega("MODE MANUAL")
+                uart_link.send_command("MODE MANUAL", priority=True, trace=trace)
+                await _stop_ai()
                 continue
 
             # ----------------------------------------------------------
             #  MODE AI
             # ----------------------------------------------------------
             if msg == "MODE AI":
-                send_to_mega("MODE AI")
-                await start_ai()
+                uart_link.send_command("MODE AI", priority=True, trace=trace)
+                ai_loop = await _load_ai("ai.ai_loop")
+                await ai_loop.start_ai()
                 continue
 
             # ----------------------------------------------------------
             #  SAVE IA (TD3)
             # ----------------------------------------------------------
             if msg == "SAVE_AI":
-                await init_agent()
-                ag = get_agent()
-                if ag:
-                    ag.save_full("data/agent_td3_full.pth")
-                    print("[WS-CTRL] Modèle TD3 sauvegardé.")
+                train_rl = await _load_ai("ai.train_rl")
+                await train_rl.init_agent()
+                train_rl.save_checkpoint()
+                print("[WS-CTRL] Sauvegarde TD3 demandée.")
                 continue
 
             # ----------------------------------------------------------
             #  LOAD IA (TD3)
             # ----------------------------------------------------------
             if msg == "LOAD_AI":
-                await init_agent()
-                ag = get_agent()
-                if ag:
-                    ag.load_full("data/agent_td3_full.pth")
-                    print("[WS-CTRL] Modèle TD3 chargé.")
+                train_rl = await _load_ai("ai.train_rl")
+                await train_rl.init_agent()
+                path = await train_rl.load_checkpoint()
+                if path:
+                    print(f"[WS-CTRL] Modèle TD3 chargé ({path}).")
                 continue
 
             # ----------------------------------------------------------
@@ -9,12 +9,25 @@ Les données sont mises à jour par hardware/uart.py :
         "ticks": [...],
         "speed": [...]
     }
+
+Le premier message qui suit l'écriture d'une commande tracée
+(telemetry/tracing.py) porte en plus :
+    "trace": {
+        "id": <id serveur de la plus récente>,
+        "server_ms": <float>,
+        "acks": {<onglet cockpit>: <dernier seq OMNI confirmé>, ...}
+    }
+Le message est diffusé à tous les onglets : chacun ne lit que sa propre
+entrée de "acks" (commandes IA : aucune entrée).
 """
 
-import json
+import time
 
-# Liste des clients encodeurs
-enc_clients = set()
+from ws.ws_hub import get_topic
+from telemetry import tracing
+
+# Flux encodeurs (une file bornée par client, voir ws_hub.py)
+enc_topic = get_topic("enc", maxlen=32)
 
 
 # ----------------------------------------------------------------------
@@ -24,15 +37,21 @@ async def broadcast_enc(data):
     """
     Diffuse les données encodeurs à tous les clients connectés.
     Appelé par hardware/uart.py via asyncio.run_coroutine_threadsafe().
+    Ne bloque jamais : les clients lents perdent leurs plus vieux messages.
     """
-    msg = json.dumps(data)
-
-    for ws in list(enc_clients):
-        try:
-            await ws.send(msg)
-        except:
-            enc_clients.discard(ws)
-            print("[WS-ENC] Client retiré (erreur d’envoi)")
+    traces = tracing.enc_broadcast()
+    if traces:
+        acks = {}
+        for t in traces:
+            if t.conn is not None and t.client_id is not None:
+                acks[t.conn] = max(acks.get(t.conn, t.client_id), t.client_id)
+        latest = traces[-1]
+        data = dict(data, trace={
+            "id": latest.id,
+            "server_ms": round((time.perf_counter() - latest.t_recv) * 1000.0, 2),
+            "acks": acks,
+        })
+    enc_topic.publish(data)
 
 
 # ----------------------------------------------------------------------
@@ -40,16 +59,13 @@ async def broadcast_enc(data):
 # ----------------------------------------------------------------------
 async def ws_enc_handler(websocket):
     print("[WS-ENC] Client connecté")
-    enc_clients.add(websocket)
 
     try:
-        async for _ in websocket:
-            # Le client ne parle pas, il ne fait que recevoir.
-            pass
+        # Le client ne parle pas, il ne fait que recevoir.
+        await enc_topic.serve(websocket)
 
     except Exception as e:
         print("[WS-ENC] ERREUR :", e)
 
     finally:
-        enc_clients.discard(websocket)
         print("[WS-ENC] Client déconnecté")
@@ -0,0 +1,181 @@
+"""
+ws_hub.py
+---------
+Hub de diffusion commun aux WebSockets de streaming :
+    /ws-enc, /ws-radar, /ws-ai, /ws-sys, /ws-metrics
+
+- Un Topic par flux : chaque message est sérialisé UNE fois (json.dumps)
+  puis déposé dans la file de chaque client
+- File bornée par client, politique drop-oldest : un onglet cockpit lent
+  perd ses messages les plus anciens au lieu de ralentir l'éditeur
+  (thread UART, boucle IA)
+- Une tâche d'envoi par client : publish() ne fait jamais d'await
+- Compteurs par client (backlog, envoyés, abandonnés) : stats()
+- Débit maximum par client (min_interval) : avec une file de longueur 1,
+  un client lent ne reçoit que la valeur la plus récente (coalescence)
+- Métriques par flux (telemetry/metrics.py) : ws_messages_{published,
+  sent,dropped}_total et ws_clients, étiquette "topic"
+
+Usage :
+    topic = get_topic("enc", maxlen=32)
+    topic.publish(data)                        # depuis l'event loop
+    await topic.serve(websocket)               # dans le handler WS
+
+Les flux échantillonnés (radar, système) ont une seule tâche productrice
+partagée (ensure_producer), active tant qu'au moins un client est abonné.
+"""
+
+import json
+import asyncio
+import itertools
+from collections import deque
+
+from telemetry import metrics
+
+_ids = itertools.count(1)
+
+PUBLISHED = metrics.counter("ws_messages_published_total", "Messages publiés par flux", ("topic",))
+SENT = metrics.counter("ws_messages_sent_total", "Messages envoyés aux clients", ("topic",))
+DROPPED = metrics.counter("ws_messages_dropped_total", "Messages abandonnés (client lent)", ("topic",))
+CLIENTS = metrics.gauge("ws_clients", "Clients abonnés", ("topic",))
+
+
+# ----------------------------------------------------------------------
+#  Client (file bornée + tâche d'envoi)
+# ----------------------------------------------------------------------
+class HubClient:
+
+    def __init__(self, websocket, maxlen, min_interval=0.0, topic_name=""):
+        self.id = next(_ids)
+        self.websocket = websocket
+        self.queue = deque(maxlen=maxlen)
+        self.min_interval = min_interval
+        self.sent = 0
+        self.dropped = 0
+        self._ready = asyncio.Event()
+        self._m_sent = SENT.labels(topic_name)
+        self._m_dropped = DROPPED.labels(topic_name)
+
+    def push(self, msg):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1      # deque(maxlen) évince le plus ancien
+            self._m_dropped.inc()
+        self.queue.append(msg)
+        self._ready.set()
+
+    async def run_sender(self):
+        """Vide la file vers le websocket jusqu'à la déconnexion."""
+        loop = asyncio.get_running_loop()
+        next_send = 0.0
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self.queue:
+                    if self.min_interval > 0.0:
+                        # Débit plafonné : les messages arrivés entre-temps
+                        # s'accumulent (ou se remplacent si maxlen=1)
+                        delay = next_send - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        next_send = loop.time() + self.min_interval
+                    await self.websocket.send(self.queue.popleft())
+                    self.sent += 1
+                    self._m_sent.inc()
+        except Exception as e:
+            print(f"[HUB] Envoi interrompu (client {self.id}) :", e)
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "max_hz": round(1.0 / self.min_interval, 1) if self.min_interval > 0 else None,
+            "backlog": len(self.queue),
+            "sent": int(self.sent),
+            "dropped": int(self.dropped),
+        }
+
+
+# ----------------------------------------------------------------------
+#  Topic (un flux, N clients)
+# ----------------------------------------------------------------------
+class Topic:
+
+    def __init__(self, name, maxlen=32):
+        self.name = name
+        self.maxlen = maxlen
+        self.clients = set()
+        self.published = 0
+        self._producer = None
+        self._m_published = PUBLISHED.labels(name)
+        CLIENTS.labels(name).set_function(lambda: len(self.clients))
+
+    def publish(self, data):
+        """
+        Sérialise `data` (sauf si déjà str) et le dépose chez chaque client.
+        Non bloquant, à appeler depuis l'event loop.
+        """
+        if not self.clients:
+            return
+        msg = data if isinstance(data, str) else json.dumps(data)
+        self.published += 1
+        self._m_published.inc()
+        for client in self.clients:
+            client.push(msg)
+
+    def ensure_producer(self, coro_fn):
+        """
+        Lance la tâche productrice partagée `coro_fn()` si elle ne tourne pas.
+        Elle doit s'arrêter d'elle-même quand `self.clients` est vide.
+        """
+        if self._producer is None or self._producer.done():
+            self._producer = asyncio.create_task(coro_fn())
+
+    def subscribe(self, websocket, maxlen=None, min_interval=0.0):
+        client = HubClient(websocket, maxlen or self.maxlen, min_interval, self.name)
+        self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        self.clients.discard(client)
+
+    async def serve(self, websocket, on_message=None, client=None):
+        """
+        Abonne `websocket` et le sert jusqu'à la déconnexion.
+        on_message(client, msg) : messages entrants (optionnel, sinon ignorés).
+        """
+        if client is None:
+            client = self.subscribe(websocket)
+        sender = asyncio.create_task(client.run_sender())
+        try:
+            async for msg in websocket:
+                if on_message is not None:
+                    on_message(client, msg)
+        finally:
+            sender.cancel()
+            self.unsubscribe(client)
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "published": int(self.published),
+            "per_client": [c.stats() for c in self.clients],
+        }
+
+
+# ----------------------------------------------------------------------
+#  Registre global
+# ----------------------------------------------------------------------
+_topics = {}
+
+
+def get_topic(name, maxlen=32):
+    topic = _topics.get(name)
+    if topic is None:
+        topic = Topic(name, maxlen)
+        _topics[name] = topic
+    return topic
+
+
+def hub_stats():
+    """Compteurs de tous les flux (diffusés sur /ws-sys)."""
+    return {name: topic.stats() for name, topic in _topics.items()}
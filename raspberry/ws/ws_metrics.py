@@ -0,0 +1,83 @@
+"""
+ws_metrics.py
+-------------
+WebSocket /ws-metrics
+Diffusion du registre de métriques (telemetry/metrics.py) vers le cockpit.
+
+Données envoyées (PERIOD_S) :
+    {
+        "t": <float>,               # horodatage (s, epoch)
+        "metrics": {...},           # metrics.snapshot()
+        "rates": {...}              # compteurs en /s depuis l'envoi précédent
+    }
+
+Une seule boucle partagée par tous les clients (ws_hub.py). Le même
+registre est exporté au format Prometheus par telemetry/metrics_http.py.
+"""
+
+import time
+import asyncio
+
+from telemetry import metrics
+from ws.ws_hub import get_topic
+
+PERIOD_S = 1.0
+
+metrics_topic = get_topic("metrics", maxlen=4)
+
+
+def _counter_values(snap):
+    """Compteurs du snapshot : {nom: valeur} ou {nom: {étiquette: valeur}}."""
+    return {m.name: snap[m.name] for m in metrics.families()
+            if m.kind == "counter" and m.name in snap}
+
+
+def _rates(current, previous, dt):
+    rates = {}
+    for name, value in current.items():
+        prev = previous.get(name)
+        if prev is None:
+            continue
+        if isinstance(value, dict):
+            rates[name] = {k: round((v - prev.get(k, 0)) / dt, 3)
+                           for k, v in value.items() if v is not None}
+        elif value is not None and prev is not None:
+            rates[name] = round((value - prev) / dt, 3)
+    return rates
+
+
+# ----------------------------------------------------------------------
+#  Diffusion partagée (active tant qu'un client est connecté)
+# ----------------------------------------------------------------------
+async def _metrics_producer():
+    previous, t_prev = {}, None
+
+    while metrics_topic.clients:
+        snap = metrics.snapshot()
+        now = time.monotonic()
+        counters = _counter_values(snap)
+        metrics_topic.publish({
+            "t": time.time(),
+            "metrics": snap,
+            "rates": _rates(counters, previous, now - t_prev) if t_prev else {},
+        })
+        previous, t_prev = counters, now
+        await asyncio.sleep(PERIOD_S)
+
+
+# ----------------------------------------------------------------------
+#  Handler WebSocket /ws-metrics
+# ----------------------------------------------------------------------
+async def ws_metrics_handler(websocket):
+    print("[WS-METRICS] Client connecté")
+
+    try:
+        client = metrics_topic.subscribe(websocket)
+        metrics_topic.ensure_producer(_metrics_producer)
+        await metrics_topic.serve(websocket, client=client)
+
+    except Exception as e:
+        print("[WS-METRICS] ERREUR :", e)
+
+    finally:
+        print("[WS-METRICS] Client déconnecté")
@@ -2,7 +2,7 @@
 ws_radar.py
 -----------
 WebSocket /ws-radar
-Diffusion continue des données radar HC-SR04 vers le cockpit.
+Diffusion des données radar HC-SR04 vers le cockpit.
 
 Données envoyées :
     {
@@ -10,12 +10,88 @@ Données envoyées :
         "signal_strength": <float>
     }
 
-Fréquence : 20 Hz (toutes les 50 ms)
+Diffusion sur changement (une seule boucle partagée, ws_hub.py) :
+- le radar est relu toutes les POLL_S secondes
+- un message n'est publié que si la distance varie d'au moins DELTA_CM
+  (ou le signal de DELTA_SIGNAL), ou au plus tard toutes les HEARTBEAT_S
+- débit maximum par client, demandé à la connexion :
+      ws://<robot>:8765/ws-radar?max_hz=10
+  ou à tout moment par message {"max_hz": 10} ; au-delà, seule la mesure
+  la plus récente est envoyée (coalescence)
 """
 
 import json
 import asyncio
+from urllib.parse import urlsplit, parse_qs
 from hardware import radar_hcsr04
+from ws.ws_hub import get_topic
+
+POLL_S = 0.02          # lecture du radar (50 Hz)
+DELTA_CM = 0.5         # variation minimale de distance publiée
+DELTA_SIGNAL = 0.05    # variation minimale de signal publiée
+HEARTBEAT_S = 1.0      # publication forcée (client toujours à jour)
+DEFAULT_MAX_HZ = 20.0
+
+# Flux radar : seule la dernière mesure compte (file de 1 = coalescence)
+radar_topic = get_topic("radar", maxlen=1)
+
+# Dernier message publié (envoyé tout de suite aux nouveaux clients)
+last_msg = None
+
+
+def _changed(value, last, delta):
+    if value is None or last is None:
+        return value != last
+    return abs(value - last) >= delta
+
+
+# ----------------------------------------------------------------------
+#  Échantillonnage partagé (actif tant qu'un client est connecté)
+# ----------------------------------------------------------------------
+async def _radar_producer():
+    global last_msg
+    loop = asyncio.get_running_loop()
+    last_distance = last_signal = None
+    last_publish = 0.0
+
+    while radar_topic.clients:
+        distance = radar_hcsr04.distance_value
+        signal = radar_hcsr04.signal_strength
+        now = loop.time()
+
+        if (_changed(distance, last_distance, DELTA_CM)
+                or _changed(signal, last_signal, DELTA_SIGNAL)
+                or now - last_publish >= HEARTBEAT_S):
+            last_msg = json.dumps({
+                "distance": distance,
+                "signal_strength": signal
+            })
+            radar_topic.publish(last_msg)
+            last_distance, last_signal, last_publish = distance, signal, now
+
+        await asyncio.sleep(POLL_S)
+
+
+# ----------------------------------------------------------------------
+#  Débit par client
+# ----------------------------------------------------------------------
+def _min_interval(max_hz):
+    try:
+        max_hz = float(max_hz)
+    except (TypeError, ValueError):
+        max_hz = DEFAULT_MAX_HZ
+    return 1.0 / max_hz if max_hz > 0 else 0.0
+
+
+def _on_message(client, msg):
+    """{"max_hz": <float>} : nouveau plafond pour ce client."""
+    try:
+        data = json.loads(msg)
+        client.min_interval = _min_interval(data["max_hz"])
+        print(f"[WS-RADAR] Client {client.id} : max_hz={data['max_hz']}")
+    except (ValueError, KeyError, TypeError):
+        print("[WS-RADAR] Message ignoré :", msg)
+
 
 # ----------------------------------------------------------------------
 #  Handler WebSocket /ws-radar
@@ -24,14 +100,14 @@ async def ws_radar_handler(websocket):
     print("[WS-RADAR] Client connecté")
 
     try:
-        while True:
-            msg = json.dumps({
-                "distance": radar_hcsr04.distance_value,
-                "signal_strength": radar_hcsr04.signal_strength
-            })
+        query = parse_qs(urlsplit(websocket.request.path).query)
+        max_hz = query.get("max_hz", [DEFAULT_MAX_HZ])[0]
 
-            await websocket.send(msg)
-            await asyncio.sleep(0.05)  # 20 Hz
+        client = radar_topic.subscribe(websocket, min_interval=_min_interval(max_hz))
+        if last_msg is not None:
+            client.push(last_msg)
+        radar_topic.ensure_producer(_radar_producer)
+        await radar_topic.serve(websocket, on_message=_on_message, client=client)
 
     except Exception as e:
         print("[WS-RADAR] ERREUR :", e)
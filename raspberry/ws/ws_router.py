@@ -11,15 +11,52 @@ Chaque WebSocket est géré dans un module séparé :
     /ws-enc        → ws_enc.py
     /ws-sys        → ws_sys.py
     /ws-rtc        → ws_rtc.py
+    /ws-metrics    → ws_metrics.py
+
+Les modules sont chargés à la demande (première connexion).
 """
 
-from ws.ws_ctrl import ws_ctrl_handler
-from ws.ws_ai import ws_ai_handler
-from ws.ws_ai_config import ws_ai_config_handler
-from ws.ws_radar import ws_radar_handler
-from ws.ws_enc import ws_enc_handler
-from ws.ws_sys import ws_sys_handler
-from ws.ws_rtc import ws_rtc_handler
+import time
+import asyncio
+import importlib
+from urllib.parse import urlsplit
+
+from telemetry import metrics
+
+# Chemin -> (module, handler). Le module n'est importé qu'à la première
+# connexion sur ce chemin : torch (via ai/) et aiortc (via ws_rtc) ne sont
+# chargés que si le cockpit ouvre la page IA / vidéo.
+ROUTES = {
+    "/ws-ctrl":      ("ws.ws_ctrl", "ws_ctrl_handler"),
+    "/ws-ai":        ("ws.ws_ai", "ws_ai_handler"),
+    "/ws-ai-config": ("ws.ws_ai_config", "ws_ai_config_handler"),
+    "/ws-radar":     ("ws.ws_radar", "ws_radar_handler"),
+    "/ws-enc":       ("ws.ws_enc", "ws_enc_handler"),
+    "/ws-sys":       ("ws.ws_sys", "ws_sys_handler"),
+    "/ws-rtc":       ("ws.ws_rtc", "ws_rtc_handler"),
+    "/ws-metrics":   ("ws.ws_metrics", "ws_metrics_handler"),
+}
+
+CONNECTIONS = metrics.counter("ws_connections_total", "Connexions WebSocket acceptées", ("path",))
+
+# Handlers déjà chargés
+_handlers = {}
+
+
+async def _get_handler(path):
+    """
+    Charge le handler de `path` au premier appel.
+    L'import se fait dans un thread pour ne pas bloquer l'event loop.
+    """
+    handler = _handlers.get(path)
+    if handler is None:
+        module_name, func_name = ROUTES[path]
+        t0 = time.perf_counter()
+        module = await asyncio.to_thread(importlib.import_module, module_name)
+        handler = getattr(module, func_name)
+        _handlers[path] = handler
+        print(f"[WS] Module {module_name} chargé en {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return handler
 
 
 # ----------------------------------------------------------------------
@@ -29,30 +66,15 @@ async def ws_router(websocket):
     """
     Route les connexions WebSocket vers le bon module.
     """
-    path = websocket.request.path
+    # Paramètres éventuels (?max_hz=...) lus par le handler lui-même
+    path = urlsplit(websocket.request.path).path
     print(f"[WS] Connexion entrante : {path}")
 
-    if path == "/ws-ctrl":
-        await ws_ctrl_handler(websocket)
-
-    elif path == "/ws-ai":
-        await ws_ai_handler(websocket)
-
-    elif path == "/ws-ai-config":
-        await ws_ai_config_handler(websocket)
-
-    elif path == "/ws-radar":
-        await ws_radar_handler(websocket)
-
-    elif path == "/ws-enc":
-        await ws_enc_handler(websocket)
-
-    elif path == "/ws-sys":
-        await ws_sys_handler(websocket)
-
-    elif path == "/ws-rtc":
-        await ws_rtc_handler(websocket)
-
-    else:
+    if path not in ROUTES:
         print(f"[WS] Chemin inconnu : {path}")
         await websocket.close()
+        return
+
+    CONNECTIONS.labels(path).inc()
+    handler = await _get_handler(path)
+    await handler(websocket)
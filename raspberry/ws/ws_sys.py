@@ -13,15 +13,39 @@ Données envoyées :
     "ip": "<string>"
 }
 
-Fréquence : 1 Hz
+Fréquence : 1 Hz, une seule boucle d'échantillonnage partagée par tous
+les clients (ws_hub.py). Le champ "hub" donne, par flux de streaming,
+le nombre de clients et leur backlog / messages abandonnés, le champ
+"uart" les compteurs du transport série (hardware/uart_link.py), le champ
+"trace" les latences p50 / p95 / p99 par étape (telemetry/tracing.py).
+
+Chaque métrique a sa propre période de rafraîchissement (REFRESH_S) : les
+valeurs lentes (IP, disque) sont mises en cache entre deux lectures. Le
+RSSI Wi-Fi est lu dans /proc/net/wireless (pas de sous-processus iwconfig).
 """
 
-import json
 import asyncio
 import psutil
 import socket
 import time
-import subprocess
+from ws.ws_hub import get_topic, hub_stats
+from hardware.uart_link import link_stats
+from telemetry import tracing
+
+# Période de rafraîchissement par métrique (s)
+REFRESH_S = {
+    "cpu_load": 1.0,
+    "ram": 2.0,
+    "cpu_temp": 5.0,
+    "wifi_rssi": 2.0,
+    "disk": 30.0,
+    "ip": 30.0,
+}
+
+WIFI_IFACE = "wlan0"
+
+# Flux système
+sys_topic = get_topic("sys", maxlen=4)
 
 
 def get_ip():
@@ -36,6 +60,70 @@ def get_ip():
         return "0.0.0.0"
 
 
+# ----------------------------------------------------------------------
+#  Échantillonneur partagé (cache par métrique)
+# ----------------------------------------------------------------------
+def _read_ram():
+    ram = psutil.virtual_memory()
+    return {"ram_used": ram.used, "ram_total": ram.total}
+
+
+def _read_disk():
+    disk = psutil.disk_usage("/")
+    return {"disk_used": disk.used, "disk_total": disk.total}
+
+
+_READERS = {
+    "cpu_load": lambda: {"cpu_load": psutil.cpu_percent()},
+    "ram": _read_ram,
+    "cpu_temp": lambda: {"cpu_temp": get_cpu_temp()},
+    "wifi_rssi": lambda: {"wifi_rssi": get_wifi_signal()},
+    "disk": _read_disk,
+    "ip": lambda: {"ip": get_ip()},
+}
+
+
+class SysSampler:
+    """
+    Instantané système partagé : sample() ne relit que les métriques
+    dont la période REFRESH_S est écoulée.
+    """
+
+    def __init__(self):
+        self.boot_time = psutil.boot_time()
+        self.snapshot = {}
+        self._next = {name: 0.0 for name in _READERS}
+
+    def sample(self):
+        now = time.monotonic()
+        for name, read in _READERS.items():
+            if now >= self._next[name]:
+                self.snapshot.update(read())
+                self._next[name] = now + REFRESH_S[name]
+        self.snapshot["uptime"] = time.time() - self.boot_time
+        return self.snapshot
+
+
+sampler = None
+
+
+# ----------------------------------------------------------------------
+#  Diffusion partagée (active tant qu'un client est connecté)
+# ----------------------------------------------------------------------
+async def _sys_producer():
+    global sampler
+    if sampler is None:
+        sampler = SysSampler()
+
+    while sys_topic.clients:
+        snapshot = dict(sampler.sample())
+        snapshot["hub"] = hub_stats()
+        snapshot["uart"] = link_stats()
+        snapshot["trace"] = tracing.stats()
+        sys_topic.publish(snapshot)
+        await asyncio.sleep(1.0)  # 1 Hz
+
+
 # ----------------------------------------------------------------------
 #  Handler WebSocket /ws-sys
 # ----------------------------------------------------------------------
@@ -43,27 +131,11 @@ async def ws_sys_handler(websocket):
     print("[WS-SYS] Client connecté")
 
     try:
-        while True:
-            cpu_load = psutil.cpu_percent()
-            ram = psutil.virtual_memory()
-            uptime = time.time() - psutil.boot_time()
-            disk = psutil.disk_usage("/")
-            ip = get_ip()
-
-            msg = json.dumps({
-                "cpu_temp": get_cpu_temp(),
-                "cpu_load": cpu_load,
-                "ram_used": ram.used,
-                "ram_total": ram.total,
-                "disk_used": disk.used,
-                "disk_total": disk.total,
-                "uptime": uptime,
-                "wifi_rssi": get_wifi_signal(),
-                "ip": ip,
-            })
-
-            await websocket.send(msg)
-            await asyncio.sleep(1.0)  # 1 Hz
+        client = sys_topic.subscribe(websocket)
+        if sampler is not None and sampler.snapshot:
+            client.push(dict(sampler.snapshot, hub=hub_stats()))  # affichage immédiat
+        sys_topic.ensure_producer(_sys_producer)
+        await sys_topic.serve(websocket, client=client)
 
     except Exception as e:
         print("[WS-SYS] ERREUR :", e)
@@ -71,17 +143,20 @@ async def ws_sys_handler(websocket):
     finally:
         print("[WS-SYS] Client déconnecté")
 
-def get_wifi_signal():
+def get_wifi_signal(iface=WIFI_IFACE):
+    """
+    Niveau de signal (dBm) depuis /proc/net/wireless :
+        Inter-| sta-|   Quality        | ...
+         face | tus | link level noise | ...
+         wlan0: 0000   70.  -40.  -256   ...
+    """
     try:
-        out = subprocess.check_output(["iwconfig", "wlan0"], stderr=subprocess.STDOUT).decode()
-        for line in out.split("\n"):
-            if "Signal level" in line:
-                # Exemple : "Link Quality=70/70  Signal level=-40 dBm"
-                parts = line.split("Signal level=")
-                if len(parts) > 1:
-                    level = parts[1].split(" ")[0]
-                    return int(level.replace("dBm", ""))
-    except:
+        with open("/proc/net/wireless") as f:
+            for line in f:
+                name, sep, rest = line.partition(":")
+                if sep and name.strip() == iface:
+                    return int(float(rest.split()[2]))
+    except (OSError, ValueError, IndexError):
         pass
     return None
 
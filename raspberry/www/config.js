@@ -33,10 +33,13 @@ const CONFIG_FIELDS = {
     tau: "cfg_tau",
     policy_delay: "cfg_policy_delay",
     batch_size: "cfg_batch_size",
+    utd_ratio: "cfg_utd_ratio",
+    train_budget_ms: "cfg_train_budget_ms",
 
     // Robot
     max_speed_linear: "cfg_max_speed_linear",
     max_speed_angular: "cfg_max_speed_angular",
+    uart_max_vel_hz: "cfg_uart_max_vel_hz",
 
     // Reward shaping
     reward_distance_weight: "cfg_reward_distance_weight",
@@ -81,13 +81,48 @@ encWs.onmessage = (ev) => {
     setText("enc_vx",   vx,   2);
     setText("enc_vy",   vy,   2);
     setText("enc_w",    w,    2);
+
+    // Latence joystick -> encodeur : seulement les seq OMNI de cet onglet
+    const acks = data.trace && data.trace.acks;
+    if (acks && acks[omniTab] !== undefined) ackOmni(acks[omniTab]);
 };
 
+// -------------------------------------------------------------
+//  LATENCE COMMANDE -> ENCODEUR (seq OMNI, voir ws_ctrl.py)
+// -------------------------------------------------------------
+const omniTab = Math.random().toString(36).slice(2, 10);   // identifiant de l'onglet
+let omniSeq = 0;
+const omniSent = new Map();      // seq -> performance.now()
+const omniLatency = [];          // ms, 100 dernières mesures
+
+function omniCmd(vx, vy, w) {
+    omniSeq += 1;
+    omniSent.set(omniSeq, performance.now());
+    if (omniSent.size > 200) omniSent.delete(omniSent.keys().next().value);
+    return `OMNI ${vx} ${vy} ${w} ${omniSeq} ${omniTab}`;
+}
+
+function ackOmni(seq) {
+    const now = performance.now();
+    // Toutes les commandes envoyées jusqu'à seq sont confirmées par cet ENC
+    for (const [s, t] of omniSent) {
+        if (s > seq) break;
+        omniLatency.push(now - t);
+        omniSent.delete(s);
+    }
+    while (omniLatency.length > 100) omniLatency.shift();
+    if (!omniLatency.length) return;
+
+    const sorted = [...omniLatency].sort((a, b) => a - b);
+    setText("lat_p50", sorted[Math.floor(sorted.length * 0.5)], 0);
+    setText("lat_p95", sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))], 0);
+}
+
 
 // -------------------------------------------------------------
 //  RADAR (/ws-radar) + Canvas radar
 // -------------------------------------------------------------
-const radarWs = new WebSocket("ws://" + location.hostname + ":8765/ws-radar");
+const radarWs = new WebSocket("ws://" + location.hostname + ":8765/ws-radar?max_hz=20");
 
 const radarCanvas = document.getElementById("radarCanvas");
 const rctx = radarCanvas.getContext("2d");
@@ -219,7 +254,7 @@ function sendOmni(vx, vy, w) {
     currentW  = w;
     omniActive = true;
 
-    sendRaw(`OMNI ${vx} ${vy} ${w}`);
+    sendRaw(omniCmd(vx, vy, w));
 }
 
 function sendStop() {
@@ -315,7 +350,7 @@ async function startWebRTC() {
 // -------------------------------------------------------------
 setInterval(() => {
     if (omniActive && ctrlWs.readyState === WebSocket.OPEN) {
-        sendRaw(`OMNI ${currentVx} ${currentVy} ${currentW}`, false);
+        sendRaw(omniCmd(currentVx, currentVy, currentW), false);
     }
     // Intégration grossière de l’angle à partir de W (robotAngle en radians)
     robotAngle += currentW * 0.05; // dt = 0.05s